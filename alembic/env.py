@@ -71,3 +71,9 @@ def run_migrations_online() -> None:
         with context.begin_transaction():
             context.run_migrations()
 
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
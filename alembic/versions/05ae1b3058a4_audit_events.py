@@ -0,0 +1,49 @@
+"""audit_events: histórico append-only de escritas
+
+Revision ID: 05ae1b3058a4
+Revises: 9787fa5f3d29
+Create Date: 2026-10-19 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '05ae1b3058a4'
+down_revision: Union[str, Sequence[str], None] = '9787fa5f3d29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # sem FKs: o histórico sobrevive à viagem/usuário e o insert em lote não trava nada
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=False),
+        sa.Column("trip_id", sa.Integer(), nullable=True),
+        sa.Column("entity", sa.String(length=16), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("action", sa.String(length=16), nullable=False),
+        sa.Column("changes", postgresql.JSONB(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # GET /trips/{id}/history: keyset por id decrescente
+    op.create_index(
+        "ix_audit_events_trip", "audit_events", ["trip_id", "id"],
+        postgresql_where=sa.text("trip_id IS NOT NULL"),
+    )
+    op.create_index("ix_audit_events_actor", "audit_events", ["actor_id", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_audit_events_actor", table_name="audit_events")
+    op.drop_index("ix_audit_events_trip", table_name="audit_events")
+    op.drop_table("audit_events")
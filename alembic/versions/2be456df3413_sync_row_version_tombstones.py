@@ -0,0 +1,127 @@
+"""sync: row_version/sync_xid/updated_at + sync_tombstones (GET /sync)
+
+Revision ID: 2be456df3413
+Revises: ebe48af61e03
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2be456df3413'
+down_revision: Union[str, Sequence[str], None] = 'ebe48af61e03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ("trips", "budget_items", "trip_budget_targets")
+
+FUNCTIONS = """
+-- toda escrita ganha uma versão nova e o xid da transação (ver app.routers.sync)
+CREATE OR REPLACE FUNCTION sync_touch() RETURNS trigger AS $$
+BEGIN
+    NEW.row_version := nextval('sync_version_seq');
+    NEW.sync_xid := pg_current_xact_id()::text::bigint;
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- TG_ARGV[0] = entidade (trip | item | target)
+CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+DECLARE
+    v_user_id integer;
+    v_trip_id integer;
+BEGIN
+    IF TG_TABLE_NAME = 'trips' THEN
+        v_user_id := OLD.user_id;
+        v_trip_id := OLD.id;
+        PERFORM 1 FROM users WHERE id = v_user_id;
+    ELSE
+        v_trip_id := OLD.trip_id;
+        SELECT user_id INTO v_user_id FROM trips WHERE id = v_trip_id;
+    END IF;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- cascade: a lápide do pai (viagem) já cobre os filhos
+    END IF;
+    INSERT INTO sync_tombstones (sync_xid, user_id, entity, entity_id, trip_id)
+    VALUES (pg_current_xact_id()::text::bigint, v_user_id, TG_ARGV[0], OLD.id, v_trip_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = """
+CREATE TRIGGER trips_sync_touch BEFORE INSERT OR UPDATE ON trips
+    FOR EACH ROW EXECUTE FUNCTION sync_touch();
+CREATE TRIGGER budget_items_sync_touch BEFORE INSERT OR UPDATE ON budget_items
+    FOR EACH ROW EXECUTE FUNCTION sync_touch();
+CREATE TRIGGER trip_budget_targets_sync_touch BEFORE INSERT OR UPDATE ON trip_budget_targets
+    FOR EACH ROW EXECUTE FUNCTION sync_touch();
+
+CREATE TRIGGER trips_sync_tombstone AFTER DELETE ON trips
+    FOR EACH ROW EXECUTE FUNCTION sync_tombstone('trip');
+CREATE TRIGGER budget_items_sync_tombstone AFTER DELETE ON budget_items
+    FOR EACH ROW EXECUTE FUNCTION sync_tombstone('item');
+CREATE TRIGGER trip_budget_targets_sync_tombstone AFTER DELETE ON trip_budget_targets
+    FOR EACH ROW EXECUTE FUNCTION sync_tombstone('target');
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE sync_version_seq")
+    for table in TABLES:
+        # default volátil: reescreve a tabela e numera as linhas existentes
+        op.add_column(table, sa.Column(
+            "row_version", sa.BigInteger(), server_default=sa.text("nextval('sync_version_seq')"), nullable=False,
+        ))
+        op.add_column(table, sa.Column("sync_xid", sa.BigInteger(), server_default=sa.text("0"), nullable=False))
+        op.add_column(table, sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False,
+        ))
+    op.create_index("ix_trips_sync", "trips", ["user_id", "sync_xid", "row_version"])
+    op.create_index("ix_budget_items_sync", "budget_items", ["trip_id", "sync_xid", "row_version"])
+    op.create_index("ix_trip_budget_targets_sync", "trip_budget_targets", ["trip_id", "sync_xid", "row_version"])
+
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("row_version", sa.BigInteger(), server_default=sa.text("nextval('sync_version_seq')"),
+                  nullable=False),
+        sa.Column("sync_xid", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=16), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("trip_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("row_version"),
+    )
+    op.create_index("ix_sync_tombstones_user", "sync_tombstones", ["user_id", "sync_xid", "row_version"])
+    op.create_index("ix_sync_tombstones_deleted_at", "sync_tombstones", ["deleted_at"])
+
+    op.execute(FUNCTIONS)
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_tombstone ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_sync_touch ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS sync_tombstone()")
+    op.execute("DROP FUNCTION IF EXISTS sync_touch()")
+    op.drop_index("ix_sync_tombstones_deleted_at", table_name="sync_tombstones")
+    op.drop_index("ix_sync_tombstones_user", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    op.drop_index("ix_trip_budget_targets_sync", table_name="trip_budget_targets")
+    op.drop_index("ix_budget_items_sync", table_name="budget_items")
+    op.drop_index("ix_trips_sync", table_name="trips")
+    for table in TABLES:
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "sync_xid")
+        op.drop_column(table, "row_version")
+    op.execute("DROP SEQUENCE IF EXISTS sync_version_seq")
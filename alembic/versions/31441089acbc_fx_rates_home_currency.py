@@ -0,0 +1,39 @@
+"""fx_rates + users.home_currency
+
+Revision ID: 31441089acbc
+Revises: 27de4b7cc54e
+Create Date: 2026-10-19 15:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '31441089acbc'
+down_revision: Union[str, Sequence[str], None] = '27de4b7cc54e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "fx_rates",
+        sa.Column("rate_date", sa.Date(), nullable=False),
+        sa.Column("base", sa.CHAR(length=3), nullable=False),
+        sa.Column("quote", sa.CHAR(length=3), nullable=False),
+        sa.Column("rate", sa.Numeric(18, 8), nullable=False),
+        # PK já indexa (rate_date, base, quote); o cache carrega a tabela inteira
+        sa.PrimaryKeyConstraint("rate_date", "base", "quote"),
+        sa.CheckConstraint("rate > 0", name="ck_fx_rates_positive"),
+    )
+    op.add_column("users", sa.Column("home_currency", sa.CHAR(length=3), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "home_currency")
+    op.drop_table("fx_rates")
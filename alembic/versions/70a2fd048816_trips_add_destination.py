@@ -0,0 +1,29 @@
+"""trips: add destination
+
+Revision ID: 70a2fd048816
+Revises: 20251023_seed_trips
+Create Date: 2026-10-19 10:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '70a2fd048816'
+down_revision: Union[str, Sequence[str], None] = '20251023_seed_trips'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # a coluna já existe em bancos onde foi criada manualmente (sql/)
+    op.execute("ALTER TABLE trips ADD COLUMN IF NOT EXISTS destination VARCHAR")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("trips", "destination")
@@ -0,0 +1,41 @@
+"""trips: índice GiST (user_id, daterange) para calendário e conflitos
+
+Revision ID: 72200fc64afd
+Revises: 05ae1b3058a4
+Create Date: 2026-10-19 23:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '72200fc64afd'
+down_revision: Union[str, Sequence[str], None] = '05ae1b3058a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# mesma expressão de app.models.TRIP_PERIOD: o planner só usa o índice se o texto bater
+PERIOD = "daterange(start_date, end_date, '[]')"
+ACTIVE = "deleted_at IS NULL AND start_date <= end_date"  # datas nulas/invertidas ficam de fora
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # btree_gist: user_id (=) e o período (&&) no mesmo índice GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist;")
+    op.create_index(
+        "ix_trips_user_period", "trips", ["user_id", sa.text(PERIOD)],
+        postgresql_using="gist", postgresql_where=sa.text(ACTIVE),
+    )
+    # btree (start_date, end_date) sem user_id: nenhuma query o usa
+    op.drop_index("ix_trip_period", table_name="trips")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index("ix_trip_period", "trips", ["start_date", "end_date"], unique=False)
+    op.drop_index("ix_trips_user_period", table_name="trips")
@@ -0,0 +1,251 @@
+"""trips.deleted_at (soft delete + purge em lotes) nos triggers de analytics/sync
+
+Revision ID: 7efceb42e4b4
+Revises: 2be456df3413
+Create Date: 2026-10-19 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7efceb42e4b4'
+down_revision: Union[str, Sequence[str], None] = '2be456df3413'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# viagem com deleted_at: já descontada dos agregados; a purga dos itens não desconta de novo
+ANALYTICS_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION analytics_apply_item(
+    p_trip_id integer, p_category_id integer, p_date date,
+    p_planned numeric, p_actual numeric, p_sign integer
+) RETURNS void AS $$
+DECLARE
+    t record;
+    v_year integer;
+BEGIN
+    SELECT user_id, currency_code, start_date INTO t FROM trips
+    WHERE id = p_trip_id AND deleted_at IS NULL;
+    IF NOT FOUND THEN
+        RETURN;  -- cascade de uma viagem apagada ou purga de uma soft-deleted
+    END IF;
+    v_year := coalesce(extract(year FROM coalesce(p_date, t.start_date))::int, 0);
+
+    INSERT INTO user_spend_rollup AS r (user_id, year, category_id, currency_code, planned, actual, items)
+    VALUES (t.user_id, v_year, p_category_id, coalesce(t.currency_code, ''),
+            p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (user_id, year, category_id, currency_code) DO UPDATE
+        SET planned = r.planned + EXCLUDED.planned,
+            actual = r.actual + EXCLUDED.actual,
+            items = r.items + EXCLUDED.items;
+
+    INSERT INTO trip_totals AS tt (trip_id, planned, actual, items)
+    VALUES (p_trip_id, p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (trip_id) DO UPDATE
+        SET planned = tt.planned + EXCLUDED.planned,
+            actual = tt.actual + EXCLUDED.actual,
+            items = tt.items + EXCLUDED.items;
+
+    IF p_sign < 0 THEN
+        DELETE FROM user_spend_rollup
+        WHERE user_id = t.user_id AND year = v_year AND category_id = p_category_id
+          AND currency_code = coalesce(t.currency_code, '') AND items = 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trips_analytics() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF OLD.deleted_at IS NOT NULL THEN
+            RETURN OLD;  -- descontada no soft delete
+        END IF;
+        IF EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+            PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        ELSE
+            -- cascade de um usuário apagado
+            DELETE FROM user_spend_rollup WHERE user_id = OLD.user_id;
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    IF OLD.deleted_at IS NOT NULL THEN
+        RETURN NEW;
+    END IF;
+    IF NEW.deleted_at IS NOT NULL THEN
+        PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        RETURN NEW;
+    END IF;
+
+    IF (OLD.user_id, OLD.currency_code, OLD.start_date)
+       IS DISTINCT FROM (NEW.user_id, NEW.currency_code, NEW.start_date) THEN
+        PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        PERFORM analytics_apply_trip(NEW.id, NEW.user_id, NEW.currency_code, NEW.start_date, 1);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# soft delete já gera a lápide da viagem; os filhos purgados depois não geram
+SYNC_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+DECLARE
+    v_user_id integer;
+    v_trip_id integer;
+BEGIN
+    IF TG_TABLE_NAME = 'trips' THEN
+        v_user_id := OLD.user_id;
+        v_trip_id := OLD.id;
+        PERFORM 1 FROM users WHERE id = v_user_id;
+    ELSE
+        v_trip_id := OLD.trip_id;
+        SELECT user_id INTO v_user_id FROM trips WHERE id = v_trip_id AND deleted_at IS NULL;
+    END IF;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- cascade/purga: a lápide do pai (viagem) já cobre os filhos
+    END IF;
+    INSERT INTO sync_tombstones (sync_xid, user_id, entity, entity_id, trip_id)
+    VALUES (pg_current_xact_id()::text::bigint, v_user_id, TG_ARGV[0], OLD.id, v_trip_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = """
+DROP TRIGGER trips_analytics_update ON trips;
+CREATE TRIGGER trips_analytics_update
+    AFTER UPDATE OF user_id, currency_code, start_date, deleted_at
+    ON trips FOR EACH ROW EXECUTE FUNCTION trips_analytics();
+
+DROP TRIGGER trips_sync_tombstone ON trips;
+CREATE TRIGGER trips_sync_tombstone AFTER DELETE ON trips
+    FOR EACH ROW WHEN (OLD.deleted_at IS NULL) EXECUTE FUNCTION sync_tombstone('trip');
+CREATE TRIGGER trips_sync_soft_delete AFTER UPDATE OF deleted_at ON trips
+    FOR EACH ROW WHEN (OLD.deleted_at IS NULL AND NEW.deleted_at IS NOT NULL)
+    EXECUTE FUNCTION sync_tombstone('trip');
+"""
+
+DOWNGRADE_TRIGGERS = """
+DROP TRIGGER IF EXISTS trips_sync_soft_delete ON trips;
+DROP TRIGGER trips_sync_tombstone ON trips;
+CREATE TRIGGER trips_sync_tombstone AFTER DELETE ON trips
+    FOR EACH ROW EXECUTE FUNCTION sync_tombstone('trip');
+
+DROP TRIGGER trips_analytics_update ON trips;
+CREATE TRIGGER trips_analytics_update
+    AFTER UPDATE OF user_id, currency_code, start_date
+    ON trips FOR EACH ROW EXECUTE FUNCTION trips_analytics();
+"""
+
+# versões anteriores (b6291ea5ea25 / 2be456df3413), restauradas no downgrade
+PREVIOUS_ANALYTICS_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION analytics_apply_item(
+    p_trip_id integer, p_category_id integer, p_date date,
+    p_planned numeric, p_actual numeric, p_sign integer
+) RETURNS void AS $$
+DECLARE
+    t record;
+    v_year integer;
+BEGIN
+    SELECT user_id, currency_code, start_date INTO t FROM trips WHERE id = p_trip_id;
+    IF NOT FOUND THEN
+        RETURN;  -- cascade de uma viagem apagada: trips_analytics já descontou
+    END IF;
+    v_year := coalesce(extract(year FROM coalesce(p_date, t.start_date))::int, 0);
+
+    INSERT INTO user_spend_rollup AS r (user_id, year, category_id, currency_code, planned, actual, items)
+    VALUES (t.user_id, v_year, p_category_id, coalesce(t.currency_code, ''),
+            p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (user_id, year, category_id, currency_code) DO UPDATE
+        SET planned = r.planned + EXCLUDED.planned,
+            actual = r.actual + EXCLUDED.actual,
+            items = r.items + EXCLUDED.items;
+
+    INSERT INTO trip_totals AS tt (trip_id, planned, actual, items)
+    VALUES (p_trip_id, p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (trip_id) DO UPDATE
+        SET planned = tt.planned + EXCLUDED.planned,
+            actual = tt.actual + EXCLUDED.actual,
+            items = tt.items + EXCLUDED.items;
+
+    IF p_sign < 0 THEN
+        DELETE FROM user_spend_rollup
+        WHERE user_id = t.user_id AND year = v_year AND category_id = p_category_id
+          AND currency_code = coalesce(t.currency_code, '') AND items = 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trips_analytics() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+            PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        ELSE
+            -- cascade de um usuário apagado
+            DELETE FROM user_spend_rollup WHERE user_id = OLD.user_id;
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    IF (OLD.user_id, OLD.currency_code, OLD.start_date)
+       IS DISTINCT FROM (NEW.user_id, NEW.currency_code, NEW.start_date) THEN
+        PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        PERFORM analytics_apply_trip(NEW.id, NEW.user_id, NEW.currency_code, NEW.start_date, 1);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+PREVIOUS_SYNC_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+DECLARE
+    v_user_id integer;
+    v_trip_id integer;
+BEGIN
+    IF TG_TABLE_NAME = 'trips' THEN
+        v_user_id := OLD.user_id;
+        v_trip_id := OLD.id;
+        PERFORM 1 FROM users WHERE id = v_user_id;
+    ELSE
+        v_trip_id := OLD.trip_id;
+        SELECT user_id INTO v_user_id FROM trips WHERE id = v_trip_id;
+    END IF;
+    IF NOT FOUND THEN
+        RETURN NULL;  -- cascade: a lápide do pai (viagem) já cobre os filhos
+    END IF;
+    INSERT INTO sync_tombstones (sync_xid, user_id, entity, entity_id, trip_id)
+    VALUES (pg_current_xact_id()::text::bigint, v_user_id, TG_ARGV[0], OLD.id, v_trip_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("trips", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_trips_deleted_at", "trips", ["deleted_at"],
+        postgresql_where=sa.text("deleted_at IS NOT NULL"),
+    )
+    op.execute(ANALYTICS_FUNCTIONS)
+    op.execute(SYNC_FUNCTIONS)
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # viagens soft-deleted voltariam a aparecer: termine a purga antes
+    op.execute("DELETE FROM trips WHERE deleted_at IS NOT NULL")
+    op.execute(DOWNGRADE_TRIGGERS)
+    op.execute(PREVIOUS_ANALYTICS_FUNCTIONS)
+    op.execute(PREVIOUS_SYNC_FUNCTIONS)
+    op.drop_index("ix_trips_deleted_at", table_name="trips")
+    op.drop_column("trips", "deleted_at")
@@ -0,0 +1,47 @@
+"""trip_totals.version: muda a cada escrita que afeta os totais da viagem
+
+Revision ID: 9787fa5f3d29
+Revises: aeaf7d3ed512
+Create Date: 2026-10-19 22:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9787fa5f3d29'
+down_revision: Union[str, Sequence[str], None] = 'aeaf7d3ed512'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# mesma sequência do sync: nunca repete, nem depois de um analytics-rebuild
+FUNCTIONS = """
+CREATE OR REPLACE FUNCTION trip_totals_bump() RETURNS trigger AS $$
+BEGIN
+    NEW.version := nextval('sync_version_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trip_totals_bump BEFORE UPDATE ON trip_totals
+    FOR EACH ROW EXECUTE FUNCTION trip_totals_bump();
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("trip_totals", sa.Column(
+        "version", sa.BigInteger(), server_default=sa.text("nextval('sync_version_seq')"), nullable=False,
+    ))
+    op.execute(FUNCTIONS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trip_totals_bump ON trip_totals")
+    op.execute("DROP FUNCTION IF EXISTS trip_totals_bump()")
+    op.drop_column("trip_totals", "version")
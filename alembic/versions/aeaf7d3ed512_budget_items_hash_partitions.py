@@ -0,0 +1,94 @@
+"""budget_items: particionamento HASH (trip_id)
+
+Revision ID: aeaf7d3ed512
+Revises: f037441db7fe
+Create Date: 2026-10-19 21:30:00.000000
+
+"""
+from typing import Optional, Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'aeaf7d3ed512'
+down_revision: Union[str, Sequence[str], None] = 'f037441db7fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# alembic -x budget_items_partitions=32 upgrade head
+DEFAULT_PARTITIONS = 16
+
+INDEXES = {
+    "ix_budget_items_category_id": ["category_id"],
+    "ix_budget_items_trip_date": ["trip_id", "date"],
+    "ix_budget_items_sync": ["trip_id", "sync_xid", "row_version"],
+}
+
+# mesmas definições de b6291ea5ea25 / 2be456df3413; numa tabela particionada valem para todas as partições
+TRIGGERS = """
+CREATE TRIGGER budget_items_analytics
+    AFTER INSERT OR DELETE OR UPDATE OF trip_id, category_id, date, planned_amount, actual_amount
+    ON budget_items FOR EACH ROW EXECUTE FUNCTION budget_items_analytics();
+CREATE TRIGGER budget_items_sync_touch BEFORE INSERT OR UPDATE ON budget_items
+    FOR EACH ROW EXECUTE FUNCTION sync_touch();
+CREATE TRIGGER budget_items_sync_tombstone AFTER DELETE ON budget_items
+    FOR EACH ROW EXECUTE FUNCTION sync_tombstone('item');
+"""
+
+
+def _rebuild(partitions: Optional[int]) -> None:
+    """Recria budget_items (particionada ou não) com os mesmos dados, índices, FKs e triggers."""
+    # leituras seguem durante a cópia; escritas esperam o fim da migration
+    op.execute("LOCK TABLE budget_items IN EXCLUSIVE MODE")
+    op.execute("SET LOCAL maintenance_work_mem = '512MB'")
+    partition_by = " PARTITION BY HASH (trip_id)" if partitions else ""
+    op.execute(
+        "CREATE TABLE budget_items_new (LIKE budget_items INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        + partition_by
+    )
+    for i in range(partitions or 0):
+        op.execute(
+            f"CREATE TABLE budget_items_p{i:02d} PARTITION OF budget_items_new "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+        )
+    # sem triggers ainda: a cópia não mexe nos agregados nem nas versões de sync
+    op.execute("INSERT INTO budget_items_new SELECT * FROM budget_items")
+    # a sequência do id passa para a tabela nova (senão o DROP a leva junto)
+    op.execute("ALTER SEQUENCE budget_items_id_seq OWNED BY budget_items_new.id")
+    op.execute("DROP TABLE budget_items")
+    op.execute("ALTER TABLE budget_items_new RENAME TO budget_items")
+
+    # a PK de uma tabela particionada precisa conter a chave de partição
+    op.create_primary_key("budget_items_pkey", "budget_items", ["trip_id", "id"] if partitions else ["id"])
+    op.create_foreign_key(
+        "budget_items_trip_id_fkey", "budget_items", "trips", ["trip_id"], ["id"], ondelete="CASCADE",
+    )
+    op.create_foreign_key(
+        "budget_items_category_id_fkey", "budget_items", "budget_categories", ["category_id"], ["id"],
+        ondelete="RESTRICT",
+    )
+    indexes = dict(INDEXES)
+    if not partitions:
+        # na particionada, a PK (trip_id, id) cobre
+        indexes["ix_budget_items_trip_id"] = ["trip_id"]
+    for name, columns in indexes.items():
+        op.create_index(name, "budget_items", columns)
+    op.create_index(
+        "ix_budget_items_title_trgm", "budget_items", [sa.text("title gin_trgm_ops")], postgresql_using="gin",
+    )
+    op.execute(TRIGGERS)
+    op.execute("ANALYZE budget_items")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    partitions = int(context.get_x_argument(as_dictionary=True).get("budget_items_partitions", DEFAULT_PARTITIONS))
+    _rebuild(partitions)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild(None)
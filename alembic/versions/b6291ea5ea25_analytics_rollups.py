@@ -0,0 +1,194 @@
+"""analytics rollups (user_spend_rollup, trip_totals) + triggers
+
+Revision ID: b6291ea5ea25
+Revises: bc9cff2eba13
+Create Date: 2026-10-19 17:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6291ea5ea25'
+down_revision: Union[str, Sequence[str], None] = 'bc9cff2eba13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FUNCTIONS = """
+-- aplica um item (sinal +1/-1) nos agregados
+CREATE OR REPLACE FUNCTION analytics_apply_item(
+    p_trip_id integer, p_category_id integer, p_date date,
+    p_planned numeric, p_actual numeric, p_sign integer
+) RETURNS void AS $$
+DECLARE
+    t record;
+    v_year integer;
+BEGIN
+    SELECT user_id, currency_code, start_date INTO t FROM trips WHERE id = p_trip_id;
+    IF NOT FOUND THEN
+        RETURN;  -- cascade de uma viagem apagada: trips_analytics já descontou
+    END IF;
+    v_year := coalesce(extract(year FROM coalesce(p_date, t.start_date))::int, 0);
+
+    INSERT INTO user_spend_rollup AS r (user_id, year, category_id, currency_code, planned, actual, items)
+    VALUES (t.user_id, v_year, p_category_id, coalesce(t.currency_code, ''),
+            p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (user_id, year, category_id, currency_code) DO UPDATE
+        SET planned = r.planned + EXCLUDED.planned,
+            actual = r.actual + EXCLUDED.actual,
+            items = r.items + EXCLUDED.items;
+
+    INSERT INTO trip_totals AS tt (trip_id, planned, actual, items)
+    VALUES (p_trip_id, p_sign * coalesce(p_planned, 0), p_sign * coalesce(p_actual, 0), p_sign)
+    ON CONFLICT (trip_id) DO UPDATE
+        SET planned = tt.planned + EXCLUDED.planned,
+            actual = tt.actual + EXCLUDED.actual,
+            items = tt.items + EXCLUDED.items;
+
+    IF p_sign < 0 THEN
+        DELETE FROM user_spend_rollup
+        WHERE user_id = t.user_id AND year = v_year AND category_id = p_category_id
+          AND currency_code = coalesce(t.currency_code, '') AND items = 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- aplica todos os itens de uma viagem com os atributos dados (sinal +1/-1)
+CREATE OR REPLACE FUNCTION analytics_apply_trip(
+    p_trip_id integer, p_user_id integer, p_currency text, p_start date, p_sign integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO user_spend_rollup AS r (user_id, year, category_id, currency_code, planned, actual, items)
+    SELECT p_user_id,
+           coalesce(extract(year FROM coalesce(bi.date, p_start))::int, 0),
+           bi.category_id,
+           coalesce(p_currency, ''),
+           p_sign * coalesce(sum(bi.planned_amount), 0),
+           p_sign * coalesce(sum(bi.actual_amount), 0),
+           p_sign * count(*)
+    FROM budget_items bi
+    WHERE bi.trip_id = p_trip_id
+    GROUP BY 2, 3
+    ON CONFLICT (user_id, year, category_id, currency_code) DO UPDATE
+        SET planned = r.planned + EXCLUDED.planned,
+            actual = r.actual + EXCLUDED.actual,
+            items = r.items + EXCLUDED.items;
+
+    IF p_sign < 0 THEN
+        DELETE FROM user_spend_rollup WHERE user_id = p_user_id AND items = 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION budget_items_analytics() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM analytics_apply_item(OLD.trip_id, OLD.category_id, OLD.date,
+                                     OLD.planned_amount, OLD.actual_amount, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM analytics_apply_item(NEW.trip_id, NEW.category_id, NEW.date,
+                                     NEW.planned_amount, NEW.actual_amount, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trips_analytics() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF EXISTS (SELECT 1 FROM users WHERE id = OLD.user_id) THEN
+            PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        ELSE
+            -- cascade de um usuário apagado
+            DELETE FROM user_spend_rollup WHERE user_id = OLD.user_id;
+        END IF;
+        RETURN OLD;
+    END IF;
+
+    IF (OLD.user_id, OLD.currency_code, OLD.start_date)
+       IS DISTINCT FROM (NEW.user_id, NEW.currency_code, NEW.start_date) THEN
+        PERFORM analytics_apply_trip(OLD.id, OLD.user_id, OLD.currency_code, OLD.start_date, -1);
+        PERFORM analytics_apply_trip(NEW.id, NEW.user_id, NEW.currency_code, NEW.start_date, 1);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TRIGGERS = """
+CREATE TRIGGER budget_items_analytics
+    AFTER INSERT OR DELETE OR UPDATE OF trip_id, category_id, date, planned_amount, actual_amount
+    ON budget_items FOR EACH ROW EXECUTE FUNCTION budget_items_analytics();
+
+-- BEFORE: os itens ainda existem para serem descontados
+CREATE TRIGGER trips_analytics_delete
+    BEFORE DELETE ON trips FOR EACH ROW EXECUTE FUNCTION trips_analytics();
+
+CREATE TRIGGER trips_analytics_update
+    AFTER UPDATE OF user_id, currency_code, start_date
+    ON trips FOR EACH ROW EXECUTE FUNCTION trips_analytics();
+"""
+
+BACKFILL = """
+INSERT INTO user_spend_rollup (user_id, year, category_id, currency_code, planned, actual, items)
+SELECT t.user_id,
+       coalesce(extract(year FROM coalesce(bi.date, t.start_date))::int, 0),
+       bi.category_id,
+       coalesce(t.currency_code, ''),
+       coalesce(sum(bi.planned_amount), 0),
+       coalesce(sum(bi.actual_amount), 0),
+       count(*)
+FROM budget_items bi JOIN trips t ON t.id = bi.trip_id
+GROUP BY 1, 2, 3, 4;
+
+INSERT INTO trip_totals (trip_id, planned, actual, items)
+SELECT trip_id, coalesce(sum(planned_amount), 0), coalesce(sum(actual_amount), 0), count(*)
+FROM budget_items
+GROUP BY trip_id;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_spend_rollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.SmallInteger(), nullable=False),
+        sa.Column("category_id", sa.SmallInteger(), nullable=False),
+        sa.Column("currency_code", sa.String(length=3), nullable=False),
+        sa.Column("planned", sa.Numeric(14, 2), nullable=False),
+        sa.Column("actual", sa.Numeric(14, 2), nullable=False),
+        sa.Column("items", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "year", "category_id", "currency_code"),
+    )
+    op.create_table(
+        "trip_totals",
+        sa.Column("trip_id", sa.Integer(), sa.ForeignKey("trips.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("planned", sa.Numeric(14, 2), nullable=False),
+        sa.Column("actual", sa.Numeric(14, 2), nullable=False),
+        sa.Column("items", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("trip_id"),
+    )
+    op.execute(FUNCTIONS)
+    # backfill e triggers na mesma transação, com escritas bloqueadas
+    op.execute("LOCK TABLE trips, budget_items IN SHARE MODE")
+    op.execute(BACKFILL)
+    op.execute(TRIGGERS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS trips_analytics_update ON trips")
+    op.execute("DROP TRIGGER IF EXISTS trips_analytics_delete ON trips")
+    op.execute("DROP TRIGGER IF EXISTS budget_items_analytics ON budget_items")
+    op.execute("DROP FUNCTION IF EXISTS trips_analytics()")
+    op.execute("DROP FUNCTION IF EXISTS budget_items_analytics()")
+    op.execute("DROP FUNCTION IF EXISTS analytics_apply_trip(integer, integer, text, date, integer)")
+    op.execute("DROP FUNCTION IF EXISTS analytics_apply_item(integer, integer, date, numeric, numeric, integer)")
+    op.drop_table("trip_totals")
+    op.drop_table("user_spend_rollup")
@@ -0,0 +1,29 @@
+"""budget_items: index (trip_id, date)
+
+Revision ID: bc9cff2eba13
+Revises: 31441089acbc
+Create Date: 2026-10-19 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bc9cff2eba13'
+down_revision: Union[str, Sequence[str], None] = '31441089acbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # /trips/{id}/timeseries e filtros date_from/date_until de /items
+    op.create_index("ix_budget_items_trip_date", "budget_items", ["trip_id", "date"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_budget_items_trip_date", table_name="budget_items")
@@ -0,0 +1,41 @@
+"""search: pg_trgm + GIN indexes (trips.name, trips.destination, budget_items.title)
+
+Revision ID: ebe48af61e03
+Revises: b6291ea5ea25
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ebe48af61e03'
+down_revision: Union[str, Sequence[str], None] = 'b6291ea5ea25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    "ix_trips_name_trgm": ("trips", "name"),
+    "ix_trips_destination_trgm": ("trips", "destination"),
+    "ix_budget_items_title_trgm": ("budget_items", "title"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    # gin_trgm_ops atende ILIKE '%termo%' e word_similarity (<%) usados em GET /search
+    for name, (table, column) in INDEXES.items():
+        op.create_index(
+            name, table, [sa.text(f"{column} gin_trgm_ops")], postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
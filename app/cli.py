@@ -0,0 +1,186 @@
+# app/cli.py
+"""
+Comandos de manutenção.
+
+    python -m app.cli fx-load cotacoes.csv
+    python -m app.cli analytics-rebuild [--user-id N]
+    python -m app.cli sync-purge [--days N]
+    python -m app.cli trips-purge [--limit N]
+    python -m app.cli worker [--threads N] [--kinds K ...]
+    python -m app.cli enqueue KIND [--payload JSON] [--user-id N]
+
+fx-load: CSV com cabeçalho `date,base,quote,rate` (ISO 8601, códigos ISO
+4217). Faz upsert em lotes; reexecutar o mesmo arquivo é seguro.
+
+analytics-rebuild: recalcula user_spend_rollup/trip_totals a partir de
+budget_items (backfill). Bloqueia escritas em trips/budget_items enquanto roda.
+
+sync-purge: apaga lápides de GET /sync mais velhas que N dias (padrão
+SYNC_TOMBSTONE_TTL_DAYS), em lotes. Rodar diariamente (cron).
+
+trips-purge: termina a purga em lotes das viagens soft-deleted (DELETE de
+viagens grandes). Seguro rodar junto com a purga em background.
+
+worker: processa a fila de jobs (app.core.jobs) até SIGINT/SIGTERM. Rode
+quantos processos quiser; cada job é pego por um só.
+
+enqueue: cria um job à mão (ex.: `enqueue analytics_rebuild`).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import signal
+import sys
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    batch: list[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parse_fx_rows(fh) -> Iterator[dict]:
+    for lineno, row in enumerate(csv.DictReader(fh), start=2):
+        try:
+            rate = Decimal(row["rate"])
+            if rate <= 0:
+                raise InvalidOperation
+            yield {
+                "rate_date": date.fromisoformat(row["date"].strip()),
+                "base": row["base"].strip().upper(),
+                "quote": row["quote"].strip().upper(),
+                "rate": rate,
+            }
+        except (KeyError, ValueError, InvalidOperation) as e:
+            raise SystemExit(f"linha {lineno} inválida: {row!r} ({e.__class__.__name__})")
+
+
+def fx_load(path: str, batch_size: int) -> int:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from app.db import get_engine
+    from app.models import FxRate
+
+    table = FxRate.__table__
+    stmt = pg_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.rate_date, table.c.base, table.c.quote],
+        set_={"rate": stmt.excluded.rate},
+    )
+    total = 0
+    with open(path, newline="", encoding="utf-8") as fh:
+        for batch in _batches(_parse_fx_rows(fh), batch_size):
+            with get_engine().begin() as conn:
+                conn.execute(stmt, batch)
+            total += len(batch)
+    return total
+
+
+def sync_purge(days: int, batch_size: int) -> int:
+    from sqlalchemy import text
+
+    from app.db import get_engine
+
+    stmt = text("""
+        DELETE FROM sync_tombstones WHERE row_version IN (
+            SELECT row_version FROM sync_tombstones
+            WHERE deleted_at < now() - make_interval(days => :days)
+            LIMIT :batch
+        )
+    """)
+    total = 0
+    while True:
+        # transação curta por lote
+        with get_engine().begin() as conn:
+            n = conn.execute(stmt, {"days": days, "batch": batch_size}).rowcount
+        total += n
+        if n < batch_size:
+            return total
+
+
+def run_worker(threads: int, kinds: list[str] | None) -> None:
+    import threading
+
+    from app.core.jobs import WorkerPool
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    pool = WorkerPool(threads, kinds)
+    pool.start()
+    print(f"worker: {threads} threads, kinds={kinds or 'todos'}", flush=True)
+    stop.wait()
+    # o job em andamento termina (até o timeout); o resto volta pela fila
+    pool.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("fx-load", help="carrega cotações de um CSV em fx_rates")
+    p.add_argument("path")
+    p.add_argument("--batch-size", type=int, default=5000)
+
+    p = sub.add_parser("analytics-rebuild", help="recalcula os agregados de /users/me/analytics")
+    p.add_argument("--user-id", type=int, help="só este usuário (padrão: todos)")
+
+    p = sub.add_parser("sync-purge", help="apaga lápides antigas de GET /sync")
+    p.add_argument("--days", type=int, help="idade mínima (padrão: SYNC_TOMBSTONE_TTL_DAYS)")
+    p.add_argument("--batch-size", type=int, default=5000)
+
+    p = sub.add_parser("trips-purge", help="purga em lotes as viagens soft-deleted")
+    p.add_argument("--limit", type=int, default=100, help="máximo de viagens nesta execução")
+
+    p = sub.add_parser("worker", help="processa a fila de jobs em background")
+    p.add_argument("--threads", type=int, default=2)
+    p.add_argument("--kinds", nargs="+", help="só estes tipos de job (padrão: todos)")
+
+    p = sub.add_parser("enqueue", help="cria um job na fila")
+    p.add_argument("kind")
+    p.add_argument("--payload", default="{}", help="JSON")
+    p.add_argument("--user-id", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "fx-load":
+        print(f"{fx_load(args.path, args.batch_size)} cotações carregadas")
+    elif args.command == "analytics-rebuild":
+        from app.core.analytics import rebuild
+
+        print(rebuild(args.user_id))
+    elif args.command == "sync-purge":
+        from app.core.settings import settings
+
+        days = args.days if args.days is not None else settings.sync_tombstone_ttl_days
+        print(f"{sync_purge(days, args.batch_size)} lápides apagadas")
+    elif args.command == "trips-purge":
+        from app.core.purge import purge_pending
+
+        print(purge_pending(args.limit))
+    elif args.command == "worker":
+        run_worker(args.threads, args.kinds)
+    elif args.command == "enqueue":
+        from app.core import jobs
+        from app.db import get_engine
+
+        if args.kind not in jobs.kinds():
+            raise SystemExit(f"tipo de job desconhecido: {args.kind} (conhecidos: {', '.join(jobs.kinds())})")
+        with get_engine().begin() as conn:
+            job_id = jobs.enqueue(conn, args.kind, json.loads(args.payload), user_id=args.user_id)
+        print(f"job {job_id} na fila")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
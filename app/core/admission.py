@@ -0,0 +1,266 @@
+# app/core/admission.py
+"""
+Controle de admissão na frente do pool do DB.
+
+As rotas são `def` síncronas: sob rajada, os requests enfileiram no
+threadpool e depois no checkout do pool até o cliente desistir. Aqui:
+- no máximo `max_concurrency` requests "de DB" por instância; os demais
+  esperam numa fila limitada (`max_queue`) por até `queue_timeout_s`;
+- fila cheia ou prazo estourado => 503 + Retry-After imediato;
+- rate limit em dois níveis => 429:
+  - aqui, antes da autenticação, um bucket grosso por credencial (hash do
+    Bearer; IP se anônimo), `rate_limit_preauth_factor` vezes mais largo.
+    Só segura enxurradas; um token novo ganha um bucket novo;
+  - por usuário autenticado (`take_user()`, chamado por get_current_user):
+    este é o limite de verdade. Tokens renovados caem no mesmo bucket, e
+    tokens aleatórios não criam (nem expulsam do LRU) buckets de usuário.
+
+O middleware roda no event loop (single-thread) e não precisa de lock; o
+bucket por usuário é tocado das threads das rotas `def`, com lock.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.core.settings import settings
+
+# rotas que não tocam o DB (ou não devem ser barradas)
+EXEMPT_PREFIXES = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json", "/favicon.ico")
+# streams longos (SSE): passam pelo rate limit mas não ocupam vaga de concorrência;
+# o limite deles é events_max_subscribers
+STREAMING_SUFFIXES = ("/events",)
+
+admission_shed = registry.counter(
+    "admission_shed_total",
+    "Requests recusados pelo controle de admissão",
+    ("reason",),
+)
+admission_wait = registry.histogram(
+    "admission_wait_seconds",
+    "Tempo na fila de admissão (requests admitidos)",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+def capacity_from_settings() -> int:
+    # uma vaga por conexão do pool: os leitores extras do /batch contam com isso
+    if settings.admission_max_concurrency:
+        return settings.admission_max_concurrency
+    return settings.db_pool_size + settings.db_max_overflow
+
+
+class Shed(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_s: float) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Shed("queue_full")
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            done, _ = await asyncio.wait({fut}, timeout=self.queue_timeout_s)
+        except asyncio.CancelledError:
+            # cliente desistiu enquanto esperava
+            if fut.done() and not fut.cancelled():
+                self.release()
+            else:
+                fut.cancel()
+                self._discard(fut)
+            raise
+        if not done:
+            if fut.done() and not fut.cancelled():
+                return  # vaga chegou junto com o timeout
+            fut.cancel()
+            self._discard(fut)
+            raise Shed("timeout")
+        # a vaga foi repassada por release(); `active` já a contabiliza
+
+    def try_acquire(self) -> bool:
+        """Vaga sem esperar (não fura a fila); False se não houver."""
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)  # repassa a vaga sem decrementar
+                return
+        self.active -= 1
+
+    def _discard(self, fut: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+
+
+class TokenBuckets:
+    """Token bucket por chave, com número máximo de chaves (LRU)."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10_000) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: str) -> Optional[float]:
+        """Consome 1 token. Retorna None se ok, ou segundos até haver token."""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        if tokens >= 1.0:
+            self._buckets[key] = (tokens - 1.0, now)
+            allowed = None
+        else:
+            self._buckets[key] = (tokens, now)
+            allowed = (1.0 - tokens) / self.rate
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+_user_buckets: Optional[TokenBuckets] = None
+_user_lock = threading.Lock()
+
+
+def take_user(user_id: int) -> Optional[float]:
+    """Consome 1 token do usuário. None se ok, ou segundos até haver token."""
+    global _user_buckets
+    if settings.rate_limit_rps <= 0:
+        return None
+    with _user_lock:
+        if _user_buckets is None:
+            _user_buckets = TokenBuckets(settings.rate_limit_rps, settings.rate_limit_burst or settings.rate_limit_rps)
+        wait = _user_buckets.take(f"u:{user_id}")
+    if wait is not None:
+        admission_shed.inc("rate_limited")
+    return wait
+
+
+def _client_key(scope: Scope) -> str:
+    auth = Headers(scope=scope).get("authorization")
+    if auth:
+        # hash do token (pré-autenticação): não dá para "gastar" o bucket de outro forjando claims
+        return "t:" + hashlib.blake2b(auth.encode(), digest_size=12).hexdigest()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout_s: float,
+        retry_after_s: int = 1,
+        rate_limit_rps: float = 0.0,
+        rate_limit_burst: float = 0.0,
+    ) -> None:
+        self.app = app
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue, queue_timeout_s)
+        self.buckets = TokenBuckets(rate_limit_rps, rate_limit_burst or rate_limit_rps) if rate_limit_rps > 0 else None
+        self.retry_after_s = retry_after_s
+        global _active
+        _active = self
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] == "/"
+            or scope["path"].startswith(EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.buckets is not None:
+            wait = self.buckets.take(_client_key(scope))
+            if wait is not None:
+                admission_shed.inc("rate_limited")
+                response = JSONResponse(
+                    {"detail": "Muitas requisições; tente novamente em instantes."},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+                await response(scope, receive, send)
+                return
+
+        if scope["path"].endswith(STREAMING_SUFFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        try:
+            await self.limiter.acquire()
+        except Shed as e:
+            admission_shed.inc(e.reason)
+            response = JSONResponse(
+                {"detail": "Servidor sobrecarregado; tente novamente em instantes."},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after_s)},
+            )
+            await response(scope, receive, send)
+            return
+
+        admission_wait.observe(time.perf_counter() - t0)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release()
+
+
+# instância montada pelo Starlette (para o /metrics)
+_active: Optional[AdmissionMiddleware] = None
+
+
+def try_borrow() -> bool:
+    """Vaga extra para trabalho paralelo de um request já admitido (GETs do /batch). Sem o middleware, concede."""
+    return _active is None or _active.limiter.try_acquire()
+
+
+def give_back() -> None:
+    if _active is not None:
+        _active.limiter.release()
+
+
+@registry.collector
+def _admission_metrics():
+    if _active is None:
+        return
+    limiter = _active.limiter
+    yield ("admission_in_flight", "gauge", "Requests admitidos em execução", (), (), float(limiter.active))
+    yield ("admission_queue_depth", "gauge", "Requests aguardando admissão", (), (), float(limiter.queued))
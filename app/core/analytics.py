@@ -0,0 +1,77 @@
+# app/core/analytics.py
+"""
+Agregados para /users/me/analytics.
+
+- user_spend_rollup: planned/actual/itens por usuário x ano x categoria x moeda;
+- trip_totals: planned/actual/itens por viagem.
+
+São mantidos incrementalmente por triggers (migration b6291ea5ea25):
+cada INSERT/UPDATE/DELETE em budget_items aplica a diferença (-antigo
++novo) nas duas tabelas. Mudar user_id/currency_code/start_date de uma
+viagem move a contribuição dela. Apagar a viagem desconta tudo antes do
+cascade. O ano é o do item ou, sem data, o do início da viagem (0 se
+nenhum dos dois).
+
+`rebuild()` recalcula do zero (backfill ou correção), com as escritas em
+budget_items/trips bloqueadas durante a transação:
+
+    python -m app.cli analytics-rebuild [--user-id N]
+
+ou em background, como job `analytics_rebuild` (app.core.jobs).
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core import jobs
+from app.db import get_engine
+
+_USER_FILTER = "AND t.user_id = :user_id"
+
+_REBUILD_ROLLUP = """
+    INSERT INTO user_spend_rollup (user_id, year, category_id, currency_code, planned, actual, items)
+    SELECT t.user_id,
+           coalesce(extract(year FROM coalesce(bi.date, t.start_date))::int, 0),
+           bi.category_id,
+           coalesce(t.currency_code, ''),
+           coalesce(sum(bi.planned_amount), 0),
+           coalesce(sum(bi.actual_amount), 0),
+           count(*)
+    FROM budget_items bi JOIN trips t ON t.id = bi.trip_id
+    WHERE t.deleted_at IS NULL {user_filter}
+    GROUP BY 1, 2, 3, 4
+"""
+_REBUILD_TRIP_TOTALS = """
+    INSERT INTO trip_totals (trip_id, planned, actual, items)
+    SELECT bi.trip_id, coalesce(sum(bi.planned_amount), 0), coalesce(sum(bi.actual_amount), 0), count(*)
+    FROM budget_items bi JOIN trips t ON t.id = bi.trip_id
+    WHERE t.deleted_at IS NULL {user_filter}
+    GROUP BY bi.trip_id
+"""
+
+
+def rebuild(user_id: Optional[int] = None) -> dict[str, int]:
+    """Recalcula os agregados (de um usuário ou de todos) a partir de budget_items."""
+    user_filter = _USER_FILTER if user_id is not None else ""
+    params = {"user_id": user_id}
+    with get_engine().begin() as conn:
+        # SHARE bloqueia escritas (e os triggers) até o fim do rebuild
+        conn.execute(text("LOCK TABLE trips, budget_items IN SHARE MODE"))
+        if user_id is None:
+            conn.execute(text("TRUNCATE user_spend_rollup, trip_totals"))
+        else:
+            conn.execute(text("DELETE FROM user_spend_rollup WHERE user_id = :user_id"), params)
+            conn.execute(
+                text("DELETE FROM trip_totals WHERE trip_id IN (SELECT id FROM trips WHERE user_id = :user_id)"),
+                params,
+            )
+        rollup = conn.execute(text(_REBUILD_ROLLUP.format(user_filter=user_filter)), params).rowcount
+        trips = conn.execute(text(_REBUILD_TRIP_TOTALS.format(user_filter=user_filter)), params).rowcount
+    return {"rollup_rows": rollup, "trips": trips}
+
+
+@jobs.handler("analytics_rebuild")
+def _rebuild_job(payload: dict) -> dict:
+    return rebuild(payload.get("user_id"))
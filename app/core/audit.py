@@ -0,0 +1,184 @@
+# app/core/audit.py
+"""
+Histórico de escritas (`audit_events`) sem escrita síncrona no caminho do request.
+
+- as rotas chamam `record(db, ...)` junto do `changes.publish()`: o evento
+  fica anotado na Session e só vai para a fila se a transação commitar
+  (rollback descarta);
+- a fila é limitada (`audit_queue_size`): cheia => o evento é descartado e
+  contado em `audit_events_total{outcome="dropped"}`, o request não espera;
+- a thread `audit-writer` junta até `audit_batch_size` eventos ou
+  `audit_flush_interval_s` e grava tudo num INSERT multi-row (uma ida ao
+  banco, uma transação). Falhou duas vezes => o lote é descartado
+  (`outcome="failed"`);
+- no shutdown (lifespan) o que está na fila é gravado antes de sair.
+
+Trade-off: eventos ainda na memória se perdem se o processo morrer sem
+shutdown (kill -9, OOM). É histórico para o usuário, não trilha contábil.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+from app.core.settings import settings
+from app.db import get_engine
+from app.models import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "audit_pending"  # chave em Session.info
+
+audit_events = registry.counter(
+    "audit_events_total",
+    "Eventos de auditoria por destino",
+    ("outcome",),  # queued | written | dropped | failed
+)
+audit_flush = registry.histogram(
+    "audit_flush_seconds",
+    "Duração de um INSERT em lote de audit_events",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def record(
+    db: Session,
+    actor_id: int,
+    entity: str,
+    action: str,
+    entity_id: int,
+    *,
+    trip_id: Optional[int] = None,
+    changes: Optional[dict[str, Any]] = None,
+) -> None:
+    """Anota um evento na transação de `db` (entity: trip|item|target|user). `changes` precisa ser JSON."""
+    db.info.setdefault(_PENDING, []).append({
+        "occurred_at": datetime.now(timezone.utc),
+        "actor_id": actor_id,
+        "trip_id": trip_id,
+        "entity": entity,
+        "entity_id": entity_id,
+        "action": action,
+        "changes": changes,
+    })
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        writer.submit(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+class AuditWriter:
+    def __init__(self, queue_size: int, batch_size: int, flush_interval_s: float) -> None:
+        self.enabled = queue_size > 0
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._queue: queue.Queue[dict] = queue.Queue(max(queue_size, 1))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, events: list[dict]) -> None:
+        if not self.enabled:
+            return
+        self.start()
+        for item in events:
+            try:
+                self._queue.put_nowait(item)
+                audit_events.inc("queued")
+            except queue.Full:
+                audit_events.inc("dropped")
+
+    def start(self) -> None:
+        # lazy: também sobe em runtimes sem lifespan (primeiro evento)
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout=timeout)
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def _next_batch(self) -> list[dict]:
+        # espera o primeiro evento; depois junta até encher o lote ou dar o intervalo
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval_s)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval_s
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> list[dict]:
+        batch: list[dict] = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: list[dict]) -> None:
+        for attempt in (1, 2):
+            t0 = time.perf_counter()
+            try:
+                with get_engine().begin() as conn:
+                    conn.execute(insert(AuditEvent.__table__).values(batch))
+            except Exception:
+                if attempt == 1:
+                    self._stop.wait(1.0)
+                    continue
+                logger.exception("audit: lote de %s eventos descartado", len(batch))
+                audit_events.inc("failed", amount=len(batch))
+                return
+            audit_flush.observe(time.perf_counter() - t0)
+            audit_events.inc("written", amount=len(batch))
+            return
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+        while batch := self._drain():
+            self._flush(batch)
+
+
+writer = AuditWriter(settings.audit_queue_size, settings.audit_batch_size, settings.audit_flush_interval_s)
+
+
+@registry.collector
+def _audit_metrics():
+    yield ("audit_queue_depth", "gauge", "Eventos de auditoria esperando o writer", (), (), float(writer.depth()))
@@ -0,0 +1,196 @@
+# app/core/changes.py
+"""
+Feed de mudanças por viagem (GET /trips/{trip_id}/events) via LISTEN/NOTIFY.
+
+- as rotas de escrita chamam `publish()` antes do commit: o NOTIFY é
+  transacional, o Postgres só entrega se a transação commitar;
+- uma conexão LISTEN por instância (thread `change-listener`, fora do pool
+  do SQLAlchemy) distribui os eventos para as filas dos assinantes daquela
+  viagem, no event loop de cada um;
+- cada assinante tem uma fila limitada (`events_queue_size`): cliente lento
+  que deixa a fila encher recebe `resync` e é desconectado, em vez de
+  acumular memória no servidor;
+- a conexão LISTEN só existe enquanto há assinantes (mais
+  `events_listener_idle_s`), para não manter o Neon acordado à toa;
+- ao (re)conectar, todos os assinantes recebem `ready`: eventos podem ter
+  sido perdidos enquanto não havia LISTEN, então o cliente roda GET /sync.
+
+O payload é pequeno (`{"trip_id", "entity", "op", "id"}`); o cliente busca
+os dados em GET /sync.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "trip_changes"
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+events_published = registry.counter(
+    "change_events_published_total",
+    "Eventos de mudança enviados com NOTIFY (entregues só se a transação commitar)",
+    ("entity", "op"),
+)
+events_delivered = registry.counter(
+    "change_events_delivered_total",
+    "Eventos colocados na fila de um assinante",
+)
+events_dropped = registry.counter(
+    "change_events_dropped_subscribers_total",
+    "Assinantes desconectados pelo servidor",
+    ("reason",),
+)
+
+
+def publish(db: Session, trip_id: int, entity: str, op: str, entity_id: int) -> None:
+    """Enfileira um evento na transação de `db` (entity: trip|item|target; op: create|update|delete)."""
+    payload = json.dumps({"trip_id": trip_id, "entity": entity, "op": op, "id": entity_id}, separators=(",", ":"))
+    db.execute(_NOTIFY_SQL, {"channel": CHANNEL, "payload": payload})
+    events_published.inc(entity, op)
+
+
+class Subscription:
+    """Fila de eventos de um cliente SSE. Só é tocada no event loop dele."""
+
+    def __init__(self, trip_id: int, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.trip_id = trip_id
+        self.loop = loop
+        self.queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, kind: str, data: str) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait((kind, data))
+            events_delivered.inc()
+        except asyncio.QueueFull:
+            # o consumidor ainda drena a fila cheia e vê a flag
+            self.overflowed = True
+            events_dropped.inc("overflow")
+
+
+class ChangeListener:
+    def __init__(self, idle_s: float) -> None:
+        self.idle_s = idle_s
+        self._subs: dict[int, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.connected = False
+
+    # -- assinantes (event loop) --
+    def subscribe(self, trip_id: int) -> Subscription:
+        sub = Subscription(trip_id, asyncio.get_running_loop(), settings.events_queue_size)
+        with self._lock:
+            self._subs.setdefault(trip_id, set()).add(sub)
+            if self.connected:
+                sub.offer("ready", "{}")
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.trip_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.trip_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2)
+
+    # -- thread de fundo --
+    def _broadcast(self, kind: str, data: str, trip_id: Optional[int] = None) -> None:
+        with self._lock:
+            if trip_id is None:
+                subs = [s for group in self._subs.values() for s in group]
+            else:
+                subs = list(self._subs.get(trip_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, kind, data)
+            except RuntimeError:  # loop já fechado
+                self.unsubscribe(sub)
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            trip_id = int(json.loads(payload)["trip_id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("evento de mudança inválido: %r", payload[:200])
+            return
+        self._broadcast("change", payload, trip_id)
+
+    def _idle(self, since: float) -> bool:
+        # decide e sai sob o lock: subscribe() vê _thread None e sobe outra
+        with self._lock:
+            if self._subs or time.monotonic() - since < self.idle_s:
+                return False
+            self._thread = None
+            return True
+
+    def _run(self) -> None:
+        import psycopg
+
+        from app.db import _get_database_url
+
+        dsn = _get_database_url().replace("postgresql+psycopg://", "postgresql://", 1)
+        backoff = 0.5
+        idle_since = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(dsn, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    with self._lock:
+                        self.connected = True
+                    self._broadcast("ready", "{}")
+                    backoff = 0.5
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._dispatch(notify.payload)
+                        if self.subscriber_count():
+                            idle_since = time.monotonic()
+                        elif self._idle(idle_since):
+                            return
+            except Exception:
+                if not self._stop.is_set():
+                    logger.exception("conexão LISTEN caiu; reconectando em %.1fs", backoff)
+            finally:
+                with self._lock:
+                    self.connected = False
+            if self._idle(idle_since):
+                return
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+listener = ChangeListener(settings.events_listener_idle_s)
+
+
+@registry.collector
+def _change_feed_metrics():
+    yield ("change_events_subscribers", "gauge", "Streams SSE abertos", (), (), float(listener.subscriber_count()))
+    yield ("change_events_listener_connected", "gauge", "Conexão LISTEN ativa (0/1)", (), (), float(listener.connected))
@@ -0,0 +1,94 @@
+# app/core/clone.py
+"""
+Cópia de viagem (POST /trips/{trip_id}/clone) inteira no banco.
+
+Viagem, metas e itens são copiados com INSERT ... SELECT na transação da
+rota; nenhuma linha passa pelo Python. Datas andam `shift_days` e valores
+são multiplicados por `rate` (troca de moeda), com arredondamento em
+centavos. `actual_amount` só é copiado com `copy_actual`: por padrão a
+cópia é um planejamento novo.
+
+Agregados: a viagem nova nasce com `deleted_at` preenchido. Assim o
+trigger de analytics ignora item a item (mesma regra da purga) e, no fim,
+a viagem volta a ser visível e entra em user_spend_rollup/trip_totals com
+uma soma por grupo. Nada disso aparece fora da transação.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry
+
+_CLONE_TRIP_SQL = text("""
+    INSERT INTO trips (user_id, name, destination, start_date, end_date, currency_code, total_budget, deleted_at)
+    SELECT user_id, coalesce(:name, name), destination,
+           start_date + CAST(:shift AS integer), end_date + CAST(:shift AS integer),
+           coalesce(:currency_code, currency_code), round(total_budget * CAST(:rate AS numeric), 2), now()
+    FROM trips WHERE id = :trip_id
+    RETURNING id
+""")
+_CLONE_TARGETS_SQL = text("""
+    INSERT INTO trip_budget_targets (trip_id, category_id, planned_amount)
+    SELECT :new_trip_id, category_id, round(planned_amount * CAST(:rate AS numeric), 2)
+    FROM trip_budget_targets WHERE trip_id = :trip_id
+""")
+# lê uma partição de budget_items e escreve em outra (HASH por trip_id)
+_CLONE_ITEMS_SQL = text("""
+    INSERT INTO budget_items (trip_id, category_id, title, planned_amount, actual_amount, date)
+    SELECT :new_trip_id, category_id, title,
+           round(planned_amount * CAST(:rate AS numeric), 2),
+           CASE WHEN CAST(:copy_actual AS boolean) THEN round(actual_amount * CAST(:rate AS numeric), 2) END,
+           date + CAST(:shift AS integer)
+    FROM budget_items WHERE trip_id = :trip_id
+    ORDER BY id
+""")
+# deleted_at => NULL: o trigger trips_analytics não aplica nada, então aplica-se aqui, agrupado
+_SHOW_SQL = text("UPDATE trips SET deleted_at = NULL WHERE id = :new_trip_id")
+_ROLLUP_SQL = text("""
+    SELECT analytics_apply_trip(id, user_id, currency_code, start_date, 1) FROM trips WHERE id = :new_trip_id
+""")
+_TRIP_TOTALS_SQL = text("""
+    INSERT INTO trip_totals (trip_id, planned, actual, items)
+    SELECT :new_trip_id, coalesce(sum(planned_amount), 0), coalesce(sum(actual_amount), 0), count(*)
+    FROM budget_items WHERE trip_id = :new_trip_id
+    HAVING count(*) > 0
+""")
+
+cloned_rows = registry.counter(
+    "trip_clone_rows_total",
+    "Linhas copiadas por POST /trips/{trip_id}/clone (contadas após o commit)",
+    ("table",),
+)
+
+
+def clone_trip(
+    db: Session,
+    trip_id: int,
+    *,
+    name: Optional[str] = None,
+    shift_days: int = 0,
+    currency_code: Optional[str] = None,
+    rate: Decimal = Decimal(1),
+    copy_actual: bool = False,
+) -> tuple[int, int, int]:
+    """Copia a viagem na transação de `db` (sem commit). Devolve (id novo, metas, itens)."""
+    params = {
+        "trip_id": trip_id,
+        "name": name,
+        "shift": shift_days,
+        "currency_code": currency_code,
+        "rate": rate,
+        "copy_actual": copy_actual,
+    }
+    new_trip_id = db.execute(_CLONE_TRIP_SQL, params).scalar_one()
+    params["new_trip_id"] = new_trip_id
+    targets = db.execute(_CLONE_TARGETS_SQL, params).rowcount
+    items = db.execute(_CLONE_ITEMS_SQL, params).rowcount
+    db.execute(_SHOW_SQL, params)
+    db.execute(_ROLLUP_SQL, params)
+    db.execute(_TRIP_TOTALS_SQL, params)
+    return new_trip_id, targets, items
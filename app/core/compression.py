@@ -0,0 +1,274 @@
+# app/core/compression.py
+"""
+Middleware ASGI de compressão de respostas (gzip sempre; br/zstd se as libs
+opcionais `brotli` / `zstandard` estiverem instaladas).
+
+- respeita Accept-Encoding (com q-values) e uma ordem de preferência;
+- ignora respostas pequenas (< minimum_size), 204/304, HEAD e conteúdos
+  já comprimidos (imagens, zip, Content-Encoding existente);
+- StreamingResponse é comprimida chunk a chunk (flush por chunk), sem
+  bufferizar o corpo inteiro.
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Iterable, Optional, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # opcional
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+try:  # opcional
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - depende do ambiente
+    zstandard = None
+
+
+# tipos que não vale a pena comprimir (já comprimidos ou binários opacos)
+_INCOMPRESSIBLE_PREFIXES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/zstd",
+    "application/octet-stream",
+    "application/pdf",
+    # SSE: cada evento precisa sair na hora, sem esperar o compressor
+    "text/event-stream",
+)
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+    def finish(self) -> bytes: ...
+
+
+class _GzipStream:
+    def __init__(self, level: int) -> None:
+        # wbits=16+MAX_WBITS => container gzip (header + crc)
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int) -> None:
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int) -> None:
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> list[str]:
+    """Encodings suportados neste processo (depende das libs opcionais)."""
+    encs = []
+    if brotli is not None:
+        encs.append("br")
+    if zstandard is not None:
+        encs.append("zstd")
+    encs.append("gzip")
+    return encs
+
+
+def compress_bytes(encoding: str, data: bytes, level: int) -> bytes:
+    """Compressão one-shot (corpo inteiro já em memória)."""
+    if encoding == "gzip":
+        obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return obj.compress(data) + obj.flush()
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"encoding não suportado: {encoding}")
+
+
+def stream_compressor(encoding: str, level: int) -> StreamCompressor:
+    if encoding == "gzip":
+        return _GzipStream(level)
+    if encoding == "br":
+        return _BrotliStream(level)
+    if encoding == "zstd":
+        return _ZstdStream(level)
+    raise ValueError(f"encoding não suportado: {encoding}")
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    result: dict[str, float] = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[name.strip().lower()] = q
+    return result
+
+
+def choose_encoding(accept_encoding: str, preferred: Iterable[str]) -> Optional[str]:
+    accepted = parse_accept_encoding(accept_encoding)
+    if not accepted:
+        return None
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for enc in preferred:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        preferred: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        available = set(available_encodings())
+        order = preferred or ("br", "zstd", "gzip")
+        self.preferred = [e for e in order if e in available]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encoding = choose_encoding(accept, self.preferred) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, encoding, self.levels[encoding], self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, level: int, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.send: Callable = _unattached_send
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.stream: Optional[StreamCompressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_skip(self) -> bool:
+        status = self.initial_message["status"]
+        if status < 200 or status in (204, 304):
+            return True
+        headers = Headers(raw=self.initial_message["headers"])
+        if "content-encoding" in headers:
+            return True
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(_INCOMPRESSIBLE_PREFIXES)
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # segura os headers até saber se vamos comprimir
+            self.initial_message = message
+            self.passthrough = self._should_skip()
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+
+            if not more_body:
+                # resposta completa num único chunk
+                if len(body) < self.minimum_size:
+                    await self.send(self.initial_message)
+                    await self.send(message)
+                    return
+                compressed = compress_bytes(self.encoding, body, self.level)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(compressed))
+                headers.add_vary_header("Accept-Encoding")
+                message["body"] = compressed
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            # streaming: tamanho final desconhecido, comprime chunk a chunk
+            self.stream = stream_compressor(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            del headers["Content-Length"]
+            message["body"] = self.stream.compress(body) if body else b""
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.stream is None:
+            # primeiro chunk foi pequeno e completo; nada mais a fazer
+            await self.send(message)
+            return
+
+        chunk = self.stream.compress(body) if body else b""
+        if not more_body:
+            chunk += self.stream.finish()
+        message["body"] = chunk
+        await self.send(message)
+
+
+async def _unattached_send(message: Message) -> None:  # pragma: no cover
+    raise RuntimeError("send awaitable not set")
@@ -1,14 +1,57 @@
-import firebase_admin
-from firebase_admin import credentials
+# app/core/firebase.py
+"""
+Firebase Admin inicializado sob demanda.
+
+Importar `firebase_admin` e montar a credencial custa ~100ms+ por cold start
+na Vercel; adiamos isso até a primeira verificação de token.
+"""
+import threading
+import time
+
+from app.core.metrics import firebase_verify_duration, firebase_verify_failures
 from app.core.settings import settings
 
-# inicializa 1x por processo
-if not firebase_admin._apps:
-    cred = credentials.Certificate({
-        "type": "service_account",
-        "project_id": settings.firebase_project_id,
-        "private_key": settings.firebase_private_key.replace("\\n", "\n"),
-        "client_email": settings.firebase_client_email,
-        "token_uri": "https://oauth2.googleapis.com/token",
-    })
-    firebase_admin.initialize_app(cred)
+_app = None
+_lock = threading.Lock()
+
+
+def get_app():
+    """Inicializa 1x por processo (thread-safe) e devolve o App do Firebase."""
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                if firebase_admin._apps:
+                    _app = firebase_admin.get_app()
+                else:
+                    cred = credentials.Certificate({
+                        "type": "service_account",
+                        "project_id": settings.firebase_project_id,
+                        "private_key": settings.firebase_private_key.replace("\\n", "\n"),
+                        "client_email": settings.firebase_client_email,
+                        "token_uri": "https://oauth2.googleapis.com/token",
+                    })
+                    _app = firebase_admin.initialize_app(cred)
+    return _app
+
+
+def is_initialized() -> bool:
+    return _app is not None
+
+
+def verify_id_token(token: str, check_revoked: bool = True) -> dict:
+    """Valida um Firebase ID token (inicializa o Admin SDK na primeira chamada)."""
+    from firebase_admin import auth as fba
+
+    t0 = time.perf_counter()
+    try:
+        decoded = fba.verify_id_token(token, check_revoked=check_revoked, app=get_app())
+    except Exception as e:
+        firebase_verify_duration.observe(time.perf_counter() - t0, "error")
+        firebase_verify_failures.inc(type(e).__name__)
+        raise
+    firebase_verify_duration.observe(time.perf_counter() - t0, "ok")
+    return decoded
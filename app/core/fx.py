@@ -0,0 +1,140 @@
+# app/core/fx.py
+"""
+Câmbio: tabela `fx_rates` (rate_date, base, quote, rate) em cache no processo.
+
+`rate` = quanto vale 1 unidade de `base` em `quote`. A busca de uma cotação:
+1. mesma moeda => 1;
+2. par direto: cotação mais recente com rate_date <= data;
+3. par inverso: 1 / rate;
+4. via moeda pivô (`fx_pivot`, USD): base->pivô * pivô->quote.
+Antes da primeira cotação de um par, usa a primeira disponível.
+
+A tabela inteira é carregada de uma vez (poucos milhares de linhas) e
+recarregada após `fx_cache_ttl_s`. Conversões são feitas sobre somas já
+agregadas no SQL por (moeda, data), nunca item a item.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Hashable, Iterable, Optional
+
+from sqlalchemy import select
+
+from app.core.settings import settings
+
+ONE = Decimal(1)
+CENTS = Decimal("0.01")
+
+
+class RateTable:
+    def __init__(self, rows: Iterable[tuple[date, str, str, Decimal]], pivot: str = "USD") -> None:
+        series: dict[tuple[str, str], list[tuple[date, Decimal]]] = defaultdict(list)
+        for rate_date, base, quote, rate in rows:
+            series[(base, quote)].append((rate_date, Decimal(rate)))
+        self.pivot = pivot
+        self._dates: dict[tuple[str, str], list[date]] = {}
+        self._rates: dict[tuple[str, str], list[Decimal]] = {}
+        for pair, points in series.items():
+            points.sort()
+            self._dates[pair] = [d for d, _ in points]
+            self._rates[pair] = [r for _, r in points]
+
+    def __len__(self) -> int:
+        return sum(len(d) for d in self._dates.values())
+
+    def _lookup(self, pair: tuple[str, str], on: date) -> Optional[Decimal]:
+        dates = self._dates.get(pair)
+        if not dates:
+            return None
+        return self._rates[pair][max(bisect_right(dates, on) - 1, 0)]
+
+    def _direct(self, base: str, quote: str, on: date) -> Optional[Decimal]:
+        rate = self._lookup((base, quote), on)
+        if rate is not None:
+            return rate
+        inverse = self._lookup((quote, base), on)
+        return ONE / inverse if inverse else None
+
+    def rate(self, base: str, quote: str, on: date) -> Optional[Decimal]:
+        if base == quote:
+            return ONE
+        rate = self._direct(base, quote, on)
+        if rate is None and self.pivot not in (base, quote):
+            to_pivot = self._direct(base, self.pivot, on)
+            from_pivot = self._direct(self.pivot, quote, on)
+            if to_pivot is not None and from_pivot is not None:
+                rate = to_pivot * from_pivot
+        return rate
+
+
+def convert_sums(
+    rows: Iterable[tuple[Hashable, Optional[str], date, Optional[Decimal], Optional[Decimal]]],
+    quote: str,
+    table: Optional[RateTable] = None,
+) -> tuple[dict[Hashable, list[Decimal]], set[str]]:
+    """
+    Converte somas agregadas para `quote`.
+
+    rows: (chave, moeda, data, planned, actual), uma linha por grupo do SQL;
+    moeda NULL é tratada como `quote`. Retorna ({chave: [planned, actual]},
+    moedas sem cotação, cujas linhas ficam de fora).
+    """
+    memo: dict[tuple[str, date], Optional[Decimal]] = {}
+    totals: dict[Hashable, list[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    missing: set[str] = set()
+    for key, currency, on, planned, actual in rows:
+        currency = currency or quote
+        if currency == quote:
+            rate = ONE
+        elif (currency, on) in memo:
+            rate = memo[(currency, on)]
+        else:
+            table = table or rates()  # só carrega se houver o que converter
+            rate = memo[(currency, on)] = table.rate(currency, quote, on)
+        if rate is None:
+            missing.add(currency)
+            continue
+        acc = totals[key]
+        if planned is not None:
+            acc[0] += planned * rate
+        if actual is not None:
+            acc[1] += actual * rate
+    return {k: [v[0].quantize(CENTS), v[1].quantize(CENTS)] for k, v in totals.items()}, missing
+
+
+def load_table() -> RateTable:
+    from app.db import get_engine
+    from app.models import FxRate
+
+    stmt = select(FxRate.rate_date, FxRate.base, FxRate.quote, FxRate.rate)
+    with get_engine().connect() as conn:
+        return RateTable(conn.execute(stmt).all(), pivot=settings.fx_pivot)
+
+
+_lock = threading.Lock()
+_table: Optional[RateTable] = None
+_loaded_at = 0.0
+
+
+def rates() -> RateTable:
+    """Tabela em cache; recarrega após fx_cache_ttl_s."""
+    global _table, _loaded_at
+    table = _table
+    if table is not None and time.monotonic() - _loaded_at < settings.fx_cache_ttl_s:
+        return table
+    with _lock:
+        if _table is None or time.monotonic() - _loaded_at >= settings.fx_cache_ttl_s:
+            _table = load_table()
+            _loaded_at = time.monotonic()
+        return _table
+
+
+def invalidate() -> None:
+    global _table
+    with _lock:
+        _table = None
@@ -0,0 +1,148 @@
+# app/core/health.py
+"""
+Estado de saúde do banco em cache.
+
+Os endpoints /health* servem o último snapshot (sem I/O). O snapshot é
+atualizado por:
+- uma thread de fundo que faz `SELECT 1` a cada `interval_s` segundos, mas
+  só se nenhum tráfego real tiver tocado o banco nesse intervalo;
+- passivamente pelo tráfego real: checkout bem-sucedido do pool
+  (pool_pre_ping já validou a conexão) => `connected`; falha ao conectar ou
+  conexão caída no meio de um request => `unavailable`. Sem latência
+  (`latency_ms = null`): só probe e deep medem;
+- sob demanda, com `?deep=1`.
+
+Com `interval_s = 0` (padrão) não há ping ativo: o Neon suspende após ~5 min
+ocioso e o health check não o acorda. Um intervalo menor que a janela de
+autosuspend mantém o banco acordado de propósito (e custa compute).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.core.settings import settings
+from app.db import db_ping
+
+
+@dataclass(frozen=True)
+class DbStatus:
+    status: str = "unknown"  # unknown | connected | unavailable
+    latency_ms: Optional[float] = None
+    checked_at: Optional[datetime] = None
+    source: str = "none"  # none | probe | traffic | deep
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        # `status` no topo das respostas é o do endpoint
+        data["db_status"] = data.pop("status")
+        data["checked_at"] = self.checked_at.isoformat() if self.checked_at else None
+        data["age_seconds"] = (
+            round((datetime.now(timezone.utc) - self.checked_at).total_seconds(), 1)
+            if self.checked_at else None
+        )
+        return data
+
+
+class HealthProber:
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self._snapshot = DbStatus()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    # -- leitura (sem I/O) --
+    def snapshot(self) -> DbStatus:
+        self.start()  # idempotente; cobre runtimes sem lifespan (Vercel)
+        return self._snapshot
+
+    # -- atualizações --
+    def check_now(self, source: str = "deep") -> DbStatus:
+        t0 = time.perf_counter()
+        try:
+            db_ping()
+            snap = DbStatus(
+                status="connected",
+                latency_ms=round((time.perf_counter() - t0) * 1000, 2),
+                checked_at=datetime.now(timezone.utc),
+                source=source,
+            )
+        except Exception as e:
+            snap = DbStatus(
+                status="unavailable",
+                latency_ms=round((time.perf_counter() - t0) * 1000, 2),
+                checked_at=datetime.now(timezone.utc),
+                source=source,
+                error=f"{type(e).__name__}: {e}"[:300],
+            )
+        self._snapshot = snap
+        return snap
+
+    def mark_traffic_ok(self) -> None:
+        # chamado a cada checkout do pool; só troca o objeto (atômico sob o GIL)
+        self._snapshot = DbStatus(
+            status="connected",
+            checked_at=datetime.now(timezone.utc),
+            source="traffic",
+        )
+
+    def mark_traffic_failed(self, exc: BaseException) -> None:
+        # falha de conexão vista por um request (o checkout nem chega a acontecer)
+        self._snapshot = DbStatus(
+            status="unavailable",
+            checked_at=datetime.now(timezone.utc),
+            source="traffic",
+            error=f"{type(exc).__name__}: {exc}"[:300],
+        )
+
+    # -- thread de fundo --
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            last = self._snapshot.checked_at
+            fresh = last is not None and (datetime.now(timezone.utc) - last).total_seconds() < self.interval_s
+            if not fresh:
+                self.check_now(source="probe")
+            self._stop.wait(self.interval_s)
+
+
+prober = HealthProber(settings.health_probe_interval_s)
+
+
+@event.listens_for(Pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    prober.mark_traffic_ok()
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(ctx) -> None:
+    # connection None => falhou ao conectar; is_disconnect => caiu no meio.
+    # Falha do pre-ping não conta: o pool reconecta e, se não der, cai aqui de novo.
+    if ctx.is_pre_ping:
+        return
+    if ctx.connection is None or ctx.is_disconnect:
+        prober.mark_traffic_failed(ctx.original_exception)
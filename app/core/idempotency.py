@@ -0,0 +1,291 @@
+# app/core/idempotency.py
+"""
+Idempotency-Key para os endpoints de criação.
+
+POST com header `Idempotency-Key` (escopo: usuário autenticado):
+- 1ª vez: a chave é registrada como pendente (commit imediato, conexão
+  própria), o handler roda e o IdempotencyMiddleware grava status + corpo;
+- retry com a chave concluída: devolve a resposta gravada sem tocar nas
+  tabelas de negócio (header `Idempotent-Replayed: true`);
+- retry concorrente (chave pendente): espera a 1ª terminar, com backoff, por
+  até `idempotency_wait_ms`, e repete a resposta; se não terminar, 409;
+- mesma chave com outro corpo/rota: 422.
+
+Respostas 5xx (ou exceção) liberam a chave para um novo retry. Pendentes
+mais antigas que `idempotency_lock_timeout_s` (processo morreu) podem ser
+assumidas. Chaves expiram após `idempotency_ttl_s` e são apagadas em lotes,
+no máximo uma vez por `idempotency_purge_interval_s` por instância.
+
+Uso: @router.post(..., dependencies=[Depends(idempotency)])
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import anyio
+import anyio.to_thread
+from fastapi import Depends, Header, HTTPException, Request, status
+from sqlalchemy import and_, delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import registry
+from app.core.security import get_current_user
+from app.core.settings import settings
+from app.db import get_engine
+from app.models import IdempotencyKey, User
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+_HEADER_RAW = HEADER.lower().encode()
+MAX_KEY_LEN = 255
+
+_keys = IdempotencyKey.__table__
+
+idempotency_requests = registry.counter(
+    "idempotency_requests_total",
+    "Requests com Idempotency-Key por desfecho",
+    ("outcome",),  # claimed | replayed | in_progress | mismatch | released
+)
+
+
+@dataclass(frozen=True)
+class Claim:
+    user_id: int
+    key: str
+
+
+class IdempotentReplay(Exception):
+    """Chave já concluída: o handler de exceção devolve a resposta gravada."""
+
+    def __init__(self, status_code: int, body: bytes, content_type: Optional[str]) -> None:
+        super().__init__(status_code)
+        self.status_code = status_code
+        self.body = body
+        self.content_type = content_type
+
+
+def _request_hash(method: str, path: str, body: bytes) -> bytes:
+    h = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        h.update(part)
+        h.update(b"\0")
+    return h.digest()
+
+
+def _try_claim(user_id: int, key: str, request_hash: bytes):
+    """None se a chave ficou com este request; senão a linha existente."""
+    expires_at = func.now() + timedelta(seconds=settings.idempotency_ttl_s)
+    this_key = and_(_keys.c.user_id == user_id, _keys.c.key == key)
+    with get_engine().begin() as conn:
+        inserted = conn.execute(
+            pg_insert(_keys)
+            .values(user_id=user_id, key=key, request_hash=request_hash, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[_keys.c.user_id, _keys.c.key])
+            .returning(_keys.c.user_id)
+        ).first()
+        if inserted is not None:
+            return None
+
+        # expirada e ainda não purgada, ou pendente abandonada: assume a chave
+        lock_timeout = timedelta(seconds=settings.idempotency_lock_timeout_s)
+        taken = conn.execute(
+            update(_keys)
+            .where(
+                this_key,
+                or_(
+                    _keys.c.expires_at < func.now(),
+                    and_(_keys.c.status_code.is_(None), _keys.c.created_at < func.now() - lock_timeout),
+                ),
+            )
+            .values(
+                request_hash=request_hash,
+                status_code=None,
+                response_body=None,
+                content_type=None,
+                created_at=func.now(),
+                expires_at=expires_at,
+            )
+            .returning(_keys.c.user_id)
+        ).first()
+        if taken is not None:
+            return None
+
+        return conn.execute(
+            select(_keys.c.request_hash, _keys.c.status_code, _keys.c.response_body, _keys.c.content_type)
+            .where(this_key)
+        ).first()
+
+
+def _complete(claim: Claim, status_code: int, body: bytes, content_type: Optional[str]) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(
+            update(_keys)
+            .where(_keys.c.user_id == claim.user_id, _keys.c.key == claim.key)
+            .values(status_code=status_code, response_body=body, content_type=content_type)
+        )
+    _maybe_purge()
+
+
+def _release(claim: Claim) -> None:
+    with get_engine().begin() as conn:
+        conn.execute(
+            delete(_keys).where(
+                _keys.c.user_id == claim.user_id,
+                _keys.c.key == claim.key,
+                _keys.c.status_code.is_(None),
+            )
+        )
+
+
+def purge_expired(batch_size: Optional[int] = None) -> int:
+    """Apaga chaves expiradas em lotes (uma transação curta por lote)."""
+    batch_size = batch_size or settings.idempotency_purge_batch
+    total = 0
+    while True:
+        batch = (
+            select(_keys.c.user_id, _keys.c.key)
+            .where(_keys.c.expires_at < func.now())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        with get_engine().begin() as conn:
+            deleted = conn.execute(
+                delete(_keys).where(tuple_(_keys.c.user_id, _keys.c.key).in_(batch))
+            ).rowcount
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def _maybe_purge() -> None:
+    global _last_purge
+    interval = settings.idempotency_purge_interval_s
+    if interval <= 0 or time.monotonic() - _last_purge < interval:
+        return
+    if not _purge_lock.acquire(blocking=False):
+        return  # outra thread já está limpando
+    try:
+        _last_purge = time.monotonic()
+        purge_expired()
+    except Exception:
+        logger.exception("falha ao apagar Idempotency-Keys expiradas")
+    finally:
+        _purge_lock.release()
+
+
+async def idempotency(
+    request: Request,
+    idempotency_key: Optional[str] = Header(
+        None, alias=HEADER, description="Repetir a chave devolve a resposta original"
+    ),
+    current_user: User = Depends(get_current_user),
+) -> None:
+    if idempotency_key is None:
+        return
+    key = idempotency_key.strip()
+    if not key or len(key) > MAX_KEY_LEN:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Idempotency-Key inválida.")
+
+    request_hash = _request_hash(request.method, request.url.path, await request.body())
+    deadline = time.monotonic() + settings.idempotency_wait_ms / 1000
+    delay = 0.05
+    while True:
+        row = await anyio.to_thread.run_sync(_try_claim, current_user.id, key, request_hash)
+        if row is None:
+            idempotency_requests.inc("claimed")
+            request.state.idempotency = Claim(current_user.id, key)
+            return
+        if bytes(row.request_hash) != request_hash:
+            idempotency_requests.inc("mismatch")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key já usada com outra requisição.",
+            )
+        if row.status_code is not None:
+            idempotency_requests.inc("replayed")
+            raise IdempotentReplay(row.status_code, bytes(row.response_body or b""), row.content_type)
+        if time.monotonic() >= deadline:
+            idempotency_requests.inc("in_progress")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Requisição com esta Idempotency-Key ainda em processamento.",
+            )
+        await anyio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+async def replay_handler(request: Request, exc: IdempotentReplay) -> Response:
+    headers = {"Idempotent-Replayed": "true"}
+    if exc.content_type:
+        headers["content-type"] = exc.content_type
+    return Response(exc.body, status_code=exc.status_code, headers=headers)
+
+
+class IdempotencyMiddleware:
+    """Captura a resposta dos requests que obtiveram uma Claim e a grava."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not any(name == _HEADER_RAW for name, _ in scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})  # o mesmo dict de request.state
+        status_code = 500
+        content_type: Optional[str] = None
+        chunks: list[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            claim = state.get("idempotency")
+            if claim is not None:
+                with anyio.CancelScope(shield=True):
+                    await self._finish(claim, None, b"", None)
+            raise
+
+        claim = state.get("idempotency")
+        if claim is not None:
+            await self._finish(claim, status_code, b"".join(chunks), content_type)
+
+    async def _finish(
+        self, claim: Claim, status_code: Optional[int], body: bytes, content_type: Optional[str]
+    ) -> None:
+        try:
+            if status_code is None or status_code >= 500:
+                idempotency_requests.inc("released")
+                await anyio.to_thread.run_sync(_release, claim)
+            else:
+                await anyio.to_thread.run_sync(_complete, claim, status_code, body, content_type)
+        except Exception:
+            # a chave fica pendente e é assumida após idempotency_lock_timeout_s
+            logger.exception("falha ao gravar Idempotency-Key")
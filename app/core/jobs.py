@@ -0,0 +1,314 @@
+# app/core/jobs.py
+"""
+Fila de tarefas em background na própria tabela `jobs` (sem broker externo).
+
+- `enqueue()` insere na transação de quem chama: o job só existe se a
+  escrita que o originou commitar. `dedupe_key` evita dois jobs pendentes
+  para a mesma coisa (ex.: purgar a mesma viagem);
+- workers pegam o próximo job pronto com `FOR UPDATE SKIP LOCKED` (vários
+  workers/processos não disputam a mesma linha), marcam `running` e rodam o
+  handler fora de transação;
+- erro => nova tentativa com backoff exponencial (com jitter) até
+  `max_attempts`; depois, `failed` com o último erro;
+- job `running` há mais de `jobs_lease_s` (worker morreu no meio) volta
+  para a fila. Handlers precisam ser idempotentes;
+- jobs terminados há mais de `jobs_retention_days` são apagados em lotes.
+
+Workers:
+
+    python -m app.cli worker [--threads N] [--kinds trip_purge ...]
+
+ou dentro do processo da API com JOBS_INPROCESS_WORKERS > 0. `run_now()`
+tenta executar um job recém-criado no próprio processo (BackgroundTasks);
+se um worker já o pegou, não faz nada.
+
+Handlers se registram com `@handler("kind")` nos módulos de HANDLER_MODULES
+e recebem o payload (dict); o retorno (dict ou None) vira `result`.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+
+from app.core.metrics import registry
+from app.core.settings import settings
+from app.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# importados pelo worker para registrar os handlers
+HANDLER_MODULES = ("app.core.purge", "app.core.analytics")
+
+Handler = Callable[[dict], Optional[dict]]
+_handlers: dict[str, Handler] = {}
+
+_ENQUEUE_SQL = text("""
+    INSERT INTO jobs (kind, payload, user_id, dedupe_key, max_attempts, run_at)
+    VALUES (:kind, CAST(:payload AS jsonb), :user_id, :dedupe_key, :max_attempts,
+            now() + make_interval(secs => :delay_s))
+    ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+    RETURNING id
+""")
+_CLAIM_SQL = text("""
+    UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_at = now(), locked_by = :worker
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE status = 'queued' AND run_at <= now() {kind_filter}
+        ORDER BY run_at, id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+""")
+_CLAIM_ONE_SQL = text("""
+    UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_at = now(), locked_by = :worker
+    WHERE id = (
+        SELECT id FROM jobs WHERE id = :job_id AND status = 'queued'
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, max_attempts
+""")
+_SUCCEED_SQL = text("""
+    UPDATE jobs SET status = 'succeeded', result = CAST(:result AS jsonb), last_error = NULL,
+                    finished_at = now(), locked_at = NULL, locked_by = NULL
+    WHERE id = :id AND locked_by = :worker
+""")
+_RETRY_SQL = text("""
+    UPDATE jobs SET status = 'queued', last_error = :error, run_at = now() + make_interval(secs => :delay_s),
+                    locked_at = NULL, locked_by = NULL
+    WHERE id = :id AND locked_by = :worker
+""")
+_FAIL_SQL = text("""
+    UPDATE jobs SET status = 'failed', last_error = :error, finished_at = now(), locked_at = NULL, locked_by = NULL
+    WHERE id = :id AND locked_by = :worker
+""")
+_REQUEUE_STALE_SQL = text("""
+    UPDATE jobs SET status = 'queued', run_at = now(), locked_at = NULL, locked_by = NULL,
+                    last_error = 'lease expirado (worker caiu?)'
+    WHERE status = 'running' AND locked_at < now() - make_interval(secs => :lease_s)
+""")
+_DELETE_FINISHED_SQL = text("""
+    DELETE FROM jobs WHERE id IN (
+        SELECT id FROM jobs
+        WHERE finished_at < now() - make_interval(days => :days)
+        LIMIT :batch
+    )
+""")
+
+jobs_processed = registry.counter(
+    "jobs_processed_total",
+    "Execuções de jobs por resultado",
+    ("kind", "outcome"),  # succeeded | retried | failed
+)
+jobs_duration = registry.histogram(
+    "jobs_duration_seconds",
+    "Duração de uma execução de job",
+    ("kind",),
+    buckets=(0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+_busy = 0  # jobs rodando neste processo
+_busy_lock = threading.Lock()
+
+
+@registry.collector
+def _job_metrics():
+    yield ("jobs_running", "gauge", "Jobs executando neste processo", (), (), float(_busy))
+
+
+class UnknownJob(Exception):
+    pass
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    def register(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def kinds() -> list[str]:
+    load_handlers()
+    return sorted(_handlers)
+
+
+def enqueue(
+    conn,
+    kind: str,
+    payload: Optional[dict] = None,
+    *,
+    user_id: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+    delay_s: float = 0.0,
+    max_attempts: Optional[int] = None,
+) -> Optional[int]:
+    """Cria um job na transação de `conn` (Session ou Connection). None = já havia um pendente com a mesma dedupe_key."""
+    return conn.execute(_ENQUEUE_SQL, {
+        "kind": kind,
+        "payload": json.dumps(payload or {}),
+        "user_id": user_id,
+        "dedupe_key": dedupe_key,
+        "max_attempts": max_attempts or settings.jobs_max_attempts,
+        "delay_s": delay_s,
+    }).scalar()
+
+
+def _backoff_s(attempts: int) -> float:
+    delay = min(settings.jobs_retry_max_s, settings.jobs_retry_base_s * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _execute(job: Any, worker: str) -> None:
+    global _busy
+    fn = _handlers.get(job.kind)
+    t0 = time.perf_counter()
+    with _busy_lock:
+        _busy += 1
+    try:
+        if fn is None:
+            raise UnknownJob(f"handler desconhecido: {job.kind}")
+        result = fn(dict(job.payload))
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:1000]
+        final = isinstance(e, UnknownJob) or job.attempts >= job.max_attempts
+        if final:
+            logger.exception("job %s (%s) falhou de vez na tentativa %s", job.id, job.kind, job.attempts)
+        else:
+            logger.warning("job %s (%s) falhou na tentativa %s: %s", job.id, job.kind, job.attempts, error)
+        with get_engine().begin() as conn:
+            if final:
+                conn.execute(_FAIL_SQL, {"id": job.id, "worker": worker, "error": error})
+            else:
+                conn.execute(_RETRY_SQL, {
+                    "id": job.id, "worker": worker, "error": error, "delay_s": _backoff_s(job.attempts),
+                })
+        jobs_processed.inc(job.kind, "failed" if final else "retried")
+    else:
+        with get_engine().begin() as conn:
+            conn.execute(_SUCCEED_SQL, {
+                "id": job.id, "worker": worker, "result": json.dumps(result) if result is not None else None,
+            })
+        jobs_processed.inc(job.kind, "succeeded")
+    finally:
+        with _busy_lock:
+            _busy -= 1
+        jobs_duration.observe(time.perf_counter() - t0, job.kind)
+
+
+def _worker_id(suffix: str) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{suffix}"
+
+
+def run_now(job_id: Optional[int]) -> None:
+    """Executa o job aqui se ninguém o pegou ainda (ex.: BackgroundTasks logo após o enqueue)."""
+    if job_id is None:
+        return
+    worker = _worker_id("inline")
+    try:
+        load_handlers()
+        with get_engine().begin() as conn:
+            job = conn.execute(_CLAIM_ONE_SQL, {"job_id": job_id, "worker": worker}).first()
+        if job is not None:
+            _execute(job, worker)
+    except Exception:
+        # o job continua na fila (ou volta após o lease); um worker termina
+        logger.exception("execução imediata do job %s falhou", job_id)
+
+
+def maintain() -> dict[str, int]:
+    """Devolve à fila jobs com lease expirado e apaga terminados antigos."""
+    with get_engine().begin() as conn:
+        requeued = conn.execute(_REQUEUE_STALE_SQL, {"lease_s": settings.jobs_lease_s}).rowcount
+        deleted = conn.execute(
+            _DELETE_FINISHED_SQL, {"days": settings.jobs_retention_days, "batch": 1000}
+        ).rowcount
+    if requeued:
+        logger.warning("%s jobs com lease expirado voltaram para a fila", requeued)
+    return {"requeued": requeued, "deleted": deleted}
+
+
+class WorkerPool:
+    def __init__(self, threads: int, kinds: Optional[list[str]] = None) -> None:
+        self.threads = threads
+        self.kinds = kinds
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._last_maintenance = 0.0
+        self._lock = threading.Lock()
+        kind_filter = "AND kind = ANY(:kinds)" if kinds else ""
+        self._claim_sql = text(_CLAIM_SQL.text.format(kind_filter=kind_filter))
+
+    def start(self) -> None:
+        load_handlers()
+        self._stop.clear()
+        for i in range(self.threads):
+            t = threading.Thread(target=self._loop, args=(_worker_id(str(i)),), name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        # o job em andamento termina; o que não terminar a tempo volta pelo lease
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def _maybe_maintain(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_maintenance < settings.jobs_maintenance_interval_s:
+                return
+            self._last_maintenance = now
+        maintain()
+
+    def _claim(self, worker: str):
+        params = {"worker": worker, "kinds": self.kinds} if self.kinds else {"worker": worker}
+        with get_engine().begin() as conn:
+            return conn.execute(self._claim_sql, params).first()
+
+    def _loop(self, worker: str) -> None:
+        while not self._stop.is_set():
+            try:
+                self._maybe_maintain()
+                job = self._claim(worker)
+            except Exception:
+                logger.exception("worker %s: erro ao buscar job", worker)
+                self._stop.wait(settings.jobs_poll_s)
+                continue
+            if job is None:
+                self._stop.wait(settings.jobs_poll_s)
+                continue
+            _execute(job, worker)
+
+
+_inprocess: Optional[WorkerPool] = None
+
+
+def start_inprocess() -> None:
+    """Workers dentro do processo da API (JOBS_INPROCESS_WORKERS > 0)."""
+    global _inprocess
+    if settings.jobs_inprocess_workers <= 0 or _inprocess is not None:
+        return
+    _inprocess = WorkerPool(settings.jobs_inprocess_workers)
+    _inprocess.start()
+
+
+def stop_inprocess() -> None:
+    global _inprocess
+    pool, _inprocess = _inprocess, None
+    if pool is not None:
+        pool.stop(timeout=5.0)
@@ -0,0 +1,281 @@
+# app/core/metrics.py
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+Cada thread escreve no seu próprio shard (dict simples, sem lock); o
+/metrics soma os shards na hora do scrape. Gauges "instantâneos" (pool do
+DB etc.) são lidos por collectors registrados com `registry.collector`.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# latências de request (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+
+class _Shard:
+    __slots__ = ("values", "histograms")
+
+    def __init__(self) -> None:
+        # (metric, labels) -> float
+        self.values: dict[tuple[str, Labels], float] = {}
+        # (metric, labels) -> [count por bucket..., +Inf, sum]
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, registry: "Registry", name: str, help: str, labelnames: Iterable[str] = ()) -> None:
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self.registry._shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Gauge somado entre shards (inc/dec); para valores absolutos use um collector."""
+
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        values = self.registry._shard().values
+        key = (self.name, labels)
+        values[key] = values.get(key, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames=(), buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._width = len(self.buckets) + 2  # buckets + +Inf + sum
+
+    def observe(self, value: float, *labels: str) -> None:
+        hists = self.registry._shard().histograms
+        key = (self.name, labels)
+        row = hists.get(key)
+        if row is None:
+            row = hists[key] = [0.0] * self._width
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, Labels, Labels, float]]]] = []
+        self._shards: list[_Shard] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, help, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[tuple[str, str, str, Labels, Labels, float]]]):
+        """
+        Registra uma função chamada no scrape que devolve
+        (name, kind, help, labelnames, labels, value).
+        """
+        self._collectors.append(fn)
+        return fn
+
+    # -- exposição --
+    def _merged(self) -> tuple[dict, dict]:
+        values: dict[tuple[str, Labels], float] = {}
+        hists: dict[tuple[str, Labels], list[float]] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, v in shard.values.copy().items():
+                values[key] = values.get(key, 0.0) + v
+            for key, row in shard.histograms.copy().items():
+                acc = hists.get(key)
+                if acc is None:
+                    hists[key] = list(row)
+                else:
+                    for i, v in enumerate(row):
+                        acc[i] += v
+        return values, hists
+
+    def render(self) -> str:
+        values, hists = self._merged()
+        by_metric: dict[str, list] = {}
+        for (name, labels), v in values.items():
+            by_metric.setdefault(name, []).append((labels, v))
+        for (name, labels), row in hists.items():
+            by_metric.setdefault(name, []).append((labels, row))
+
+        lines: list[str] = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, v in sorted(by_metric.get(name, ()), key=lambda lv: lv[0]):
+                base = _labels(metric.labelnames, labels)
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets, v):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(metric.labelnames, labels, le=_fmt(bound))} {_fmt(cumulative)}")
+                    cumulative += v[-2]
+                    lines.append(f"{name}_bucket{_labels(metric.labelnames, labels, le='+Inf')} {_fmt(cumulative)}")
+                    lines.append(f"{name}_sum{base} {_fmt(v[-1])}")
+                    lines.append(f"{name}_count{base} {_fmt(cumulative)}")
+                else:
+                    lines.append(f"{name}{base} {_fmt(v)}")
+
+        seen: set[str] = set()
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue
+            for name, kind, help, labelnames, labels, v in samples:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_labels(labelnames, labels)} {_fmt(v)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Labels, values: Labels, le: Optional[str] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(v: float) -> str:
+    if v == int(v):
+        return str(int(v))
+    return repr(v)
+
+
+registry = Registry()
+
+# ---- métricas HTTP ----
+http_requests_in_flight = registry.gauge("http_requests_in_flight", "Requests HTTP em andamento")
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Latência por rota (template), método e status",
+    ("method", "route", "status"),
+)
+
+# ---- Firebase ----
+firebase_verify_duration = registry.histogram(
+    "firebase_verify_duration_seconds",
+    "Latência de verify_id_token",
+    ("outcome",),
+)
+firebase_verify_failures = registry.counter(
+    "firebase_verify_failures_total",
+    "Falhas em verify_id_token por tipo de exceção",
+    ("reason",),
+)
+
+_START_TIME = time.time()
+
+
+@registry.collector
+def _process_metrics():
+    yield ("process_start_time_seconds", "gauge", "Início do processo (unix)", (), (), _START_TIME)
+
+
+@registry.collector
+def _db_pool_metrics():
+    # não cria o engine só para o scrape
+    from app import db
+
+    engine = db._engine
+    if engine is None:
+        return
+    pool = engine.pool
+    for attr, help in (
+        ("size", "Tamanho configurado do pool"),
+        ("checkedout", "Conexões em uso"),
+        ("checkedin", "Conexões ociosas no pool"),
+        ("overflow", "Conexões de overflow abertas"),
+    ):
+        fn = getattr(pool, attr, None)
+        if fn is not None:
+            yield (f"db_pool_{attr}", "gauge", help, (), (), float(fn()))
+
+
+class MetricsMiddleware:
+    """Latência por rota/status + requests em andamento. Rota = template (ex.: /trips/{trip_id})."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            http_requests_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            http_request_duration.observe(elapsed, scope["method"], path, str(status))
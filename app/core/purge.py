@@ -0,0 +1,124 @@
+# app/core/purge.py
+"""
+Purga em lotes de viagens soft-deleted (trips.deleted_at).
+
+DELETE /trips/{id} apaga direto no banco (ON DELETE CASCADE, sem carregar
+os filhos na sessão). Viagens com pelo menos `trip_soft_delete_min_items`
+itens só ganham `deleted_at` (somem da API e dos agregados na hora) e os
+itens são apagados aqui em lotes de `trip_purge_batch`, uma transação curta
+por lote com pausa de `trip_purge_pause_ms` entre eles. Cada lote trava
+poucas linhas e gera pouco WAL. Por último vão as metas e a própria viagem.
+
+A purga é um job `trip_purge` (app.core.jobs) criado junto com o soft
+delete: retentativas com backoff e, se o processo cair no meio, outro worker
+retoma. Para o que sobrar, há também o job `trips_purge_pending` e o CLI:
+
+    python -m app.cli trips-purge
+
+Retentativas precisam de um worker (`python -m app.cli worker` ou
+JOBS_INPROCESS_WORKERS); sem ele, uma primeira tentativa que falhou deixa
+a viagem pendente. `trips_purge_pending` / `trips_purge_oldest_age_seconds`
+mostram isso: contados no banco depois de cada purga disparada por este
+processo (o scrape de /metrics não consulta o banco).
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core import jobs
+from app.core.metrics import registry
+from app.core.settings import settings
+from app.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+# dois purgadores na mesma viagem só competiriam pelas mesmas linhas
+_LOCK_SQL = text("SELECT pg_try_advisory_lock(hashtext('trip_purge'), :trip_id)")
+_UNLOCK_SQL = text("SELECT pg_advisory_unlock(hashtext('trip_purge'), :trip_id)")
+_DELETE_ITEMS_SQL = text("""
+    DELETE FROM budget_items WHERE trip_id = :trip_id AND id IN (
+        SELECT id FROM budget_items WHERE trip_id = :trip_id LIMIT :batch
+    )
+""")
+_DELETE_TRIP_SQL = text("DELETE FROM trips WHERE id = :trip_id AND deleted_at IS NOT NULL")
+_PENDING_SQL = text("SELECT id FROM trips WHERE deleted_at IS NOT NULL ORDER BY deleted_at LIMIT :limit")
+# ix_trips_deleted_at (parcial): só lê as pendentes
+_PENDING_STATS_SQL = text("SELECT count(*), min(deleted_at) FROM trips WHERE deleted_at IS NOT NULL")
+
+purged_rows = registry.counter(
+    "trip_purge_rows_total",
+    "Linhas apagadas pela purga de viagens soft-deleted",
+    ("table",),
+)
+_pending: tuple[int, Optional[datetime]] = (0, None)  # última contagem: (viagens, deleted_at mais antigo)
+
+
+@registry.collector
+def _purge_metrics():
+    count, oldest = _pending
+    age = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest is not None else 0.0
+    yield ("trips_purge_pending", "gauge", "Viagens soft-deleted ainda não purgadas (última contagem)", (), (), float(count))
+    yield ("trips_purge_oldest_age_seconds", "gauge", "Idade da viagem soft-deleted mais antiga", (), (), age)
+
+
+def purge_trip(trip_id: int) -> int:
+    """Apaga em lotes os itens de uma viagem soft-deleted e depois a viagem. Devolve os itens apagados."""
+    batch, pause = settings.trip_purge_batch, settings.trip_purge_pause_ms / 1000
+    total = 0
+    with get_engine().connect() as conn:
+        if not conn.execute(_LOCK_SQL, {"trip_id": trip_id}).scalar():
+            conn.rollback()
+            return 0
+        conn.commit()
+        try:
+            while True:
+                with conn.begin():
+                    n = conn.execute(_DELETE_ITEMS_SQL, {"trip_id": trip_id, "batch": batch}).rowcount
+                total += n
+                purged_rows.inc("budget_items", amount=n)
+                if n < batch:
+                    break
+                time.sleep(pause)
+            with conn.begin():
+                # metas (poucas) vão no cascade
+                deleted = conn.execute(_DELETE_TRIP_SQL, {"trip_id": trip_id}).rowcount
+            purged_rows.inc("trips", amount=deleted)
+        finally:
+            conn.execute(_UNLOCK_SQL, {"trip_id": trip_id})
+            conn.commit()
+    return total
+
+
+def purge_pending(limit: int = 100) -> dict[str, int]:
+    """Purga as viagens soft-deleted pendentes (as mais antigas primeiro)."""
+    with get_engine().connect() as conn:
+        trip_ids = conn.execute(_PENDING_SQL, {"limit": limit}).scalars().all()
+    items = sum(purge_trip(trip_id) for trip_id in trip_ids)
+    return {"trips": len(trip_ids), "items": items}
+
+
+def refresh_pending() -> None:
+    """Recontagem das viagens soft-deleted para as métricas (BackgroundTasks depois do `run_now`)."""
+    global _pending
+    try:
+        with get_engine().connect() as conn:
+            count, oldest = conn.execute(_PENDING_STATS_SQL).one()
+    except Exception:
+        logger.exception("purga: falha ao contar viagens pendentes")
+        return
+    _pending = (count, oldest)
+
+
+@jobs.handler("trip_purge")
+def _purge_trip_job(payload: dict) -> dict:
+    return {"items": purge_trip(int(payload["trip_id"]))}
+
+
+@jobs.handler("trips_purge_pending")
+def _purge_pending_job(payload: dict) -> dict:
+    return purge_pending(int(payload.get("limit", 100)))
@@ -0,0 +1,187 @@
+# app/core/querylimits.py
+"""
+Limites de tempo do SQL por rota e cancelamento quando o cliente desconecta.
+
+- cada transação da Session aberta durante um request recebe
+  `statement_timeout` e `lock_timeout` (SET LOCAL, via set_config numa única
+  ida ao banco; funciona atrás de pgbouncer em modo transação). Padrões em
+  DB_STATEMENT_TIMEOUT_MS / DB_LOCK_TIMEOUT_MS, exceções por rota em
+  ROUTE_LIMITS e DB_ROUTE_TIMEOUTS_MS;
+- estourou => 503 (lock: com Retry-After), contado em
+  `db_timeouts_total{route,kind}`;
+- cliente desconectou no meio => as queries em andamento do request são
+  canceladas (pg_cancel via libpq), novas transações nem começam e o request
+  termina com 499. Contado em `db_cancels_total{route}`.
+
+Jobs, CLI e o health check usam o engine fora de request: sem limite.
+Sub-requests de POST /batch usam o limite da própria rota e são cancelados
+junto com o batch.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, NamedTuple, Optional
+
+import anyio.to_thread
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+
+from app.core.metrics import registry
+from app.core.settings import settings
+
+QUERY_CANCELED = "57014"  # statement_timeout ou cancelamento
+LOCK_NOT_AVAILABLE = "55P03"  # lock_timeout
+CLIENT_CLOSED = 499  # convenção do nginx: o cliente foi embora antes da resposta
+
+
+class Limits(NamedTuple):
+    statement_ms: int
+    lock_ms: int
+
+
+# rotas que legitimamente demoram mais que o padrão ("MÉTODO /template")
+ROUTE_LIMITS: dict[str, Limits] = {
+    # cascade de até TRIP_SOFT_DELETE_MIN_ITEMS itens (acima disso vira job)
+    "DELETE /trips/{trip_id}": Limits(30_000, 5_000),
+    "DELETE /users/me": Limits(60_000, 5_000),
+    "POST /trips/{trip_id}/clone": Limits(30_000, 5_000),  # INSERT ... SELECT de todos os itens
+    "GET /sync": Limits(15_000, 2_000),
+    "GET /users/me/totals": Limits(15_000, 2_000),
+}
+
+db_timeouts = registry.counter(
+    "db_timeouts_total",
+    "Requests interrompidos por statement_timeout/lock_timeout",
+    ("route", "kind"),  # statement | lock
+)
+db_cancels = registry.counter(
+    "db_cancels_total",
+    "Queries canceladas porque o cliente desconectou",
+    ("route",),
+)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class _Tracker:
+    """Conexões com transação aberta de um request (e dos seus sub-requests)."""
+
+    def __init__(self) -> None:
+        self.disconnected = False
+
+    def cancel_all(self) -> int:
+        # sob o lock: a conexão não volta ao pool (e a outro request) durante o cancel
+        with _owners_lock:
+            targets = [dbapi for dbapi, tracker in _owners.values() if tracker is self]
+            for dbapi in targets:
+                try:
+                    dbapi.cancel_safe(timeout=2.0)
+                except Exception:
+                    pass  # a query pode ter acabado; o request termina de qualquer jeito
+        return len(targets)
+
+
+class _State(NamedTuple):
+    limits: Limits
+    tracker: _Tracker
+
+
+_current: ContextVar[Optional[_State]] = ContextVar("query_limits", default=None)
+# id(conexão DBAPI) -> (conexão, tracker do request que a usa)
+_owners: dict[int, tuple[Any, _Tracker]] = {}
+_owners_lock = threading.Lock()
+_cancel_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def limits_for(method: str, path: str) -> Limits:
+    override = settings.db_route_timeouts_ms.get(f"{method} {path}")
+    if override:
+        return Limits(*override)
+    return ROUTE_LIMITS.get(f"{method} {path}") or Limits(settings.db_statement_timeout_ms, settings.db_lock_timeout_ms)
+
+
+def _after_begin(session, transaction, connection) -> None:
+    state = _current.get()
+    if state is None:
+        return
+    if state.tracker.disconnected:
+        raise ClientDisconnected()
+    connection.exec_driver_sql(
+        "SELECT set_config('statement_timeout', %s, true), set_config('lock_timeout', %s, true)",
+        (str(state.limits.statement_ms), str(state.limits.lock_ms)),
+    )
+    dbapi = connection.connection.dbapi_connection
+    with _owners_lock:
+        _owners[id(dbapi)] = (dbapi, state.tracker)
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    if dbapi_connection is not None and _owners:
+        with _owners_lock:
+            _owners.pop(id(dbapi_connection), None)
+
+
+def instrument(engine, session_factory) -> None:
+    event.listen(session_factory, "after_begin", _after_begin)
+    event.listen(engine, "checkin", _on_checkin)
+
+
+async def _watch_disconnect(request: Request, tracker: _Tracker, route: str) -> None:
+    global _cancel_limiter
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+    tracker.disconnected = True
+    if _cancel_limiter is None:
+        # fora do threadpool das rotas: ele pode estar cheio justamente das queries lentas
+        _cancel_limiter = anyio.CapacityLimiter(4)
+    cancelled = await anyio.to_thread.run_sync(tracker.cancel_all, limiter=_cancel_limiter)
+    if cancelled:
+        db_cancels.inc(route, amount=cancelled)
+
+
+def wrap_handler(handler: Callable, methods: set[str], path: str) -> Callable:
+    """Envolve o handler de uma rota (dependências + endpoint) com os limites dela."""
+    by_method = {method: limits_for(method, path) for method in methods}
+
+    async def limited(request: Request) -> Response:
+        parent = _current.get()
+        tracker = parent.tracker if parent is not None else _Tracker()
+        token = _current.set(_State(by_method[request.method], tracker))
+        watcher = None
+        try:
+            if parent is None:
+                # corpo lido antes: depois dele, o único evento possível é a desconexão
+                await request.body()
+                watcher = asyncio.create_task(_watch_disconnect(request, tracker, path))
+            return await handler(request)
+        except ClientDisconnected:
+            return Response(status_code=CLIENT_CLOSED)
+        except DBAPIError as e:
+            code = getattr(e.orig, "sqlstate", None)
+            if code == QUERY_CANCELED and tracker.disconnected:
+                return Response(status_code=CLIENT_CLOSED)
+            if code == QUERY_CANCELED:
+                db_timeouts.inc(path, "statement")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="A consulta excedeu o tempo limite.",
+                ) from e
+            if code == LOCK_NOT_AVAILABLE:
+                db_timeouts.inc(path, "lock")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Registro ocupado por outra operação; tente novamente.",
+                    headers={"Retry-After": str(settings.admission_retry_after_s)},
+                ) from e
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            _current.reset(token)
+
+    return limited
@@ -0,0 +1,76 @@
+# app/core/routing.py
+"""
+APIRoute instrumentada.
+
+- marca o fim do handler para o Server-Timing separar o tempo de
+  serialização (response_model -> JSON) do resto do request;
+- handlers `def` são despachados para o threadpool por aqui (e não pelo
+  FastAPI) para medir espera por thread vs execução, por rota;
+- dependências + handler rodam com os limites de SQL da rota e são
+  cancelados se o cliente desconectar (app.core.querylimits).
+
+Uso: APIRouter(..., route_class=TimedRoute)
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+from typing import Any, Callable, Coroutine
+
+import anyio.to_thread
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core import querylimits, threadpool, timing
+
+
+def _instrument(endpoint: Callable[..., Any], path: str) -> Callable[..., Any]:
+    # include_router recria a rota com o endpoint já instrumentado
+    if getattr(endpoint, "__timed__", False):
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            timings = timing.current()
+            if timings is not None:
+                timings.route = path
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing.mark_handler_done()
+
+        async_wrapper.__timed__ = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    async def threaded_wrapper(*args, **kwargs):
+        threadpool.ensure_configured()
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            timings = timing.current()  # contexto copiado pelo AnyIO
+            if timings is not None:
+                timings.route = path
+                timings.add("threadwait", started - submitted)
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timing.mark_handler_done()
+                threadpool.threadpool_wait.observe(started - submitted, path)
+                threadpool.threadpool_exec.observe(time.perf_counter() - started, path)
+
+        return await anyio.to_thread.run_sync(call)
+
+    threaded_wrapper.__timed__ = True
+    return threaded_wrapper
+
+
+class TimedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, _instrument(endpoint, path), **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        return querylimits.wrap_handler(super().get_route_handler(), self.methods, self.path)
@@ -1,13 +1,14 @@
+import math
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
 from sqlalchemy import select
 from sqlalchemy.orm import Session
-from firebase_admin import auth as fba
 
+from app.core import admission, firebase, timing
 from app.core.settings import settings
 from app.db import get_db
 from app.models import User  # garante que app/models.py exporta User (ou use: from app.models import User as User)
@@ -15,6 +16,21 @@ from app.models import User  # garante que app/models.py exporta User (ou use: f
 
 bearer = HTTPBearer()
 
+# usuário já autenticado pelo POST /batch: os sub-requests pulam a verificação do token
+preauthenticated_user_id: ContextVar[Optional[int]] = ContextVar("preauthenticated_user_id", default=None)
+
+_jwt = None
+
+
+def _jose_jwt():
+    """python-jose (e o backend de crypto) só é importado no primeiro uso."""
+    global _jwt
+    if _jwt is None:
+        from jose import jwt
+
+        _jwt = jwt
+    return _jwt
+
 
 def create_access_token(sub: str, extra: Optional[dict] = None) -> str:
     """
@@ -28,7 +44,7 @@ def create_access_token(sub: str, extra: Optional[dict] = None) -> str:
         "exp": int((now + timedelta(minutes=settings.jwt_expires_min)).timestamp()),
         **(extra or {}),
     }
-    return jwt.encode(payload, settings.jwt_secret, algorithm="HS256")
+    return _jose_jwt().encode(payload, settings.jwt_secret, algorithm="HS256")
 
 
 def _get_user_by_uid(db: Session, uid: str) -> Optional[User]:
@@ -46,11 +62,43 @@ def get_current_user(
     2) Se falhar, tenta como JWT curto interno (HS256).
     Retorna o objeto User ativo.
     """
-    token = cred.credentials
+    with timing.section("auth"):
+        user_id = preauthenticated_user_id.get()
+        if user_id is not None:
+            # identity map: sem query quando a sessão é a do próprio batch
+            user = db.get(User, user_id)
+            if user is not None and user.is_active:
+                return user  # o batch já consumiu o rate limit
+        user = _authenticate(cred.credentials, db)
+    wait = admission.take_user(user.id)
+    if wait is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Muitas requisições; tente novamente em instantes.",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+    return user
+
+
+class _NotFirebase(Exception):
+    pass
+
+
+def _is_internal_jwt(token: str) -> bool:
+    # ID tokens do Firebase são RS256; HS256 só pode ser o JWT interno
+    try:
+        return _jose_jwt().get_unverified_header(token).get("alg") == "HS256"
+    except Exception:
+        return False
+
 
-    # 1) Tenta ID token do Firebase
+def _authenticate(token: str, db: Session) -> User:
+    # 1) Tenta ID token do Firebase. JWT interno vai direto para (2): não gasta
+    #    a chamada nem conta como falha em firebase_verify_failures_total
     try:
-        decoded = fba.verify_id_token(token, check_revoked=True)
+        if _is_internal_jwt(token):
+            raise _NotFirebase
+        decoded = firebase.verify_id_token(token, check_revoked=True)
         uid = decoded["uid"]
         email = decoded.get("email")
         name = decoded.get("name")
@@ -97,7 +145,7 @@ def get_current_user(
     except Exception:
         # 2) Tenta JWT curto interno
         try:
-            payload = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"])
+            payload = _jose_jwt().decode(token, settings.jwt_secret, algorithms=["HS256"])
             uid = payload.get("sub")
             if not uid:
                 raise HTTPException(status_code=401, detail="invalid token")
@@ -8,6 +8,96 @@ class Settings(BaseSettings):
     jwt_secret: str
     jwt_expires_min: int = 60
 
+    # pool do SQLAlchemy (usado em app.db, lido direto do ambiente)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_s: float = 30.0
+
+    # statement_timeout/lock_timeout por transação das rotas (app.core.querylimits); 0 = sem limite
+    db_statement_timeout_ms: int = 5000
+    db_lock_timeout_ms: int = 2000
+    db_route_timeouts_ms: dict[str, list[int]] = {}  # JSON: {"GET /sync": [15000, 2000]}
+
+    # threadpool das rotas `def` (app.core.threadpool); vazio = pool_size + max_overflow
+    threadpool_tokens: int | None = None
+
+    # compressão de respostas (app.core.compression)
+    compression_min_size: int = 1024  # bytes; abaixo disso não comprime
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+
+    # health probe em background (app.core.health); 0 desliga o ping ativo.
+    # < 300 s (autosuspend do Neon) mantém o banco sempre acordado
+    health_probe_interval_s: float = 0.0
+
+    # instrumentação de SQL por request (app.core.timing)
+    server_timing: bool = True
+    sql_nplusone_mode: str = "off"  # off | log | raise (dev/test)
+    sql_nplusone_threshold: int = 10  # mesmo SQL > N vezes no request
+
+    # controle de admissão / load shedding (app.core.admission)
+    # vazio = db_pool_size + db_max_overflow (mesma conta do threadpool)
+    admission_max_concurrency: int | None = None
+    admission_max_queue: int = 50
+    admission_queue_timeout_ms: int = 2000
+    admission_retry_after_s: int = 1
+    rate_limit_rps: float = 20.0  # por usuário autenticado; 0 desliga
+    rate_limit_burst: float = 60.0
+    rate_limit_preauth_factor: float = 4.0  # bucket grosso por credencial/IP antes da autenticação
+
+    # Idempotency-Key nos POST de criação (app.core.idempotency)
+    idempotency_ttl_s: int = 86400
+    idempotency_wait_ms: int = 5000  # retry concorrente espera a 1ª terminar
+    idempotency_lock_timeout_s: int = 60  # pendente mais velha que isso é assumida
+    idempotency_purge_interval_s: float = 600.0  # 0 desliga a limpeza automática
+    idempotency_purge_batch: int = 1000
+
+    # câmbio e totais consolidados (app.core.fx)
+    default_currency: str = "BRL"  # quando users.home_currency é NULL
+    fx_pivot: str = "USD"  # moeda intermediária para pares sem cotação direta
+    fx_cache_ttl_s: float = 3600.0
+
+    # coalescência de leituras quentes (app.core.singleflight); TTL 0 = só coalesce, sem cache
+    singleflight_cache_ttl_s: float = 2.0
+    singleflight_cache_max_entries: int = 1024
+
+    # POST /batch (app.routers.batch)
+    batch_max_requests: int = 20
+    batch_max_concurrency: int = 4  # GETs consecutivos rodam em paralelo, cada um com sua sessão
+
+    # GET /sync (app.routers.sync)
+    sync_tombstone_ttl_days: int = 30  # lápides mais velhas são apagadas; cursor mais velho ⇒ 410
+
+    # GET /trips/{id}/events (app.core.changes)
+    events_heartbeat_s: float = 15.0
+    events_queue_size: int = 100  # eventos pendentes por stream; estourou ⇒ resync e fecha
+    events_max_subscribers: int = 500  # streams por instância; acima ⇒ 503
+    events_max_duration_s: float = 300.0  # fecha e o cliente reconecta
+    events_listener_idle_s: float = 60.0  # sem streams por esse tempo ⇒ fecha a conexão LISTEN
+
+    # DELETE /trips/{id} (app.core.purge)
+    trip_soft_delete_min_items: int = 5000  # a partir disso: soft delete + purga em lotes; 0 = sempre direto
+    trip_purge_batch: int = 2000  # itens por transação
+    trip_purge_pause_ms: int = 50  # entre lotes
+
+    # fila de jobs em background (app.core.jobs)
+    jobs_max_attempts: int = 5
+    jobs_retry_base_s: float = 10.0  # backoff: base * 2^(tentativa-1), com jitter
+    jobs_retry_max_s: float = 3600.0
+    jobs_lease_s: int = 900  # running há mais que isso ⇒ worker caiu, volta para a fila
+    jobs_poll_s: float = 1.0  # espera do worker com a fila vazia
+    jobs_retention_days: int = 7  # terminados mais velhos são apagados
+    jobs_maintenance_interval_s: float = 60.0
+    # threads de worker dentro da API; 0 = só o CLI (python -m app.cli worker).
+    # Sem nenhum worker, retentativas (ex.: trip_purge) ficam paradas na fila
+    jobs_inprocess_workers: int = 0
+
+    # histórico de escritas (app.core.audit)
+    audit_queue_size: int = 10000  # eventos esperando o writer; cheia ⇒ descarta; 0 = desliga
+    audit_batch_size: int = 500  # linhas por INSERT
+    audit_flush_interval_s: float = 1.0  # atraso máximo até o evento aparecer no histórico
+
     class Config:
         env_file = ".env"
 
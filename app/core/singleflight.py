@@ -0,0 +1,119 @@
+# app/core/singleflight.py
+"""
+Coalescência de leituras quentes idênticas (single-flight) + micro-cache.
+
+Quando a mesma viagem abre em vários dispositivos ao mesmo tempo, os
+mesmos relatórios chegam juntos. Com `flight.do(key, fn)`:
+- o primeiro request com uma chave roda `fn`; os que chegam enquanto ele
+  roda esperam e recebem o mesmo resultado (sem tocar no banco). Antes de
+  esperar, `release()` devolve a conexão do waiter ao pool;
+- o resultado fica num LRU por SINGLEFLIGHT_CACHE_TTL_S (curto) e no máximo
+  SINGLEFLIGHT_CACHE_MAX_ENTRIES chaves.
+
+A chave precisa conter tudo de que o resultado depende: usuário, rota,
+parâmetros e a versão dos dados (ex.: trips.row_version +
+trip_totals.version). Escrita nova => versão nova => chave nova; o TTL só
+limita o resto (câmbio, "hoje") e a memória.
+
+Só sucesso é compartilhado: se o líder falhar, cada waiter roda `fn` por
+conta própria (o erro pode ser do request dele, ex.: cliente desconectou).
+Por processo; os handlers são `def`, por isso threading.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+from app.core.metrics import registry
+from app.core.settings import settings
+
+T = TypeVar("T")
+
+flight_requests = registry.counter(
+    "singleflight_requests_total",
+    "Leituras coalescidas por resultado",
+    ("route", "outcome"),  # leader | shared | cached
+)
+
+
+class _Call:
+    __slots__ = ("done", "ok", "value")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.ok = False
+        self.value: Any = None
+
+
+class SingleFlight:
+    def __init__(self, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._cache: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def do(
+        self,
+        route: str,
+        key: Hashable,
+        fn: Callable[[], T],
+        release: Optional[Callable[[], None]] = None,
+    ) -> T:
+        key = (route, key)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                if hit[0] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    flight_requests.inc(route, "cached")
+                    return hit[1]
+                del self._cache[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if release is not None:
+                release()
+            call.done.wait()
+            if call.ok:
+                flight_requests.inc(route, "shared")
+                return call.value
+            return fn()
+
+        try:
+            call.value = fn()
+            call.ok = True
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.ok and self.ttl_s > 0:
+                    self._cache[key] = (time.monotonic() + self.ttl_s, call.value)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+            call.done.set()
+        flight_requests.inc(route, "leader")
+        return call.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> tuple[int, int]:
+        with self._lock:
+            return len(self._calls), len(self._cache)
+
+
+flight = SingleFlight(settings.singleflight_cache_ttl_s, settings.singleflight_cache_max_entries)
+
+
+@registry.collector
+def _singleflight_metrics():
+    inflight, cached = flight.stats()
+    yield ("singleflight_inflight", "gauge", "Computações em andamento com waiters possíveis", (), (), float(inflight))
+    yield ("singleflight_cache_entries", "gauge", "Resultados no micro-cache", (), (), float(cached))
@@ -0,0 +1,66 @@
+# app/core/threadpool.py
+"""
+Capacidade do threadpool do AnyIO (onde rodam as rotas `def`) e telemetria
+de espera vs execução por rota.
+
+O limiter padrão do AnyIO tem 40 tokens, independente do pool do DB; com
+mais threads que conexões, o excesso só troca fila do threadpool por fila
+no checkout do pool. Por padrão usamos pool_size + max_overflow.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import anyio.to_thread
+
+from app.core.metrics import registry
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+threadpool_wait = registry.histogram(
+    "threadpool_wait_seconds",
+    "Espera por uma thread do pool antes do handler começar",
+    ("route",),
+    buckets=_LATENCY_BUCKETS,
+)
+threadpool_exec = registry.histogram(
+    "threadpool_exec_seconds",
+    "Execução do handler sync dentro da thread",
+    ("route",),
+    buckets=_LATENCY_BUCKETS,
+)
+
+_limiter = None
+
+
+def capacity_from_settings() -> int:
+    from app.core.settings import settings
+
+    if settings.threadpool_tokens:
+        return settings.threadpool_tokens
+    return settings.db_pool_size + settings.db_max_overflow
+
+
+def configure(tokens: Optional[int] = None) -> int:
+    """Ajusta o limiter padrão do loop atual. Chamar de dentro do event loop."""
+    global _limiter
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = tokens or capacity_from_settings()
+    _limiter = limiter
+    return limiter.total_tokens
+
+
+def ensure_configured() -> None:
+    # runtimes sem lifespan (Vercel): configura no primeiro request
+    if _limiter is None:
+        configure()
+
+
+@registry.collector
+def _threadpool_metrics():
+    if _limiter is None:
+        return
+    stats = _limiter.statistics()
+    yield ("threadpool_tokens_total", "gauge", "Capacidade do threadpool", (), (), float(_limiter.total_tokens))
+    yield ("threadpool_tokens_borrowed", "gauge", "Threads em uso", (), (), float(stats.borrowed_tokens))
+    yield ("threadpool_tasks_waiting", "gauge", "Tarefas esperando thread", (), (), float(stats.tasks_waiting))
@@ -0,0 +1,194 @@
+# app/core/timing.py
+"""
+Instrumentação por request: tempo/quantidade de SQL, auth e serialização.
+
+- hooks `before/after_cursor_execute` no engine (ver app.db.get_engine);
+- o middleware cria um `RequestTimings` num ContextVar; o threadpool do
+  AnyIO copia o contexto, então as rotas sync enxergam o mesmo objeto;
+- a resposta sai com `Server-Timing: db;dur=..., auth;dur=..., serialize;dur=...`;
+- modo dev/test: avisa (log) ou falha (raise) quando o mesmo formato de SQL
+  roda mais de N vezes no mesmo request (N+1).
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# configurado pelo app (ver app.main); off | log | raise
+_nplusone_mode = "off"
+_nplusone_threshold = 10
+
+
+class NPlusOneDetected(RuntimeError):
+    pass
+
+
+class RequestTimings:
+    __slots__ = ("start", "db_s", "db_count", "sections", "handler_done", "shapes", "route")
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.db_s = 0.0
+        self.db_count = 0
+        self.sections: dict[str, float] = {}
+        self.handler_done: Optional[float] = None
+        self.shapes: Counter = Counter()
+        self.route: Optional[str] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def configure(nplusone_mode: str = "off", nplusone_threshold: int = 10) -> None:
+    global _nplusone_mode, _nplusone_threshold
+    if nplusone_mode not in ("off", "log", "raise"):
+        raise ValueError(f"sql_nplusone_mode inválido: {nplusone_mode}")
+    _nplusone_mode = nplusone_mode
+    _nplusone_threshold = nplusone_threshold
+
+
+@contextmanager
+def section(name: str) -> Iterator[None]:
+    """Soma o tempo do bloco em `name` no request atual (no-op fora de request)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - t0)
+
+
+@contextmanager
+def child() -> Iterator[RequestTimings]:
+    """RequestTimings próprio para um sub-request (POST /batch); o SQL soma no pai."""
+    parent = _current.get()
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        if parent is not None:
+            parent.db_s += timings.db_s
+            parent.db_count += timings.db_count
+
+
+def mark_handler_done() -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.handler_done = time.perf_counter()
+
+
+# ---- SQL ----
+_IN_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    # listas IN expandidas viram "(?)" para agrupar pelo formato
+    return _SPACES.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    timings = _current.get()
+    if timings is None:
+        return
+    timings.db_s += elapsed
+    timings.db_count += 1
+    if _nplusone_mode == "off":
+        return
+    shape = statement_shape(statement)
+    timings.shapes[shape] += 1
+    if timings.shapes[shape] == _nplusone_threshold + 1:
+        msg = (
+            f"possível N+1 em {timings.route or '?'}: mesmo SQL executado "
+            f"> {_nplusone_threshold}x no request: {shape[:300]}"
+        )
+        if _nplusone_mode == "raise":
+            raise NPlusOneDetected(msg)
+        logger.warning(msg)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def instrument_engine(engine) -> None:
+    if getattr(engine, "_timing_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    engine._timing_instrumented = True
+
+
+# ---- Server-Timing ----
+def _fmt(ms: float) -> str:
+    return f"{ms:.1f}"
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                now = time.perf_counter()
+                serialize = (now - timings.handler_done) if timings.handler_done else 0.0
+                parts = [
+                    f'db;dur={_fmt(timings.db_s * 1000)};desc="{timings.db_count} queries"',
+                    f"auth;dur={_fmt(timings.sections.get('auth', 0.0) * 1000)}",
+                    f"serialize;dur={_fmt(serialize * 1000)}",
+                ]
+                parts.extend(
+                    f"{name};dur={_fmt(secs * 1000)}"
+                    for name, secs in timings.sections.items()
+                    if name != "auth"
+                )
+                parts.append(f"total;dur={_fmt((now - timings.start) * 1000)}")
+                MutableHeaders(scope=message).append("Server-Timing", ", ".join(parts))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -2,7 +2,8 @@
 from __future__ import annotations
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
-from typing import Generator
+from contextvars import ContextVar
+from typing import Generator, Optional
 import os
 
 from pathlib import Path
@@ -16,7 +17,14 @@ _SessionLocal = None
 
 Base = declarative_base()
 
+# sessão já aberta por quem despacha sub-requests (POST /batch); quem abriu fecha
+shared_session: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
+
 def get_db() -> Generator[Session, None, None]:
+    shared = shared_session.get()
+    if shared is not None:
+        yield shared
+        return
     db = get_session()
     try:
         yield db
@@ -47,14 +55,24 @@ def get_engine():
             _get_database_url(),
             pool_pre_ping=True,
             pool_recycle=1800,
+            # mesmos nomes do Settings; o threadpool é dimensionado por eles
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT_S", "30")),
             future=True,
         )
+        # tempo/quantidade de SQL por request (Server-Timing, detector de N+1)
+        from app.core.timing import instrument_engine
+        instrument_engine(_engine)
     return _engine
 
 def get_session():
     global _SessionLocal
     if _SessionLocal is None:
         _SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+        # statement_timeout/lock_timeout por rota e cancelamento na desconexão
+        from app.core.querylimits import instrument
+        instrument(get_engine(), _SessionLocal)
     return _SessionLocal()
 
 def db_ping() -> None:
@@ -1,13 +1,21 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Response
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.exc import OperationalError
 import os
 from datetime import datetime, timezone  # NEW
 
-# garante que o Firebase Admin inicialize (usa as envs)
-from app.core import firebase  # noqa: F401
+# Firebase Admin é inicializado sob demanda (primeiro token verificado)
+from app.core import admission, audit, changes, firebase, jobs, threadpool
+from app.core.settings import settings
+from app.core.admission import AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware, IdempotentReplay, replay_handler
+from app.core.metrics import MetricsMiddleware, registry as metrics_registry
+from app.core import timing
+from app.core.timing import ServerTimingMiddleware
 
 # seus routers
 from app.routers import auth, users
@@ -15,11 +23,31 @@ from app.routers.trips import router as trips_router
 from app.routers.budget_categories import router as budget_categories_router
 from app.routers.budget_items import router as budget_items_router
 from app.routers.trip_budget_targets import router as trip_budget_targets_router
+from app.routers.reports import router as reports_router
+from app.routers.search import router as search_router
+from app.routers.batch import router as batch_router
+from app.routers.sync import router as sync_router
+from app.routers.events import router as events_router
+from app.routers.jobs import router as jobs_router
+from app.routers.audit import router as audit_router
+
+# status do DB em cache (probe em background)
+from app.core.health import prober
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # threads para rotas `def` = conexões do pool (ver app.core.threadpool)
+    threadpool.configure()
+    prober.start()
+    jobs.start_inprocess()  # só com JOBS_INPROCESS_WORKERS > 0
+    yield
+    jobs.stop_inprocess()
+    prober.stop()
+    changes.listener.stop()
+    audit.writer.stop()  # grava o que ainda está na fila
 
 
-# ping do DB
-from app.db import db_ping
-
 # 1) instanciar o app primeiro
 app = FastAPI(
     title="mytrip-backend",
@@ -27,6 +55,7 @@ app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # --- HEALTH METADATA --- #
@@ -62,6 +91,22 @@ def _cors_origin_regex() -> str | None:
     return val or None
 
 
+# Idempotency-Key: grava a resposta do 1º POST; retries recebem a gravada
+app.add_middleware(IdempotencyMiddleware)
+app.add_exception_handler(IdempotentReplay, replay_handler)
+
+# admissão/load shedding: mais interno que o CORS para que 503/429 levem os
+# headers de CORS (middlewares adicionados antes ficam mais perto das rotas)
+app.add_middleware(
+    AdmissionMiddleware,
+    max_concurrency=admission.capacity_from_settings(),
+    max_queue=settings.admission_max_queue,
+    queue_timeout_s=settings.admission_queue_timeout_ms / 1000,
+    retry_after_s=settings.admission_retry_after_s,
+    rate_limit_rps=settings.rate_limit_rps * settings.rate_limit_preauth_factor,
+    rate_limit_burst=settings.rate_limit_burst * settings.rate_limit_preauth_factor,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_cors_origins(),
@@ -69,8 +114,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Idempotent-Replayed"],
+)
+
+# compressão (gzip/br/zstd) para páginas grandes e exports em streaming
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+    zstd_level=settings.compression_zstd_level,
 )
 
+# tempo de DB/auth/serialização por request (header Server-Timing)
+timing.configure(settings.sql_nplusone_mode, settings.sql_nplusone_threshold)
+if settings.server_timing:
+    app.add_middleware(ServerTimingMiddleware)
+
+# métricas por rota (mais externo: mede inclusive CORS/compressão)
+app.add_middleware(MetricsMiddleware)
+
 # 3) registrar routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -78,6 +141,13 @@ app.include_router(trips_router)
 app.include_router(budget_categories_router)
 app.include_router(budget_items_router)
 app.include_router(trip_budget_targets_router)
+app.include_router(reports_router)
+app.include_router(search_router)
+app.include_router(batch_router)
+app.include_router(sync_router)
+app.include_router(events_router)
+app.include_router(jobs_router)
+app.include_router(audit_router)
 
 # 4) rotas utilitárias/health
 @app.get("/", include_in_schema=False)
@@ -88,31 +158,34 @@ def root():
 def favicon():
     return Response(status_code=204)
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+def _db_status(deep: bool):
+    # snapshot em cache (sem I/O); deep=1 força um SELECT 1 agora
+    return prober.check_now() if deep else prober.snapshot()
+
+
 @app.get("/health")
-def health():
-    db_ping()
-    return {"status": "ok", "db": "neon"}
+def health(deep: bool = Query(False, description="Executa um ping real no DB")):
+    snap = _db_status(deep)
+    if snap.status == "unavailable":
+        raise HTTPException(status_code=503, detail=f"db_unavailable: {snap.error}")
+    return {"status": "ok", "db": "neon", "db_status": snap.status}
 
 @app.get("/health/db")
-def health_db():
-    try:
-        db_ping()
-        return {"status": "ok", "db": "connected"}
-    except OperationalError as e:
-        raise HTTPException(status_code=503, detail=f"db_unavailable: {e}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"unexpected_error: {e}")
+def health_db(deep: bool = Query(False, description="Executa um ping real no DB")):
+    snap = _db_status(deep)
+    if snap.status == "unavailable":
+        raise HTTPException(status_code=503, detail=f"db_unavailable: {snap.error}")
+    return {"status": "ok", "db": "neon", **snap.as_dict()}
 
 
 # -------- NEW: /health/app com metadados de deploy -------- #
 @app.get("/health/app", tags=["health"])
-def health_app():
-    # DB status
-    try:
-        db_ping()
-        db_status = "connected"
-    except Exception:
-        db_status = "unavailable"
+def health_app(deep: bool = Query(False, description="Executa um ping real no DB")):
+    db_status = _db_status(deep).status
 
     # Metadados (Vercel + genéricos)
     return {
@@ -121,7 +194,7 @@ def health_app():
         "version": app.version,
         "environment": _env("ENV", _env("VERCEL_ENV", "development")),
         "database": db_status,
-        "firebase": "initialized",
+        "firebase": "initialized" if firebase.is_initialized() else "lazy",
         "uptime_seconds": int((datetime.now(timezone.utc) - START_TIME).total_seconds()),
         # Vercel Git metadata
         "git_commit": _env("VERCEL_GIT_COMMIT_SHA", _env("GIT_COMMIT_SHA", "local")),
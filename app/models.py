@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, SmallInteger, Date, Numeric, CHAR, ForeignKey, UniqueConstraint, Index, DateTime,Boolean,text, func
-from sqlalchemy.dialects.postgresql import CITEXT
+from sqlalchemy import String, Integer, SmallInteger, Date, Numeric, CHAR, ForeignKey, UniqueConstraint, Index, DateTime,Boolean,text, func, LargeBinary, BigInteger, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import CITEXT, JSONB
 from app.db import Base
 from datetime import datetime, date
 
@@ -13,12 +13,26 @@ class User(Base):
     password_hash: Mapped[str | None] = mapped_column(String, nullable=True)
     firebase_uid: Mapped[str | None] = mapped_column(String, unique=True, index=True, nullable=True)
     photo_url: Mapped[str | None] = mapped_column(String, nullable=True)
+    home_currency: Mapped[str | None] = mapped_column(CHAR(3), nullable=True)  # NULL = settings.default_currency
     is_active: Mapped[bool] = mapped_column(Boolean, server_default=text("TRUE"), nullable=False)
     last_login_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    trips: Mapped[list["Trip"]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes: o ON DELETE CASCADE do banco apaga os filhos sem carregá-los
+    trips: Mapped[list["Trip"]] = relationship(back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
-class Trip(Base):
+class SyncTracked:
+    """Colunas do delta sync, preenchidas pelo trigger sync_touch (ver app.routers.sync)."""
+    row_version: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("nextval('sync_version_seq')"), nullable=False
+    )
+    sync_xid: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+# período fechado da viagem; mesma expressão do índice GiST ix_trips_user_period
+TRIP_PERIOD = "daterange(start_date, end_date, '[]')"
+TRIP_PERIOD_ACTIVE = "deleted_at IS NULL AND start_date <= end_date"  # exclui datas nulas (e invertidas, que quebrariam o daterange)
+
+class Trip(SyncTracked, Base):
     __tablename__ = "trips"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
@@ -28,10 +42,21 @@ class Trip(Base):
     end_date: Mapped[date | None] = mapped_column(Date)
     currency_code: Mapped[str | None] = mapped_column(CHAR(3), index=True)
     total_budget: Mapped[float | None] = mapped_column(Numeric(12, 2))
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))  # soft delete; purga em app.core.purge
     user: Mapped["User"] = relationship(back_populates="trips")
-    items: Mapped[list["BudgetItem"]] = relationship(back_populates="trip", cascade="all, delete-orphan")
-    targets: Mapped[list["TripBudgetTarget"]] = relationship(back_populates="trip", cascade="all, delete-orphan")
-    __table_args__ = (Index("ix_trip_period", "start_date", "end_date"),)
+    items: Mapped[list["BudgetItem"]] = relationship(back_populates="trip", cascade="all, delete-orphan", passive_deletes=True)
+    targets: Mapped[list["TripBudgetTarget"]] = relationship(back_populates="trip", cascade="all, delete-orphan", passive_deletes=True)
+    __table_args__ = (
+        # GET /trips/calendar e /trips/conflicts (btree_gist)
+        Index("ix_trips_user_period", "user_id", text(TRIP_PERIOD), postgresql_using="gist",
+              postgresql_where=text(TRIP_PERIOD_ACTIVE)),
+        Index("ix_trips_sync", "user_id", "sync_xid", "row_version"),
+        Index("ix_trips_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+        # GET /search (pg_trgm)
+        Index("ix_trips_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_trips_destination_trgm", "destination", postgresql_using="gin",
+              postgresql_ops={"destination": "gin_trgm_ops"}),
+    )
 
 class BudgetCategory(Base):
     __tablename__ = "budget_categories"
@@ -41,10 +66,11 @@ class BudgetCategory(Base):
     items: Mapped[list["BudgetItem"]] = relationship(back_populates="category")
     targets: Mapped[list["TripBudgetTarget"]] = relationship(back_populates="category")
 
-class BudgetItem(Base):
+class BudgetItem(SyncTracked, Base):
     __tablename__ = "budget_items"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    trip_id: Mapped[int] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), index=True, nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # particionada por HASH (trip_id): a PK inclui a chave, e UPDATE/DELETE do ORM filtram por ela
+    trip_id: Mapped[int] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
     category_id: Mapped[int] = mapped_column(ForeignKey("budget_categories.id", ondelete="RESTRICT"), index=True, nullable=False)
     title: Mapped[str | None] = mapped_column(String)
     planned_amount: Mapped[float | None] = mapped_column(Numeric(12, 2))
@@ -52,8 +78,17 @@ class BudgetItem(Base):
     date: Mapped[date | None] = mapped_column(Date)
     trip: Mapped["Trip"] = relationship(back_populates="items")
     category: Mapped["BudgetCategory"] = relationship(back_populates="items")
+    # séries diárias e listagem por período dentro da viagem
+    __table_args__ = (
+        PrimaryKeyConstraint("trip_id", "id", name="budget_items_pkey"),
+        Index("ix_budget_items_trip_date", "trip_id", "date"),
+        Index("ix_budget_items_sync", "trip_id", "sync_xid", "row_version"),
+        Index("ix_budget_items_title_trgm", "title", postgresql_using="gin",
+              postgresql_ops={"title": "gin_trgm_ops"}),
+        {"postgresql_partition_by": "HASH (trip_id)"},  # partições: migration aeaf7d3ed512
+    )
 
-class TripBudgetTarget(Base):
+class TripBudgetTarget(SyncTracked, Base):
     __tablename__ = "trip_budget_targets"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     trip_id: Mapped[int] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), index=True, nullable=False)
@@ -61,4 +96,111 @@ class TripBudgetTarget(Base):
     planned_amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
     trip: Mapped["Trip"] = relationship(back_populates="targets")
     category: Mapped["BudgetCategory"] = relationship(back_populates="targets")
-    __table_args__ = (UniqueConstraint("trip_id", "category_id", name="uq_trip_category"),)
+    __table_args__ = (
+        UniqueConstraint("trip_id", "category_id", name="uq_trip_category"),
+        Index("ix_trip_budget_targets_sync", "trip_id", "sync_xid", "row_version"),
+    )
+
+class SyncTombstone(Base):
+    """Lápide de um delete em trips/budget_items/trip_budget_targets, gravada por trigger."""
+    __tablename__ = "sync_tombstones"
+    row_version: Mapped[int] = mapped_column(
+        BigInteger, primary_key=True, server_default=text("nextval('sync_version_seq')")
+    )
+    sync_xid: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)  # sem FK: sobrevive ao registro apagado
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)  # trip | item | target
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    trip_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (
+        Index("ix_sync_tombstones_user", "user_id", "sync_xid", "row_version"),
+        Index("ix_sync_tombstones_deleted_at", "deleted_at"),
+    )
+
+class FxRate(Base):
+    """1 `base` = `rate` `quote` em `rate_date` (ver app.core.fx)."""
+    __tablename__ = "fx_rates"
+    rate_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    base: Mapped[str] = mapped_column(CHAR(3), primary_key=True)
+    quote: Mapped[str] = mapped_column(CHAR(3), primary_key=True)
+    rate: Mapped[float] = mapped_column(Numeric(18, 8), nullable=False)
+
+class UserSpendRollup(Base):
+    """Gasto por usuário x ano x categoria x moeda, mantido por triggers (ver app.core.analytics)."""
+    __tablename__ = "user_spend_rollup"
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)  # sem FK: apagado junto com as viagens
+    year: Mapped[int] = mapped_column(SmallInteger, primary_key=True)  # 0 = item e viagem sem data
+    category_id: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    currency_code: Mapped[str] = mapped_column(String(3), primary_key=True)  # '' = viagem sem moeda
+    planned: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    actual: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    items: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class TripTotals(Base):
+    """Somas dos itens por viagem, mantidas por triggers (ver app.core.analytics)."""
+    __tablename__ = "trip_totals"
+    trip_id: Mapped[int] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), primary_key=True)
+    planned: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    actual: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    items: Mapped[int] = mapped_column(Integer, nullable=False)
+    # muda a cada escrita nos itens que afeta os totais (trigger trip_totals_bump)
+    version: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("nextval('sync_version_seq')"), nullable=False
+    )
+
+class IdempotencyKey(Base):
+    """Resposta gravada de um POST com Idempotency-Key (ver app.core.idempotency)."""
+    __tablename__ = "idempotency_keys"
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # sha256 de método+rota+corpo
+    status_code: Mapped[int | None] = mapped_column(SmallInteger)  # NULL = em processamento
+    response_body: Mapped[bytes | None] = mapped_column(LargeBinary)
+    content_type: Mapped[str | None] = mapped_column(String)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+class Job(Base):
+    """Tarefa da fila em background (ver app.core.jobs)."""
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, server_default=text("'{}'::jsonb"), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), server_default=text("'queued'"), nullable=False)  # queued | running | succeeded | failed
+    user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))  # NULL = job do sistema
+    dedupe_key: Mapped[str | None] = mapped_column(String(255))
+    attempts: Mapped[int] = mapped_column(SmallInteger, server_default=text("0"), nullable=False)
+    max_attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    locked_by: Mapped[str | None] = mapped_column(String(255))
+    last_error: Mapped[str | None] = mapped_column(String)
+    result: Mapped[dict | None] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    __table_args__ = (
+        Index("ix_jobs_queued", "run_at", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "locked_at", postgresql_where=text("status = 'running'")),
+        Index("ix_jobs_finished", "finished_at", postgresql_where=text("finished_at IS NOT NULL")),
+        Index("ix_jobs_user", "user_id", "id"),
+        Index("uq_jobs_dedupe_pending", "dedupe_key", unique=True,
+              postgresql_where=text("status IN ('queued', 'running')")),
+    )
+
+class AuditEvent(Base):
+    """Histórico append-only de escritas (gravado em lote por app.core.audit)."""
+    __tablename__ = "audit_events"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    actor_id: Mapped[int] = mapped_column(Integer, nullable=False)  # sem FK: o histórico sobrevive ao usuário
+    trip_id: Mapped[int | None] = mapped_column(Integer)  # NULL = evento de usuário
+    entity: Mapped[str] = mapped_column(String(16), nullable=False)  # trip | item | target | user
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    action: Mapped[str] = mapped_column(String(16), nullable=False)  # create | update | delete | deactivate
+    changes: Mapped[dict | None] = mapped_column(JSONB)
+    __table_args__ = (
+        Index("ix_audit_events_trip", "trip_id", "id", postgresql_where=text("trip_id IS NOT NULL")),
+        Index("ix_audit_events_actor", "actor_id", "id"),
+    )
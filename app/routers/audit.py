@@ -0,0 +1,46 @@
+# app/routers/audit.py
+"""
+GET /trips/{trip_id}/history: quem mudou o quê na viagem (app.core.audit).
+
+Mais recentes primeiro, paginado por keyset: `next_before` da resposta vai
+como `before` na próxima página (índice (trip_id, id), custo constante em
+qualquer página). Eventos aparecem com até AUDIT_FLUSH_INTERVAL_S de atraso.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.db import get_db
+from app.models import AuditEvent, Trip, User
+from app.schemas.audit import TripHistoryOut
+
+router = APIRouter(prefix="/trips/{trip_id}/history", tags=["audit"], route_class=TimedRoute)
+
+
+@router.get("", response_model=TripHistoryOut)
+def trip_history(
+    trip_id: int,
+    before: Optional[int] = Query(None, ge=1, description="`next_before` da página anterior"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
+    if not trip:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
+    if trip.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado a esta viagem.")
+
+    q = db.query(AuditEvent).filter(AuditEvent.trip_id == trip_id)
+    if before is not None:
+        q = q.filter(AuditEvent.id < before)
+    # um a mais para saber se há próxima página
+    rows = q.order_by(AuditEvent.id.desc()).limit(limit + 1).all()
+    events = rows[:limit]
+    return {
+        "events": events,
+        "next_before": events[-1].id if len(rows) > limit else None,
+    }
@@ -1,15 +1,16 @@
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from firebase_admin import auth as fba
 from sqlalchemy.orm import Session
 
+from app.core import firebase
+from app.core.routing import TimedRoute
 from app.core.security import create_access_token
 from app.db import get_db
 from app.models import User
 from app.schemas.auth import TokenOut
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=TimedRoute)
 bearer = HTTPBearer()
 
 def _upsert_user_from_firebase(decoded: dict, db: Session) -> User:
@@ -63,7 +64,7 @@ def exchange_token(
     valida, faz upsert no Postgres e devolve um JWT curto (HS256) com sub=firebase_uid.
     """
     try:
-        decoded = fba.verify_id_token(cred.credentials, check_revoked=True)
+        decoded = firebase.verify_id_token(cred.credentials, check_revoked=True)
     except Exception:
         # evita 500 e deixa claro para o cliente
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid firebase token")
@@ -0,0 +1,222 @@
+# app/routers/batch.py
+"""
+POST /batch: vários sub-requests em um round trip.
+
+- autentica uma vez (o token do batch); os sub-requests reaproveitam o
+  usuário (security.preauthenticated_user_id) sem reverificar o token;
+- os sub-requests são despachados em processo para as rotas existentes
+  (mesmas validações, checagens de dono e handlers de exceção), sem passar
+  de novo por admissão/CORS/compressão/métricas HTTP;
+- escritas rodam em ordem, na sessão do próprio batch (db.shared_session);
+  sub-request com erro (exceção ou status fora de 2xx) => rollback dela,
+  para a próxima não herdar uma transação quebrada ou pela metade;
+- GETs consecutivos rodam em paralelo (até `batch_max_concurrency`), cada um
+  com sua sessão: uma Session do SQLAlchemy não pode ser usada por duas
+  threads ao mesmo tempo. Antes, a sessão do batch devolve a conexão ao
+  pool; a vaga de admissão do batch cobre um leitor e cada leitor a mais
+  precisa de uma vaga livre na admissão (sem esperar; sem vaga, menos
+  paralelismo). Assim o batch nunca usa mais conexões do que a admissão
+  permite. Uma escrita é barreira: GETs depois dela veem o que ela gravou;
+- cada escrita faz o próprio commit (o batch não é atômico).
+"""
+import json
+import logging
+from collections import deque
+from typing import Any, Optional
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.middleware.exceptions import ExceptionMiddleware
+from starlette.types import ASGIApp, Message
+
+from app.core import admission, timing
+from app.core.admission import STREAMING_SUFFIXES
+from app.core.idempotency import IdempotencyMiddleware, idempotency
+from app.core.metrics import registry
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user, preauthenticated_user_id
+from app.core.settings import settings
+from app.db import get_db, get_session, shared_session
+from app.models import User
+from app.schemas.batch import BatchIn, BatchOut, BatchRequestItem, BatchResponseItem
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["batch"], route_class=TimedRoute)
+
+# headers do batch repassados a todos os sub-requests
+_INHERITED_HEADERS = (b"authorization", b"user-agent", b"x-forwarded-for")
+# chaves do scope do batch copiadas para os sub-requests
+_SCOPE_KEYS = ("type", "asgi", "http_version", "scheme", "server", "client", "root_path", "app")
+
+batch_subrequests = registry.counter(
+    "batch_subrequests_total",
+    "Sub-requests executados via POST /batch",
+    ("method", "route", "status"),
+)
+
+
+def _inner_app(request: Request) -> ASGIApp:
+    # o mesmo miolo do stack do Starlette: router + handlers de exceção
+    app = request.app
+    handlers = {k: v for k, v in app.exception_handlers.items() if k not in (500, Exception)}
+    return IdempotencyMiddleware(ExceptionMiddleware(app.router, handlers=handlers, debug=app.debug))
+
+
+def _sub_scope(parent: dict, item: BatchRequestItem, body: bytes) -> dict:
+    path, _, query = item.path.partition("?")
+    headers = [(k, v) for k, v in parent["headers"] if k in _INHERITED_HEADERS]
+    for name, value in item.headers.items():
+        key = name.lower().encode("latin-1")
+        if key not in (b"authorization", b"host", b"content-length"):
+            headers.append((key, value.encode("latin-1")))
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    scope = {k: parent[k] for k in _SCOPE_KEYS if k in parent}
+    scope.update(
+        method=item.method,
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=headers,
+        state={},
+    )
+    return scope
+
+
+async def _dispatch(app: ASGIApp, parent_scope: dict, item: BatchRequestItem) -> BatchResponseItem:
+    body = b"" if item.body is None else json.dumps(item.body).encode()
+    scope = _sub_scope(parent_scope, item, body)
+    delivered = False
+
+    async def receive() -> Message:
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await anyio.sleep_forever()  # sem desconexão: o batch espera todos
+
+    status_code = 500
+    content_type: Optional[str] = None
+    chunks: list[bytes] = []
+
+    async def send(message: Message) -> None:
+        nonlocal status_code, content_type
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+            content_type = Headers(raw=message["headers"]).get("content-type")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        with timing.child():
+            await app(scope, receive, send)
+    except Exception:
+        logger.exception("erro no sub-request %s %s", item.method, item.path)
+        status_code, content_type, chunks = 500, "application/json", [b'{"detail":"Erro interno."}']
+
+    route = scope.get("route")
+    batch_subrequests.inc(item.method, getattr(route, "path", "<unmatched>"), str(status_code))
+    raw = b"".join(chunks)
+    payload: Any = None
+    if raw:
+        payload = json.loads(raw) if content_type and "json" in content_type else raw.decode("utf-8", "replace")
+    return BatchResponseItem(id=item.id, status=status_code, body=payload)
+
+
+async def _dispatch_read(app: ASGIApp, parent_scope: dict, item: BatchRequestItem) -> BatchResponseItem:
+    session = get_session()
+    token = shared_session.set(session)
+    try:
+        return await _dispatch(app, parent_scope, item)
+    finally:
+        shared_session.reset(token)
+        await anyio.to_thread.run_sync(session.close)
+
+
+async def _dispatch_shared(app: ASGIApp, parent_scope: dict, item: BatchRequestItem, db: Session) -> BatchResponseItem:
+    response = await _dispatch(app, parent_scope, item)
+    if not 200 <= response.status < 300:
+        # a sessão é do batch: a falha não pode vazar para o próximo sub-request
+        await anyio.to_thread.run_sync(db.rollback)
+    return response
+
+
+async def _run_reads(
+    app: ASGIApp,
+    parent_scope: dict,
+    items: list[BatchRequestItem],
+    indexes: range,
+    responses: list[Optional[BatchResponseItem]],
+) -> None:
+    pending = deque(indexes)
+
+    async def reader(borrowed: bool) -> None:
+        try:
+            while pending:
+                k = pending.popleft()
+                responses[k] = await _dispatch_read(app, parent_scope, items[k])
+        finally:
+            if borrowed:
+                admission.give_back()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(reader, False)  # a vaga do próprio batch
+        for _ in range(min(settings.batch_max_concurrency, len(pending)) - 1):
+            if not admission.try_borrow():
+                break
+            tg.start_soon(reader, True)
+
+
+@router.post("/batch", response_model=BatchOut, dependencies=[Depends(idempotency)])
+async def batch(
+    payload: BatchIn,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Executa `requests` em ordem e devolve as respostas no mesmo envelope.
+    """
+    if len(payload.requests) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"No máximo {settings.batch_max_requests} requisições por batch.",
+        )
+    for item in payload.requests:
+        path = item.path.partition("?")[0].rstrip("/")
+        if path == "/batch":
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Batch aninhado.")
+        if path.endswith(STREAMING_SUFFIXES):
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Streams não cabem em batch.")
+
+    app = _inner_app(request)
+    responses: list[Optional[BatchResponseItem]] = [None] * len(payload.requests)
+
+    user_token = preauthenticated_user_id.set(current_user.id)
+    session_token = shared_session.set(db)
+    try:
+        i, items = 0, payload.requests
+        while i < len(items):
+            if items[i].method != "GET":
+                responses[i] = await _dispatch_shared(app, request.scope, items[i], db)
+                i += 1
+                continue
+            # sequência de GETs até a próxima escrita
+            j = i
+            while j < len(items) and items[j].method == "GET":
+                j += 1
+            if j - i == 1:
+                responses[i] = await _dispatch_shared(app, request.scope, items[i], db)
+            else:
+                # a sessão do batch (auth, escritas já commitadas) não segura conexão durante o fan-out
+                await anyio.to_thread.run_sync(db.rollback)
+                await _run_reads(app, request.scope, items, range(i, j), responses)
+            i = j
+    finally:
+        shared_session.reset(session_token)
+        preauthenticated_user_id.reset(user_token)
+
+    return BatchOut(responses=responses)
@@ -4,11 +4,12 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models import BudgetCategory, User
+from app.core.routing import TimedRoute
 from app.core.security import get_current_user
 from app.schemas.budget import BudgetCategoryOut
 
 
-router = APIRouter(prefix="/budget-categories", tags=["budget_categories"])
+router = APIRouter(prefix="/budget-categories", tags=["budget_categories"], route_class=TimedRoute)
 
 
 @router.get("", response_model=list[BudgetCategoryOut])
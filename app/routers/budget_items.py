@@ -7,6 +7,9 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models import BudgetItem, BudgetCategory, Trip, User
+from app.core import audit, changes
+from app.core.idempotency import idempotency
+from app.core.routing import TimedRoute
 from app.core.security import get_current_user
 from app.schemas.budget import (
     BudgetItemCreate,
@@ -15,7 +18,7 @@ from app.schemas.budget import (
 )
 
 
-router = APIRouter(prefix="/trips/{trip_id}/items", tags=["budget_items"])
+router = APIRouter(prefix="/trips/{trip_id}/items", tags=["budget_items"], route_class=TimedRoute)
 
 
 def _ensure_owner(trip: Trip, user_id: int) -> None:
@@ -24,12 +27,20 @@ def _ensure_owner(trip: Trip, user_id: int) -> None:
 
 
 def _get_trip_or_404(db: Session, trip_id: int) -> Trip:
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
     return trip
 
 
+def _get_item_or_404(db: Session, trip_id: int, item_id: int) -> BudgetItem:
+    # trip_id no filtro: a busca vai direto à partição da viagem
+    item = db.query(BudgetItem).filter(BudgetItem.trip_id == trip_id, BudgetItem.id == item_id).first()
+    if not item:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item não encontrado.")
+    return item
+
+
 def _validate_category(db: Session, category_id: int) -> None:
     if not db.query(BudgetCategory).filter(BudgetCategory.id == category_id).first():
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Categoria inválida.")
@@ -65,7 +76,7 @@ def list_items(
     return items
 
 
-@router.post("", response_model=BudgetItemOut, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=BudgetItemOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(idempotency)])
 def create_item(
     trip_id: int,
     payload: BudgetItemCreate,
@@ -86,6 +97,10 @@ def create_item(
         date=payload.date,
     )
     db.add(item)
+    db.flush()
+    changes.publish(db, trip_id, "item", "create", item.id)
+    audit.record(db, current_user.id, "item", "create", item.id, trip_id=trip_id,
+                 changes=payload.model_dump(mode="json"))
     db.commit()
     db.refresh(item)
     return item
@@ -102,9 +117,7 @@ def update_item(
     trip = _get_trip_or_404(db, trip_id)
     _ensure_owner(trip, current_user.id)
 
-    item = db.query(BudgetItem).filter(BudgetItem.id == item_id).first()
-    if not item or item.trip_id != trip_id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item não encontrado.")
+    item = _get_item_or_404(db, trip_id, item_id)
 
     data = payload.model_dump(exclude_unset=True)
     if "category_id" in data and data["category_id"] is not None:
@@ -113,6 +126,9 @@ def update_item(
     for field, value in data.items():
         setattr(item, field, value)
 
+    changes.publish(db, trip_id, "item", "update", item.id)
+    audit.record(db, current_user.id, "item", "update", item.id, trip_id=trip_id,
+                 changes=payload.model_dump(mode="json", exclude_unset=True))
     db.commit()
     db.refresh(item)
     return item
@@ -128,9 +144,7 @@ def get_item(
     trip = _get_trip_or_404(db, trip_id)
     _ensure_owner(trip, current_user.id)
 
-    item = db.query(BudgetItem).filter(BudgetItem.id == item_id).first()
-    if not item or item.trip_id != trip_id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item não encontrado.")
+    item = _get_item_or_404(db, trip_id, item_id)
     return item
 
 
@@ -144,10 +158,10 @@ def delete_item(
     trip = _get_trip_or_404(db, trip_id)
     _ensure_owner(trip, current_user.id)
 
-    item = db.query(BudgetItem).filter(BudgetItem.id == item_id).first()
-    if not item or item.trip_id != trip_id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item não encontrado.")
+    item = _get_item_or_404(db, trip_id, item_id)
 
     db.delete(item)
+    changes.publish(db, trip_id, "item", "delete", item.id)
+    audit.record(db, current_user.id, "item", "delete", item.id, trip_id=trip_id)
     db.commit()
     return None
\ No newline at end of file
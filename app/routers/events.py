@@ -0,0 +1,85 @@
+# app/routers/events.py
+"""
+GET /trips/{trip_id}/events: mudanças da viagem em tempo real (SSE).
+
+Eventos:
+- `ready`: o servidor está escutando; rode GET /sync agora (e a cada novo
+  `ready`, que também vem depois de uma reconexão com o banco);
+- `change`: `{"trip_id", "entity", "op", "id"}`; busque os dados em GET /sync;
+- `resync`: o cliente ficou para trás; o stream fecha, reconecte e rode /sync.
+
+Comentários `: ping` a cada `events_heartbeat_s` mantêm proxies e o cliente
+sabendo que a conexão está viva. O stream fecha depois de
+`events_max_duration_s`; o cliente reconecta (campo `retry`).
+"""
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.changes import listener
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.core.settings import settings
+from app.db import get_db
+from app.models import Trip, User
+
+router = APIRouter(prefix="/trips/{trip_id}/events", tags=["events"], route_class=TimedRoute)
+
+RETRY_MS = 3000
+
+
+def _authorize(trip_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)) -> int:
+    # dependência síncrona: a sessão fecha antes do stream começar
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
+    if not trip:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
+    if trip.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado a esta viagem.")
+    return trip_id
+
+
+async def _stream(trip_id: int):
+    # assina dentro do gerador: o finally sempre roda para quem assinou
+    sub = listener.subscribe(trip_id)
+    deadline = time.monotonic() + settings.events_max_duration_s
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            if sub.overflowed:
+                yield "event: resync\ndata: {}\n\n"
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                kind, data = await asyncio.wait_for(
+                    sub.queue.get(), timeout=min(settings.events_heartbeat_s, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {kind}\ndata: {data}\n\n"
+    finally:
+        # desconexão do cliente cancela o gerador e cai aqui
+        listener.unsubscribe(sub)
+
+
+@router.get("", response_class=StreamingResponse)
+async def trip_events(trip_id: int = Depends(_authorize)):
+    """
+    Stream SSE com as mudanças da viagem (itens, metas e a própria viagem).
+    """
+    if listener.subscriber_count() >= settings.events_max_subscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Muitos streams abertos; tente novamente em instantes.",
+            headers={"Retry-After": str(RETRY_MS // 1000)},
+        )
+    return StreamingResponse(
+        _stream(trip_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
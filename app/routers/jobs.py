@@ -0,0 +1,48 @@
+# app/routers/jobs.py
+"""
+Status dos jobs em background do usuário (app.core.jobs).
+
+Operações pesadas (ex.: DELETE de viagem grande) respondem na hora e deixam
+o trabalho para um job; o cliente acompanha por aqui.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.db import get_db
+from app.models import Job, User
+from app.schemas.job import JobOut, JobStatus
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=TimedRoute)
+
+
+@router.get("", response_model=List[JobOut])
+def list_jobs(
+    status_filter: Optional[JobStatus] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Jobs do usuário, mais recentes primeiro. Terminados somem depois de JOBS_RETENTION_DAYS.
+    """
+    q = db.query(Job).filter(Job.user_id == current_user.id)
+    if status_filter:
+        q = q.filter(Job.status == status_filter)
+    return q.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = db.get(Job, job_id)
+    # job de outro usuário (ou do sistema) não existe para quem pergunta
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado.")
+    return job
@@ -0,0 +1,403 @@
+# app/routers/reports.py
+"""
+Totais consolidados com câmbio (app.core.fx).
+
+O SQL agrega por (moeda, dia) — poucas centenas de linhas mesmo com milhares
+de itens — e só essas somas são convertidas em Python.
+
+Resumo e série diária da viagem passam por app.core.singleflight: requests
+idênticos simultâneos (mesma versão da viagem) compartilham uma execução.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core import fx
+from app.core.singleflight import flight
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.core.settings import settings
+from app.db import get_db
+from app.models import BudgetItem, Trip, TripTotals, User, UserSpendRollup
+from app.schemas.report import (
+    BurnForecast,
+    CategorySeries,
+    CategoryTotals,
+    CurrencyTotals,
+    DestinationStats,
+    PeriodTotals,
+    TripSummaryOut,
+    TripTimeseriesOut,
+    UserAnalyticsOut,
+    UserTotalsOut,
+    YearCategorySpend,
+    YearTotals,
+)
+
+router = APIRouter(tags=["reports"], route_class=TimedRoute)
+
+ZERO = Decimal(0)
+MAX_SERIES_DAYS = 3660
+
+# dias do período preenchidos com generate_series; o LEFT JOIN zera os vazios
+_DAYS_CTE = """
+    days AS (
+        SELECT d::date AS day
+        FROM generate_series(CAST(:start AS date), CAST(:end AS date), interval '1 day') AS d
+    )
+"""
+_DAILY_SQL = text(f"""
+    WITH {_DAYS_CTE}, sums AS (
+        SELECT date AS day, sum(planned_amount) AS planned, sum(actual_amount) AS actual
+        FROM budget_items
+        WHERE trip_id = :trip_id AND date BETWEEN :start AND :end
+        GROUP BY date
+    )
+    SELECT d.day, coalesce(s.planned, 0), coalesce(s.actual, 0)
+    FROM days d LEFT JOIN sums s ON s.day = d.day
+    ORDER BY d.day
+""")
+_DAILY_BY_CATEGORY_SQL = text(f"""
+    WITH {_DAYS_CTE}, sums AS (
+        SELECT category_id, date AS day, sum(planned_amount) AS planned, sum(actual_amount) AS actual
+        FROM budget_items
+        WHERE trip_id = :trip_id AND date BETWEEN :start AND :end
+        GROUP BY category_id, date
+    ), cats AS (SELECT DISTINCT category_id FROM sums)
+    SELECT c.category_id, d.day, coalesce(s.planned, 0), coalesce(s.actual, 0)
+    FROM cats c CROSS JOIN days d
+    LEFT JOIN sums s ON s.category_id = c.category_id AND s.day = d.day
+    ORDER BY c.category_id, d.day
+""")
+
+
+def _home_currency(user: User, override: Optional[str]) -> str:
+    return override or user.home_currency or settings.default_currency
+
+
+def _get_owned_trip(db: Session, trip_id: int, user_id: int) -> tuple[Trip, tuple[int, Optional[int]]]:
+    """Viagem do usuário e a versão dos dados dela (chave do single-flight), na mesma query."""
+    row = (
+        db.query(Trip, TripTotals.version)
+        .outerjoin(TripTotals, TripTotals.trip_id == Trip.id)
+        .filter(Trip.id == trip_id, Trip.deleted_at.is_(None))
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
+    trip, totals_version = row
+    if trip.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado a esta viagem.")
+    # muda com qualquer escrita na viagem ou nos valores/datas/categorias dos itens
+    return trip, (trip.row_version, totals_version)
+
+
+def _forecast(
+    start: date, end: date, as_of: date, actual: list[float], total_budget: Optional[float]
+) -> BurnForecast:
+    days_total = (end - start).days + 1
+    days_elapsed = min(max((as_of - start).days + 1, 0), days_total)
+    spent = sum(actual[:days_elapsed])
+    daily_burn = projected = over = None
+    if days_elapsed:
+        daily_burn = spent / days_elapsed
+        projected = spent + daily_burn * (days_total - days_elapsed)
+        if total_budget is not None:
+            over = projected - total_budget
+    return BurnForecast(
+        as_of=as_of,
+        days_elapsed=days_elapsed,
+        days_total=days_total,
+        spent=round(spent, 2),
+        daily_burn=None if daily_burn is None else round(daily_burn, 2),
+        projected_total=None if projected is None else round(projected, 2),
+        total_budget=total_budget,
+        projected_over_budget=None if over is None else round(over, 2),
+    )
+
+
+@router.get("/users/me/totals", response_model=UserTotalsOut)
+def my_totals(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$", description="Moeda dos totais (padrão: home_currency)"),
+):
+    """Planejado/realizado de todas as viagens, convertido para uma moeda só."""
+    home = _home_currency(current_user, currency)
+    # item sem data: converte pela data de início da viagem
+    day = func.coalesce(BudgetItem.date, Trip.start_date, func.current_date())
+    rows = db.execute(
+        select(
+            Trip.currency_code,
+            day,
+            func.sum(BudgetItem.planned_amount),
+            func.sum(BudgetItem.actual_amount),
+        )
+        .select_from(BudgetItem)
+        .join(Trip, Trip.id == BudgetItem.trip_id)
+        .where(Trip.user_id == current_user.id, Trip.deleted_at.is_(None))
+        .group_by(Trip.currency_code, day)
+    ).all()
+    trips = db.scalar(select(func.count()).select_from(Trip).where(Trip.user_id == current_user.id, Trip.deleted_at.is_(None)))
+
+    by_currency: dict[str, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    for code, _, planned, actual in rows:
+        acc = by_currency[code or home]
+        acc[0] += planned or ZERO
+        acc[1] += actual or ZERO
+
+    converted, missing = fx.convert_sums(((None, code, on, p, a) for code, on, p, a in rows), home)
+    planned, actual = converted.get(None, (ZERO, ZERO))
+    return UserTotalsOut(
+        currency=home,
+        planned=planned,
+        actual=actual,
+        trips=trips or 0,
+        by_currency=[
+            CurrencyTotals(currency=code, planned=p, actual=a)
+            for code, (p, a) in sorted(by_currency.items())
+        ],
+        missing_rates=sorted(missing),
+    )
+
+
+@router.get("/trips/{trip_id}/summary", response_model=TripSummaryOut)
+def trip_summary(
+    trip_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$", description="Moeda dos totais (padrão: home_currency)"),
+):
+    """Totais da viagem por categoria, na moeda da viagem e na do usuário."""
+    trip, version = _get_owned_trip(db, trip_id, current_user.id)
+    home = _home_currency(current_user, currency)
+    key = (current_user.id, trip_id, home, date.today(), *version)
+    return flight.do("/trips/{trip_id}/summary", key, lambda: _summary(db, trip, home), release=db.rollback)
+
+
+def _summary(db: Session, trip: Trip, home: str) -> TripSummaryOut:
+    trip_id = trip.id
+    rows = db.execute(
+        select(
+            BudgetItem.category_id,
+            BudgetItem.date,
+            func.sum(BudgetItem.planned_amount),
+            func.sum(BudgetItem.actual_amount),
+        )
+        .where(BudgetItem.trip_id == trip_id)
+        .group_by(BudgetItem.category_id, BudgetItem.date)
+    ).all()
+
+    fallback_day = trip.start_date or date.today()
+    by_category: dict[int, list[Decimal]] = defaultdict(lambda: [ZERO, ZERO])
+    for category_id, _, planned, actual in rows:
+        acc = by_category[category_id]
+        acc[0] += planned or ZERO
+        acc[1] += actual or ZERO
+    planned = sum((p for p, _ in by_category.values()), ZERO)
+    actual = sum((a for _, a in by_category.values()), ZERO)
+
+    converted, missing = fx.convert_sums(
+        [(None, trip.currency_code, on or fallback_day, p, a) for _, on, p, a in rows]
+        + [("budget", trip.currency_code, fallback_day, trip.total_budget, None)],
+        home,
+    )
+    home_planned, home_actual = converted.get(None, (ZERO, ZERO))
+    home_budget = converted["budget"][0] if "budget" in converted and trip.total_budget is not None else None
+    if missing:
+        home_planned = home_actual = home_budget = None
+
+    return TripSummaryOut(
+        trip_id=trip.id,
+        currency=trip.currency_code,
+        planned=planned,
+        actual=actual,
+        total_budget=trip.total_budget,
+        by_category=[
+            CategoryTotals(category_id=c, planned=p, actual=a)
+            for c, (p, a) in sorted(by_category.items())
+        ],
+        home_currency=home,
+        home_planned=home_planned,
+        home_actual=home_actual,
+        home_total_budget=home_budget,
+        missing_rates=sorted(missing),
+    )
+
+
+@router.get("/trips/{trip_id}/timeseries", response_model=TripTimeseriesOut)
+def trip_timeseries(
+    trip_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    by_category: bool = Query(False, description="Inclui uma série por categoria"),
+    as_of: Optional[date] = Query(None, description="Data de referência da projeção (padrão: hoje)"),
+):
+    """
+    Planejado/realizado por dia no período da viagem (dias sem item = 0) e
+    projeção do total pelo ritmo de gasto até `as_of`.
+    """
+    trip, version = _get_owned_trip(db, trip_id, current_user.id)
+    as_of = as_of or date.today()
+    key = (current_user.id, trip_id, by_category, as_of, *version)
+    return flight.do(
+        "/trips/{trip_id}/timeseries", key, lambda: _timeseries(db, trip, by_category, as_of), release=db.rollback,
+    )
+
+
+def _timeseries(db: Session, trip: Trip, by_category: bool, as_of: date) -> TripTimeseriesOut:
+    trip_id = trip.id
+    start, end = trip.start_date, trip.end_date
+    if start is None or end is None:
+        # viagem sem período: usa o intervalo das datas dos itens
+        first, last = db.execute(
+            select(func.min(BudgetItem.date), func.max(BudgetItem.date)).where(BudgetItem.trip_id == trip_id)
+        ).one()
+        start, end = start or first, end or last
+    total_budget = float(trip.total_budget) if trip.total_budget is not None else None
+
+    outside_filter = [BudgetItem.trip_id == trip_id]
+    if start and end:
+        outside_filter.append(or_(BudgetItem.date.is_(None), BudgetItem.date < start, BudgetItem.date > end))
+    outside = db.execute(
+        select(func.sum(BudgetItem.planned_amount), func.sum(BudgetItem.actual_amount)).where(*outside_filter)
+    ).one()
+    unscheduled = PeriodTotals(planned=outside[0] or 0, actual=outside[1] or 0)
+
+    if start is None or end is None or end < start:
+        return TripTimeseriesOut(
+            trip_id=trip.id, currency=trip.currency_code, start=start, end=end, unscheduled=unscheduled,
+        )
+    n_days = (end - start).days + 1
+    if n_days > MAX_SERIES_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Período maior que {MAX_SERIES_DAYS} dias.",
+        )
+
+    params = {"trip_id": trip_id, "start": start, "end": end}
+    planned = [0.0] * n_days
+    actual = [0.0] * n_days
+    categories = None
+    if by_category:
+        categories = []
+        rows = db.execute(_DAILY_BY_CATEGORY_SQL, params).all()
+        # n_days linhas por categoria, já ordenadas por (categoria, dia)
+        for offset in range(0, len(rows), n_days):
+            chunk = rows[offset:offset + n_days]
+            cat_planned = [float(r[2]) for r in chunk]
+            cat_actual = [float(r[3]) for r in chunk]
+            planned = [a + b for a, b in zip(planned, cat_planned)]
+            actual = [a + b for a, b in zip(actual, cat_actual)]
+            categories.append(CategorySeries(category_id=chunk[0][0], planned=cat_planned, actual=cat_actual))
+        planned = [round(v, 2) for v in planned]
+        actual = [round(v, 2) for v in actual]
+    else:
+        rows = db.execute(_DAILY_SQL, params).all()
+        planned = [float(r[1]) for r in rows]
+        actual = [float(r[2]) for r in rows]
+
+    return TripTimeseriesOut(
+        trip_id=trip.id,
+        currency=trip.currency_code,
+        start=start,
+        end=end,
+        days=[start + timedelta(days=i) for i in range(n_days)],
+        planned=planned,
+        actual=actual,
+        cumulative_actual=[round(v, 2) for v in accumulate(actual)],
+        categories=categories,
+        unscheduled=unscheduled,
+        forecast=_forecast(start, end, as_of, actual, total_budget),
+    )
+
+
+@router.get("/users/me/analytics", response_model=UserAnalyticsOut)
+def my_analytics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$", description="Moeda dos totais anuais (padrão: home_currency)"),
+    year_from: Optional[int] = Query(None, ge=1900, le=9999),
+    year_to: Optional[int] = Query(None, ge=1900, le=9999),
+):
+    """
+    Gasto por ano x categoria e custo médio diário por destino.
+
+    Lê só os agregados mantidos por triggers (app.core.analytics): o custo
+    não cresce com o número de itens.
+    """
+    home = _home_currency(current_user, currency)
+    filters = [UserSpendRollup.user_id == current_user.id]
+    if year_from is not None:
+        filters.append(UserSpendRollup.year >= year_from)
+    if year_to is not None:
+        filters.append(UserSpendRollup.year <= year_to)
+    rollup = db.execute(
+        select(
+            UserSpendRollup.year,
+            UserSpendRollup.category_id,
+            UserSpendRollup.currency_code,
+            UserSpendRollup.planned,
+            UserSpendRollup.actual,
+            UserSpendRollup.items,
+        )
+        .where(*filters)
+        .order_by(UserSpendRollup.year, UserSpendRollup.category_id, UserSpendRollup.currency_code)
+    ).all()
+
+    today = date.today()
+    converted, missing = fx.convert_sums(
+        (
+            (year, code or None, min(date(year, 12, 31), today) if year else today, planned, actual)
+            for year, _, code, planned, actual, _ in rollup
+        ),
+        home,
+    )
+
+    has_period = Trip.start_date.isnot(None) & Trip.end_date.isnot(None)
+    trip_days = Trip.end_date - Trip.start_date + 1
+    destinations = db.execute(
+        select(
+            Trip.destination,
+            Trip.currency_code,
+            func.count(),
+            func.coalesce(func.sum(trip_days).filter(has_period), 0),
+            func.coalesce(func.sum(TripTotals.planned), 0),
+            func.coalesce(func.sum(TripTotals.actual), 0),
+            func.sum(TripTotals.actual).filter(has_period),
+        )
+        .select_from(Trip)
+        .outerjoin(TripTotals, TripTotals.trip_id == Trip.id)
+        .where(Trip.user_id == current_user.id, Trip.deleted_at.is_(None))
+        .group_by(Trip.destination, Trip.currency_code)
+        .order_by(Trip.destination, Trip.currency_code)
+    ).all()
+
+    return UserAnalyticsOut(
+        currency=home,
+        by_year_category=[
+            YearCategorySpend(
+                year=year or None, category_id=category_id, currency=code or None,
+                planned=planned, actual=actual, items=items,
+            )
+            for year, category_id, code, planned, actual, items in rollup
+        ],
+        years=[
+            YearTotals(year=year or None, planned=p, actual=a)
+            for year, (p, a) in sorted(converted.items())
+        ],
+        destinations=[
+            DestinationStats(
+                destination=dest, currency=code, trips=trips, days=days, planned=planned, actual=actual,
+                avg_daily_actual=round(float(dated_actual) / days, 2) if days and dated_actual is not None else None,
+            )
+            for dest, code, trips, days, planned, actual, dated_actual in destinations
+        ],
+        missing_rates=sorted(missing),
+    )
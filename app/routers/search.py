@@ -0,0 +1,85 @@
+# app/routers/search.py
+"""
+Busca por nome/destino de viagem e título de item (pg_trgm).
+
+Casa por substring (ILIKE '%q%') ou por palavra parecida (word_similarity,
+operador <%), ambos atendidos pelos índices GIN gin_trgm_ops. Os itens são
+restritos às viagens do usuário antes do filtro de texto. Substring exata
+ganha +1 no rank, então "hotel" vem antes de "hostel".
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.db import get_db
+from app.models import User
+from app.schemas.search import SearchHit, SearchOut
+
+router = APIRouter(prefix="/search", tags=["search"], route_class=TimedRoute)
+
+_SEARCH_SQL = text("""
+    WITH my_trips AS (
+        SELECT id, name, destination FROM trips WHERE user_id = :user_id AND deleted_at IS NULL
+    ), hits AS (
+        SELECT 'trip' AS kind, t.id, t.id AS trip_id, t.name AS title, t.destination,
+               greatest(
+                   word_similarity(:q, coalesce(t.name, '')) + (t.name ILIKE :pattern)::int,
+                   word_similarity(:q, coalesce(t.destination, '')) + (t.destination ILIKE :pattern)::int
+               ) AS rank
+        FROM my_trips t
+        WHERE t.name ILIKE :pattern OR t.destination ILIKE :pattern
+           OR :q <% t.name OR :q <% t.destination
+        UNION ALL
+        SELECT 'item', bi.id, bi.trip_id, bi.title, t.destination,
+               word_similarity(:q, bi.title) + (bi.title ILIKE :pattern)::int
+        FROM budget_items bi
+        JOIN my_trips t ON t.id = bi.trip_id
+        WHERE bi.title ILIKE :pattern OR :q <% bi.title
+    )
+    SELECT kind, id, trip_id, title, destination, rank, count(*) OVER () AS total
+    FROM hits
+    ORDER BY rank DESC, kind DESC, id
+    LIMIT :limit OFFSET :skip
+""")
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+@router.get("", response_model=SearchOut)
+def search(
+    q: str = Query(..., min_length=2, max_length=100, description="Texto a buscar"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    skip: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Busca nas viagens (nome, destino) e itens (título) do usuário, ordenado por relevância.
+    """
+    # min_length vale para o texto sem as bordas: "   " viraria '%%' e casaria tudo
+    q = q.strip()
+    if len(q) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="q precisa de pelo menos 2 caracteres além de espaços."
+        )
+    rows = db.execute(
+        _SEARCH_SQL,
+        {"user_id": current_user.id, "q": q, "pattern": _like_pattern(q), "limit": limit, "skip": skip},
+    ).all()
+    return SearchOut(
+        q=q,
+        total=rows[0].total if rows else 0,
+        results=[
+            SearchHit(
+                kind=r.kind, id=r.id, trip_id=r.trip_id, title=r.title,
+                destination=r.destination, rank=round(float(r.rank), 4),
+            )
+            for r in rows
+        ],
+    )
@@ -0,0 +1,125 @@
+# app/routers/sync.py
+"""
+GET /sync: mudanças desde o último cursor (clientes offline-first).
+
+Toda escrita em trips/budget_items/trip_budget_targets recebe, por trigger,
+um `row_version` (sequência global) e o xid da transação (`sync_xid`).
+Deletes viram lápides em sync_tombstones. O stream de um usuário é
+ordenado por (sync_xid, row_version).
+
+O cursor só avança até o xmin do snapshot atual: toda transação com xid
+menor já terminou, então nenhuma escrita ainda não commitada pode aparecer
+depois "atrás" do cursor (o que aconteceria ordenando só pela sequência).
+Uma transação longa aberta atrasa o sync, mas não perde mudanças.
+"""
+import base64
+import binascii
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.routing import TimedRoute
+from app.core.security import get_current_user
+from app.core.settings import settings
+from app.db import get_db
+from app.models import User
+from app.schemas.sync import SyncOut
+
+router = APIRouter(prefix="/sync", tags=["sync"], route_class=TimedRoute)
+
+_HORIZON_SQL = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+# cada ramo já sai ordenado e limitado (índices *_sync); o merge final corta a página
+_CHANGES_SQL = text("""
+    WITH my_trips AS (
+        SELECT id FROM trips WHERE user_id = :user_id AND deleted_at IS NULL
+    )
+    SELECT kind, sync_xid, row_version, data FROM (
+        (SELECT 'trip' AS kind, t.sync_xid, t.row_version, to_jsonb(t) AS data
+         FROM trips t
+         WHERE t.user_id = :user_id AND t.deleted_at IS NULL
+           AND (t.sync_xid, t.row_version) > (:xid, :version) AND t.sync_xid < :horizon
+         ORDER BY t.sync_xid, t.row_version LIMIT :fetch)
+        UNION ALL
+        (SELECT 'item', bi.sync_xid, bi.row_version, to_jsonb(bi)
+         FROM budget_items bi JOIN my_trips mt ON mt.id = bi.trip_id
+         WHERE (bi.sync_xid, bi.row_version) > (:xid, :version) AND bi.sync_xid < :horizon
+         ORDER BY bi.sync_xid, bi.row_version LIMIT :fetch)
+        UNION ALL
+        (SELECT 'target', tg.sync_xid, tg.row_version, to_jsonb(tg)
+         FROM trip_budget_targets tg JOIN my_trips mt ON mt.id = tg.trip_id
+         WHERE (tg.sync_xid, tg.row_version) > (:xid, :version) AND tg.sync_xid < :horizon
+         ORDER BY tg.sync_xid, tg.row_version LIMIT :fetch)
+        UNION ALL
+        (SELECT 'deleted', d.sync_xid, d.row_version,
+                jsonb_build_object('entity', d.entity, 'id', d.entity_id, 'trip_id', d.trip_id)
+         FROM sync_tombstones d
+         WHERE :with_deleted AND d.user_id = :user_id
+           AND (d.sync_xid, d.row_version) > (:xid, :version) AND d.sync_xid < :horizon
+         ORDER BY d.sync_xid, d.row_version LIMIT :fetch)
+    ) changes
+    ORDER BY sync_xid, row_version
+    LIMIT :fetch
+""")
+
+
+def _encode_cursor(xid: int, version: int) -> str:
+    raw = f"{xid}.{version}.{int(time.time())}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        xid, version, issued = (int(p) for p in raw.split("."))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Cursor inválido.")
+    # lápides mais velhas que o TTL já podem ter sido apagadas
+    if issued < time.time() - settings.sync_tombstone_ttl_days * 86400:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor expirado: refaça o sync completo (sem `since`).",
+        )
+    return xid, version
+
+
+@router.get("", response_model=SyncOut)
+def sync_changes(
+    since: Optional[str] = Query(None, description="Cursor do último sync; vazio = tudo"),
+    limit: int = Query(500, ge=1, le=2000, description="Máximo de mudanças na página"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Viagens, itens e metas criados/alterados e os apagados desde `since`, em páginas.
+    """
+    xid, version = _decode_cursor(since) if since else (0, 0)
+    horizon = db.execute(_HORIZON_SQL).scalar_one()
+    rows = db.execute(
+        _CHANGES_SQL,
+        {
+            "user_id": current_user.id, "xid": xid, "version": version, "horizon": horizon,
+            "fetch": limit + 1,
+            # sem cursor o cliente não tem nada local para apagar
+            "with_deleted": since is not None,
+        },
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes: dict[str, list[dict]] = {"trip": [], "item": [], "target": [], "deleted": []}
+    for r in rows:
+        changes[r.kind].append(r.data)
+    return SyncOut(
+        # última página: tudo abaixo do horizonte já foi entregue
+        cursor=_encode_cursor(rows[-1].sync_xid, rows[-1].row_version) if has_more
+        else _encode_cursor(horizon, 0),
+        has_more=has_more,
+        trips=changes["trip"],
+        items=changes["item"],
+        targets=changes["target"],
+        deleted=changes["deleted"],
+    )
@@ -4,6 +4,9 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models import TripBudgetTarget, Trip, BudgetCategory, User
+from app.core import audit, changes
+from app.core.idempotency import idempotency
+from app.core.routing import TimedRoute
 from app.core.security import get_current_user
 from app.schemas.budget import (
     TripBudgetTargetCreate,
@@ -11,7 +14,7 @@ from app.schemas.budget import (
 )
 
 
-router = APIRouter(prefix="/trips/{trip_id}/targets", tags=["trip_budget_targets"])
+router = APIRouter(prefix="/trips/{trip_id}/targets", tags=["trip_budget_targets"], route_class=TimedRoute)
 
 
 def _ensure_owner(trip: Trip, user_id: int) -> None:
@@ -20,7 +23,7 @@ def _ensure_owner(trip: Trip, user_id: int) -> None:
 
 
 def _get_trip_or_404(db: Session, trip_id: int) -> Trip:
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
     return trip
@@ -48,7 +51,7 @@ def list_targets(
     return targets
 
 
-@router.post("", response_model=TripBudgetTargetOut, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=TripBudgetTargetOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(idempotency)])
 def upsert_target(
     trip_id: int,
     payload: TripBudgetTargetCreate,
@@ -76,9 +79,15 @@ def upsert_target(
             planned_amount=payload.planned_amount,
         )
         db.add(target)
+        db.flush()
+        op = "create"
     else:
         target.planned_amount = payload.planned_amount
+        op = "update"
 
+    changes.publish(db, trip_id, "target", op, target.id)
+    audit.record(db, current_user.id, "target", op, target.id, trip_id=trip_id,
+                 changes=payload.model_dump(mode="json"))
     db.commit()
     db.refresh(target)
     return target
@@ -106,6 +115,9 @@ def delete_target(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Meta não encontrada.")
 
     db.delete(target)
+    changes.publish(db, trip_id, "target", "delete", target.id)
+    audit.record(db, current_user.id, "target", "delete", target.id, trip_id=trip_id,
+                 changes={"category_id": category_id})
     db.commit()
     return None
 
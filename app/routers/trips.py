@@ -2,15 +2,20 @@
 from datetime import date
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import Date, and_, cast, func, literal_column
+from sqlalchemy.orm import Session, aliased
 
 from app.db import get_db
-from app.models import Trip, User
-from app.schemas.trip import TripCreate, TripOut, TripUpdate
+from app.models import Trip, TripTotals, User
+from app.schemas.trip import TripClone, TripConflictOut, TripCreate, TripOut, TripUpdate
+from app.core import audit, changes, clone, fx, jobs, purge
+from app.core.idempotency import idempotency
+from app.core.routing import TimedRoute
 from app.core.security import get_current_user  # <-- usa o seu dependency (Firebase/JWT)
+from app.core.settings import settings
 
-router = APIRouter(prefix="/trips", tags=["trips"])
+router = APIRouter(prefix="/trips", tags=["trips"], route_class=TimedRoute)
 
 
 # ---- Helpers ----
@@ -27,6 +32,21 @@ def _ensure_owner(trip: Trip, user_id: int) -> None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado a esta viagem.")
 
 
+def _period(t=Trip):
+    # mesma expressão do índice GiST ix_trips_user_period (app.models.TRIP_PERIOD)
+    return func.daterange(t.start_date, t.end_date, literal_column("'[]'"))
+
+
+def _window(start: Optional[date], end: Optional[date]):
+    # limite None = aberto
+    return func.daterange(cast(start, Date), cast(end, Date), literal_column("'[]'"))
+
+
+def _with_period(t, user_id: int) -> tuple:
+    # predicado do índice parcial: sem ele o planner não usa ix_trips_user_period
+    return (t.user_id == user_id, t.deleted_at.is_(None), t.start_date <= t.end_date)
+
+
 # ---- Endpoints ----
 
 @router.get("", response_model=List[TripOut])
@@ -41,7 +61,7 @@ def list_my_trips(
     """
     Lista as viagens do usuário autenticado com paginação e filtros de período.
     """
-    q = db.query(Trip).filter(Trip.user_id == current_user.id)
+    q = db.query(Trip).filter(Trip.user_id == current_user.id, Trip.deleted_at.is_(None))
 
     if start_from:
         q = q.filter(Trip.start_date >= start_from)
@@ -52,20 +72,89 @@ def list_my_trips(
     return trips
 
 
+# antes de /{trip_id}
+@router.get("/calendar", response_model=List[TripOut])
+def trips_calendar(
+    start: date = Query(..., description="Início da janela (inclusive)"),
+    end: date = Query(..., description="Fim da janela (inclusive)"),
+    limit: int = Query(200, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Viagens do usuário que se sobrepõem a [start, end], em ordem de início.
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end não pode ser anterior a start."
+        )
+    q = db.query(Trip).filter(
+        *_with_period(Trip, current_user.id),
+        _period().op("&&", is_comparison=True)(_window(start, end)),
+    )
+    return q.order_by(Trip.start_date, Trip.id).limit(limit).all()
+
+
+@router.get("/conflicts", response_model=List[TripConflictOut])
+def trip_conflicts(
+    start: Optional[date] = Query(None, description="Só conflitos que tocam [start, end]"),
+    end: Optional[date] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Pares de viagens do usuário com datas sobrepostas (cada par uma vez), em ordem de início.
+    """
+    if start is not None and end is not None and end < start:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="end não pode ser anterior a start."
+        )
+    first, second = aliased(Trip), aliased(Trip)
+    # para cada viagem, as sobrepostas vêm do índice GiST (nested loop parametrizado)
+    q = (
+        db.query(first, second)
+        .join(second, and_(
+            *_with_period(second, current_user.id),
+            second.id > first.id,
+            _period(second).op("&&", is_comparison=True)(_period(first)),
+        ))
+        .filter(*_with_period(first, current_user.id))
+    )
+    if start is not None or end is not None:
+        window = _window(start, end)
+        q = q.filter(
+            _period(first).op("&&", is_comparison=True)(window),
+            _period(first).op("*")(_period(second)).op("&&", is_comparison=True)(window),
+        )
+    pairs = q.order_by(first.start_date, first.id, second.id).limit(limit).all()
+    return [
+        {
+            "first": a,
+            "second": b,
+            "overlap_start": max(a.start_date, b.start_date),
+            "overlap_end": min(a.end_date, b.end_date),
+        }
+        for a, b in pairs
+    ]
+
+
 @router.get("/{trip_id}", response_model=TripOut)
 def get_trip(
     trip_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
     _ensure_owner(trip, current_user.id)
     return trip
 
 
-@router.post("", response_model=TripOut, status_code=status.HTTP_201_CREATED)
+@router.post("", response_model=TripOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(idempotency)])
 def create_trip(
     payload: TripCreate,
     db: Session = Depends(get_db),
@@ -83,11 +172,78 @@ def create_trip(
         total_budget=payload.total_budget,
     )
     db.add(trip)
+    db.flush()
+    changes.publish(db, trip.id, "trip", "create", trip.id)
+    audit.record(db, current_user.id, "trip", "create", trip.id, trip_id=trip.id,
+                 changes=payload.model_dump(mode="json"))
     db.commit()
     db.refresh(trip)
     return trip
 
 
+@router.post(
+    "/{trip_id}/clone", response_model=TripOut, status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotency)],
+)
+def clone_trip(
+    trip_id: int,
+    payload: TripClone,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Nova viagem com as metas e os itens desta, copiados no banco (app.core.clone).
+    """
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
+    if not trip:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
+    _ensure_owner(trip, current_user.id)
+
+    if payload.start_date is not None and payload.shift_days is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Informe start_date ou shift_days, não os dois."
+        )
+    shift_days = payload.shift_days or 0
+    if payload.start_date is not None:
+        if trip.start_date is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="A viagem não tem start_date; use shift_days."
+            )
+        shift_days = (payload.start_date - trip.start_date).days
+
+    rate = fx.ONE
+    if payload.currency_code and trip.currency_code and payload.currency_code != trip.currency_code:
+        rate = fx.rates().rate(trip.currency_code, payload.currency_code, date.today())
+        if rate is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Sem câmbio de {trip.currency_code} para {payload.currency_code}."
+            )
+
+    new_trip_id, targets, items = clone.clone_trip(
+        db, trip_id,
+        name=payload.name,
+        shift_days=shift_days,
+        currency_code=payload.currency_code,
+        rate=rate,
+        copy_actual=payload.copy_actual,
+    )
+    changes.publish(db, new_trip_id, "trip", "create", new_trip_id)
+    audit.record(db, current_user.id, "trip", "create", new_trip_id, trip_id=new_trip_id, changes={
+        "cloned_from": trip_id,
+        "shift_days": shift_days,
+        "currency_code": payload.currency_code,
+        "targets": targets,
+        "items": items,
+    })
+    db.commit()
+    clone.cloned_rows.inc("trip_budget_targets", amount=targets)
+    clone.cloned_rows.inc("budget_items", amount=items)
+    return db.get(Trip, new_trip_id)
+
+
 @router.put("/{trip_id}", response_model=TripOut)
 def update_trip(
     trip_id: int,
@@ -95,7 +251,7 @@ def update_trip(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
     _ensure_owner(trip, current_user.id)
@@ -109,6 +265,9 @@ def update_trip(
     for field, value in data.items():
         setattr(trip, field, value)
 
+    changes.publish(db, trip.id, "trip", "update", trip.id)
+    audit.record(db, current_user.id, "trip", "update", trip.id, trip_id=trip.id,
+                 changes=payload.model_dump(mode="json", exclude_unset=True))
     db.commit()
     db.refresh(trip)
     return trip
@@ -117,14 +276,33 @@ def update_trip(
 @router.delete("/{trip_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_trip(
     trip_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    trip = db.query(Trip).filter(Trip.id == trip_id).first()
+    trip = db.query(Trip).filter(Trip.id == trip_id, Trip.deleted_at.is_(None)).first()
     if not trip:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Viagem não encontrada.")
     _ensure_owner(trip, current_user.id)
 
+    changes.publish(db, trip.id, "trip", "delete", trip.id)
+    audit.record(db, current_user.id, "trip", "delete", trip.id, trip_id=trip.id)
+    totals = db.get(TripTotals, trip.id)
+    threshold = settings.trip_soft_delete_min_items
+    if threshold and totals is not None and totals.items >= threshold:
+        # viagem grande: some agora, os itens saem em lotes num job (app.core.purge)
+        trip.deleted_at = func.now()
+        job_id = jobs.enqueue(
+            db, "trip_purge", {"trip_id": trip_id},
+            user_id=current_user.id, dedupe_key=f"trip_purge:{trip_id}",
+        )
+        db.commit()
+        # tenta já neste processo; se não der, um worker pega
+        background_tasks.add_task(jobs.run_now, job_id)
+        background_tasks.add_task(purge.refresh_pending)
+        return None
+
+    # passive_deletes: o ON DELETE CASCADE apaga itens/metas sem carregá-los
     db.delete(trip)
     db.commit()
     return None
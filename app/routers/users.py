@@ -4,10 +4,12 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models import User
+from app.core import audit
+from app.core.routing import TimedRoute
 from app.core.security import get_current_user
 from app.schemas.user import UserOut, UserUpdate
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=TimedRoute)
 
 @router.get("/me", response_model=UserOut)
 def get_me(current: User = Depends(get_current_user)):
@@ -23,6 +25,10 @@ def update_me(
         current.name = payload.name
     if payload.photo_url is not None:
         current.photo_url = str(payload.photo_url)
+    if payload.home_currency is not None:
+        current.home_currency = payload.home_currency
+    audit.record(db, current.id, "user", "update", current.id,
+                 changes=payload.model_dump(mode="json", exclude_none=True))
     db.commit()
     db.refresh(current)
     return current
@@ -33,5 +39,6 @@ def deactivate_me(
     current: User = Depends(get_current_user),
 ):
     current.is_active = False
+    audit.record(db, current.id, "user", "deactivate", current.id)
     db.commit()
     return
@@ -0,0 +1,22 @@
+# app/schemas/audit.py
+from datetime import datetime
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class AuditEventOut(BaseModel):
+    id: int
+    occurred_at: datetime
+    actor_id: int
+    entity: Literal["trip", "item", "target"]
+    entity_id: int
+    action: str  # create | update | delete
+    changes: Optional[dict[str, Any]] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TripHistoryOut(BaseModel):
+    events: List[AuditEventOut] = Field(default_factory=list)
+    next_before: Optional[int] = Field(None, description="Enviar como `before` para a próxima página; null = fim")
@@ -0,0 +1,26 @@
+# app/schemas/batch.py
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = Field(None, description="Ecoado na resposta para casar requisição/resposta")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(..., pattern="^/", example="/trips/10/items?limit=100")
+    body: Optional[Any] = None
+    headers: Dict[str, str] = Field(default_factory=dict, description="Ex.: Idempotency-Key")
+
+
+class BatchIn(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., min_length=1)
+
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Optional[Any] = None
+
+
+class BatchOut(BaseModel):
+    responses: List[BatchResponseItem]
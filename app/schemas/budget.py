@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import date
+import datetime as dt
 from typing import Optional
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -21,7 +21,9 @@ class BudgetItemBase(BaseModel):
     title: Optional[str] = None
     planned_amount: Optional[float] = None
     actual_amount: Optional[float] = None
-    date: Optional[date] = None
+    # dt.date: com `from __future__ import annotations`, `Optional[date]` resolveria
+    # para o próprio campo (default None) e o tipo viraria NoneType
+    date: Optional[dt.date] = None
 
 
 class BudgetItemCreate(BudgetItemBase):
@@ -35,6 +37,8 @@ class BudgetItemUpdate(BudgetItemBase):
 class BudgetItemOut(BudgetItemBase):
     id: int
     trip_id: int
+    row_version: int
+    updated_at: dt.datetime
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -58,5 +62,7 @@ class TripBudgetTargetOut(BaseModel):
     trip_id: int
     category_id: int
     planned_amount: float
+    row_version: int
+    updated_at: dt.datetime
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,22 @@
+# app/schemas/job.py
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime  # próxima tentativa (queued)
+    last_error: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
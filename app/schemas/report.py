@@ -0,0 +1,111 @@
+# app/schemas/report.py
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class CurrencyTotals(BaseModel):
+    currency: str
+    planned: float
+    actual: float
+
+
+class UserTotalsOut(BaseModel):
+    currency: str = Field(..., description="Moeda dos totais (home_currency do usuário ou ?currency=)")
+    planned: float
+    actual: float
+    trips: int
+    by_currency: List[CurrencyTotals] = Field(default_factory=list, description="Totais nas moedas originais")
+    missing_rates: List[str] = Field(default_factory=list, description="Moedas sem cotação (fora dos totais)")
+
+
+class CategoryTotals(BaseModel):
+    category_id: int
+    planned: float
+    actual: float
+
+
+class TripSummaryOut(BaseModel):
+    trip_id: int
+    currency: Optional[str] = None
+    planned: float
+    actual: float
+    total_budget: Optional[float] = None
+    by_category: List[CategoryTotals] = Field(default_factory=list)
+    # mesmos totais convertidos para a moeda do usuário (None se faltar cotação)
+    home_currency: str
+    home_planned: Optional[float] = None
+    home_actual: Optional[float] = None
+    home_total_budget: Optional[float] = None
+    missing_rates: List[str] = Field(default_factory=list)
+
+
+class CategorySeries(BaseModel):
+    category_id: int
+    planned: List[float]
+    actual: List[float]
+
+
+class BurnForecast(BaseModel):
+    as_of: date
+    days_elapsed: int
+    days_total: int
+    spent: float = Field(..., description="Realizado com data até as_of")
+    daily_burn: Optional[float] = Field(None, description="spent / days_elapsed")
+    projected_total: Optional[float] = Field(None, description="spent + daily_burn * dias restantes")
+    total_budget: Optional[float] = None
+    projected_over_budget: Optional[float] = Field(None, description="projected_total - total_budget")
+
+
+class PeriodTotals(BaseModel):
+    planned: float
+    actual: float
+
+
+class TripTimeseriesOut(BaseModel):
+    trip_id: int
+    currency: Optional[str] = None
+    start: Optional[date] = None
+    end: Optional[date] = None
+    # séries alinhadas com `days` (um valor por dia, dias sem item = 0)
+    days: List[date] = Field(default_factory=list)
+    planned: List[float] = Field(default_factory=list)
+    actual: List[float] = Field(default_factory=list)
+    cumulative_actual: List[float] = Field(default_factory=list)
+    categories: Optional[List[CategorySeries]] = Field(None, description="Só com ?by_category=true")
+    unscheduled: PeriodTotals = Field(..., description="Itens sem data ou fora do período")
+    forecast: Optional[BurnForecast] = None
+
+
+class YearCategorySpend(BaseModel):
+    year: Optional[int] = Field(None, description="Ano do item (ou do início da viagem); null = sem data")
+    category_id: int
+    currency: Optional[str] = None
+    planned: float
+    actual: float
+    items: int
+
+
+class YearTotals(BaseModel):
+    year: Optional[int] = None
+    planned: float
+    actual: float
+
+
+class DestinationStats(BaseModel):
+    destination: Optional[str] = None
+    currency: Optional[str] = None
+    trips: int
+    days: int = Field(..., description="Soma dos dias das viagens com período definido")
+    planned: float
+    actual: float
+    avg_daily_actual: Optional[float] = Field(None, description="Realizado por dia, nas viagens com período")
+
+
+class UserAnalyticsOut(BaseModel):
+    currency: str = Field(..., description="Moeda de `years` (home_currency ou ?currency=)")
+    by_year_category: List[YearCategorySpend] = Field(default_factory=list, description="Nas moedas originais")
+    years: List[YearTotals] = Field(default_factory=list, description="Convertido pelo câmbio do fim de cada ano")
+    destinations: List[DestinationStats] = Field(default_factory=list)
+    missing_rates: List[str] = Field(default_factory=list)
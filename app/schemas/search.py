@@ -0,0 +1,19 @@
+# app/schemas/search.py
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchHit(BaseModel):
+    kind: Literal["trip", "item"]
+    id: int
+    trip_id: int
+    title: Optional[str] = Field(None, description="Nome da viagem ou título do item")
+    destination: Optional[str] = Field(None, description="Destino da viagem (do item, para kind=item)")
+    rank: float
+
+
+class SearchOut(BaseModel):
+    q: str
+    total: int
+    results: List[SearchHit] = Field(default_factory=list)
@@ -0,0 +1,22 @@
+# app/schemas/sync.py
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+from app.schemas.budget import BudgetItemOut, TripBudgetTargetOut
+from app.schemas.trip import TripOut
+
+
+class SyncDeleted(BaseModel):
+    entity: Literal["trip", "item", "target"]
+    id: int
+    trip_id: int
+
+
+class SyncOut(BaseModel):
+    cursor: str = Field(..., description="Enviar como `since` no próximo GET /sync")
+    has_more: bool = Field(..., description="Há mais mudanças: chamar de novo com o cursor")
+    trips: List[TripOut] = Field(default_factory=list)
+    items: List[BudgetItemOut] = Field(default_factory=list)
+    targets: List[TripBudgetTargetOut] = Field(default_factory=list)
+    deleted: List[SyncDeleted] = Field(default_factory=list, description="Apagar uma viagem apaga seus itens/metas")
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 
 
 # Base (campos comuns)
@@ -30,6 +30,26 @@ class TripUpdate(TripBase):
 class TripOut(TripBase):
     id: int
     user_id: int
+    row_version: int  # muda a cada escrita (GET /sync)
+    updated_at: datetime
 
     # Pydantic v2
     model_config = ConfigDict(from_attributes=True)  # mapeia direto do modelo SQLAlchemy
+
+
+# POST /trips/{trip_id}/clone (sem nada: cópia idêntica, sem os gastos reais)
+class TripClone(BaseModel):
+    name: Optional[str] = Field(None, example="Viagem a Paris 2026")
+    start_date: Optional[date] = Field(None, example="2026-03-09", description="Novo início; todas as datas andam junto")
+    shift_days: Optional[int] = Field(None, ge=-3650, le=3650, example=364, description="Alternativa a start_date")
+    currency_code: Optional[str] = Field(None, example="EUR", min_length=3, max_length=3,
+                                         description="Converte os valores pelo câmbio de hoje")
+    copy_actual: bool = Field(False, description="Copia também actual_amount dos itens")
+
+
+# GET /trips/conflicts
+class TripConflictOut(BaseModel):
+    first: TripOut
+    second: TripOut
+    overlap_start: date
+    overlap_end: date  # inclusive
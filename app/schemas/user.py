@@ -1,10 +1,12 @@
 # app/schemas/user.py
-from pydantic import BaseModel, EmailStr, HttpUrl, ConfigDict
+from pydantic import BaseModel, EmailStr, HttpUrl, ConfigDict, Field
 from typing import Optional
 
 class UserBase(BaseModel):
     name: Optional[str] = None
     photo_url: Optional[HttpUrl] = None
+    # moeda dos totais consolidados (/users/me/totals); None = padrão do servidor
+    home_currency: Optional[str] = Field(None, example="BRL", pattern="^[A-Z]{3}$")
 
 class UserOut(UserBase):
     id: int
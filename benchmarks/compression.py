@@ -0,0 +1,118 @@
+"""
+Benchmark de compressão: bytes vs CPU por algoritmo/nível.
+
+Usa payloads sintéticos no formato real da API:
+- página de 500 BudgetItemOut (one-shot, como em GET /trips/{id}/items?limit=500)
+- export em streaming (chunks de ~8 KiB comprimidos com flush por chunk)
+
+Uso:
+    python -m benchmarks.compression
+    python -m benchmarks.compression --items 500 --repeat 50 --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from app.core.compression import available_encodings, compress_bytes, stream_compressor
+
+LEVELS = {
+    "gzip": [1, 3, 6, 9],
+    "br": [1, 4, 6, 9, 11],
+    "zstd": [1, 3, 9, 19],
+}
+
+TITLES = ["Jantar", "Hotel centro", "Uber aeroporto", "Museu", "Seguro viagem", "Passagem", "Café", "Metrô"]
+
+
+def _items_page(n: int, seed: int = 42) -> bytes:
+    rnd = random.Random(seed)
+    start = date(2025, 3, 10)
+    rows = [
+        {
+            "id": 1000 + i,
+            "trip_id": 10,
+            "category_id": rnd.randint(1, 7),
+            "title": f"{rnd.choice(TITLES)} {i}",
+            "planned_amount": round(rnd.uniform(5, 900), 2),
+            "actual_amount": round(rnd.uniform(5, 900), 2),
+            "date": (start + timedelta(days=rnd.randint(0, 20))).isoformat(),
+            "row_version": 5000 + i,
+            "updated_at": "2025-03-01T12:00:00Z",
+        }
+        for i in range(n)
+    ]
+    return json.dumps(rows).encode()
+
+
+def _chunks(data: bytes, size: int = 8192) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _bench_oneshot(encoding: str, level: int, payload: bytes, repeat: int) -> dict:
+    t0 = time.process_time()
+    for _ in range(repeat):
+        out = compress_bytes(encoding, payload, level)
+    cpu = (time.process_time() - t0) / repeat
+    return {"bytes": len(out), "cpu_ms": cpu * 1000}
+
+
+def _bench_stream(encoding: str, level: int, chunks: list[bytes], repeat: int) -> dict:
+    t0 = time.process_time()
+    for _ in range(repeat):
+        stream = stream_compressor(encoding, level)
+        size = sum(len(stream.compress(c)) for c in chunks) + len(stream.finish())
+    cpu = (time.process_time() - t0) / repeat
+    return {"bytes": size, "cpu_ms": cpu * 1000}
+
+
+def run(items: int, repeat: int) -> dict:
+    page = _items_page(items)
+    export = _items_page(items * 20, seed=7)
+    export_chunks = _chunks(export)
+
+    results = {"page_bytes": len(page), "export_bytes": len(export), "rows": []}
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            one = _bench_oneshot(encoding, level, page, repeat)
+            stream = _bench_stream(encoding, level, export_chunks, max(1, repeat // 10))
+            results["rows"].append({
+                "encoding": encoding,
+                "level": level,
+                "page_bytes": one["bytes"],
+                "page_ratio": round(len(page) / one["bytes"], 2),
+                "page_cpu_ms": round(one["cpu_ms"], 3),
+                "export_bytes": stream["bytes"],
+                "export_ratio": round(len(export) / stream["bytes"], 2),
+                "export_cpu_ms": round(stream["cpu_ms"], 3),
+                "export_mb_s": round(len(export) / 1e6 / (stream["cpu_ms"] / 1000), 1),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    results = run(args.items, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"página: {results['page_bytes']} bytes | export: {results['export_bytes']} bytes (chunks de 8 KiB)")
+    print(f"{'enc':<5}{'lvl':>4}{'page B':>10}{'ratio':>7}{'cpu ms':>9}{'export B':>11}{'ratio':>7}{'cpu ms':>9}{'MB/s':>8}")
+    for r in results["rows"]:
+        print(
+            f"{r['encoding']:<5}{r['level']:>4}{r['page_bytes']:>10}{r['page_ratio']:>7}{r['page_cpu_ms']:>9}"
+            f"{r['export_bytes']:>11}{r['export_ratio']:>7}{r['export_cpu_ms']:>9}{r['export_mb_s']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
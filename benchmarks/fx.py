@@ -0,0 +1,140 @@
+"""
+Benchmark dos totais com câmbio sobre 1M de itens.
+
+Compara, em memória (sem DB):
+- per_item: uma busca de cotação + multiplicação por item;
+- grouped: agrega por (moeda, dia) — o que o GROUP BY faz no SQL — e
+  converte só as somas com app.core.fx.convert_sums (caminho da API).
+O tempo do agrupamento em Python é reportado à parte: em produção ele é do
+Postgres.
+
+Com --sql, roda também a query de GET /users/me/totals sobre todos os itens
+do DATABASE_URL atual (ex.: após `python -m benchmarks.loadtest.seed --scale 1m`).
+
+Uso:
+    python -m benchmarks.fx
+    python -m benchmarks.fx --items 1000000 --sql --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.core.fx import RateTable, convert_sums
+
+CURRENCIES = {"EUR": 1.08, "BRL": 0.19, "ARS": 0.0011, "CLP": 0.0011, "JPY": 0.0067, "GBP": 1.27, "MXN": 0.055}
+START, DAYS = date(2024, 1, 1), 3 * 365
+
+
+def _table(rnd: random.Random) -> RateTable:
+    rows = []
+    for code, rate in CURRENCIES.items():
+        for day in range(DAYS):
+            rate *= 1 + rnd.gauss(0, 0.004)
+            rows.append((START + timedelta(days=day), code, "USD", Decimal(str(round(rate, 8)))))
+    return RateTable(rows, pivot="USD")
+
+
+def _items(n: int, rnd: random.Random) -> list[tuple[str, date, Decimal, Decimal]]:
+    codes = list(CURRENCIES) + ["USD"]
+    days = [START + timedelta(days=d) for d in range(DAYS)]
+    return [
+        (rnd.choice(codes), rnd.choice(days), Decimal(rnd.randint(1000, 150000)) / 100, Decimal(rnd.randint(1000, 150000)) / 100)
+        for _ in range(n)
+    ]
+
+
+def per_item(items, table: RateTable, quote: str) -> tuple[Decimal, Decimal]:
+    planned = actual = Decimal(0)
+    for code, on, p, a in items:
+        rate = table.rate(code, quote, on)
+        planned += p * rate
+        actual += a * rate
+    return planned, actual
+
+
+def group(items) -> list[tuple]:
+    sums: dict[tuple[str, date], list[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    for code, on, p, a in items:
+        acc = sums[(code, on)]
+        acc[0] += p
+        acc[1] += a
+    return [(None, code, on, p, a) for (code, on), (p, a) in sums.items()]
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, round((time.perf_counter() - t0) * 1000, 1)
+
+
+def sql_totals(quote: str) -> dict:
+    from sqlalchemy import func, select
+
+    from app.core import fx
+    from app.db import get_engine
+    from app.models import BudgetItem, Trip
+
+    day = func.coalesce(BudgetItem.date, Trip.start_date, func.current_date())
+    stmt = (
+        select(Trip.currency_code, day, func.sum(BudgetItem.planned_amount), func.sum(BudgetItem.actual_amount))
+        .select_from(BudgetItem)
+        .join(Trip, Trip.id == BudgetItem.trip_id)
+        .group_by(Trip.currency_code, day)
+    )
+    with get_engine().connect() as conn:
+        n_items = conn.scalar(select(func.count()).select_from(BudgetItem))
+        rows, query_ms = _timed(lambda: conn.execute(stmt).all())
+    table, load_ms = _timed(fx.load_table)
+    (_, missing), convert_ms = _timed(
+        convert_sums, [(None, c, d, p, a) for c, d, p, a in rows], quote, table
+    )
+    return {
+        "items": n_items, "groups": len(rows), "query_ms": query_ms,
+        "fx_load_ms": load_ms, "convert_ms": convert_ms, "missing_rates": sorted(missing),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--quote", default="BRL")
+    parser.add_argument("--sql", action="store_true", help="mede também a query real no DATABASE_URL")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    table = _table(rnd)
+    items = _items(args.items, rnd)
+
+    (naive_p, naive_a), per_item_ms = _timed(per_item, items, table, args.quote)
+    groups, group_ms = _timed(group, items)
+    (totals, _), convert_ms = _timed(convert_sums, groups, args.quote, table)
+    grouped_p, grouped_a = totals[None]
+    assert abs(grouped_p - naive_p) < 1 and abs(grouped_a - naive_a) < 1, "totais divergentes"
+
+    result = {
+        "items": args.items,
+        "groups": len(groups),
+        "per_item_ms": per_item_ms,
+        "group_in_python_ms": group_ms,
+        "convert_grouped_ms": convert_ms,
+        "speedup_convert": round(per_item_ms / max(convert_ms, 0.1), 1),
+    }
+    if args.sql:
+        result["sql"] = sql_totals(args.quote)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:<22}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Orçamento de tempo de import do entrypoint da Vercel (`app.main`).
+
+Roda `python -X importtime -c "import app.main"` em um processo limpo, soma o
+tempo cumulativo e falha (exit 1) se:
+- o import total passar do orçamento (--budget-ms / IMPORT_BUDGET_MS), ou
+- algum módulo "pesado" que deveria ser lazy for importado no startup
+  (firebase_admin, jose, ...).
+
+Uso (CI):
+    python -m benchmarks.import_time --budget-ms 1200 --runs 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# devem ser importados só no primeiro request que precisar deles
+LAZY_MODULES = ("firebase_admin", "jose", "google.auth")
+
+
+def measure(target: str = "app.main") -> tuple[int, dict[str, int]]:
+    """Retorna (µs cumulativos do target, {módulo: µs cumulativos})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"falha ao importar {target}:\n{proc.stderr[-2000:]}")
+
+    modules: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            modules[name.strip()] = int(cumulative)
+        except ValueError:  # cabeçalho
+            continue
+    return modules.get(target, 0), modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1200")))
+    parser.add_argument("--runs", type=int, default=3, help="usa a mediana de N execuções")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    samples = []
+    modules: dict[str, int] = {}
+    for _ in range(args.runs):
+        total_us, modules = measure(args.target)
+        samples.append(total_us)
+    samples.sort()
+    median_ms = samples[len(samples) // 2] / 1000
+
+    leaked = sorted(
+        m for m in modules
+        if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    top = sorted(
+        ((m, us) for m, us in modules.items() if "." not in m or m.startswith("app.")),
+        key=lambda kv: kv[1],
+        reverse=True,
+    )[: args.top]
+
+    ok = median_ms <= args.budget_ms and not leaked
+    report = {
+        "target": args.target,
+        "median_ms": round(median_ms, 1),
+        "budget_ms": args.budget_ms,
+        "samples_ms": [round(s / 1000, 1) for s in samples],
+        "eager_lazy_modules": leaked,
+        "top_ms": {m: round(us / 1000, 1) for m, us in top},
+        "ok": ok,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.target}: {report['median_ms']} ms (orçamento {args.budget_ms} ms) {report['samples_ms']}")
+        for m, ms in report["top_ms"].items():
+            print(f"  {ms:>8.1f} ms  {m}")
+        if leaked:
+            print(f"ERRO: módulos que deveriam ser lazy foram importados: {', '.join(leaked[:10])}")
+        if median_ms > args.budget_ms:
+            print("ERRO: orçamento de import estourado")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Load test end-to-end: Postgres local + Firebase fake + tráfego misto via HTTP."""
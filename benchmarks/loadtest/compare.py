@@ -0,0 +1,54 @@
+"""
+Compara dois resultados do load test (baseline vs atual).
+
+    python -m benchmarks.loadtest.compare benchmarks/results/base.json benchmarks/results/new.json --tolerance 0.15
+
+Sai com código 1 se o p95 de alguma rota piorar mais que a tolerância ou o
+throughput total cair mais que a tolerância.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+
+def _delta(old: float, new: float) -> float:
+    return (new - old) / old if old else 0.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="regressão relativa aceita (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.current) as f:
+        cur = json.load(f)
+
+    print(f"baseline {base['meta']['commit']} -> atual {cur['meta']['commit']}")
+    print(f"{'rota':<14}{'p50 Δ':>9}{'p95 Δ':>9}{'p99 Δ':>9}{'rps Δ':>9}")
+    regressions = []
+    rows = {**cur["routes"], "TOTAL": cur["total"]}
+    for name, new in rows.items():
+        old = base["total"] if name == "TOTAL" else base["routes"].get(name)
+        if not old:
+            print(f"{name:<14}{'(novo)':>9}")
+            continue
+        d = {k: _delta(old[k], new[k]) for k in ("p50_ms", "p95_ms", "p99_ms", "rps")}
+        print(f"{name:<14}" + "".join(f"{d[k] * 100:>8.1f}%" for k in ("p50_ms", "p95_ms", "p99_ms", "rps")))
+        if d["p95_ms"] > args.tolerance:
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+        if name == "TOTAL" and -d["rps"] > args.tolerance:
+            regressions.append(f"throughput {old['rps']} -> {new['rps']} req/s")
+
+    for r in regressions:
+        print(f"REGRESSÃO: {r}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
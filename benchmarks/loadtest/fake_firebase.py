@@ -0,0 +1,40 @@
+"""
+Stub do Firebase para load test.
+
+Substitui `firebase_admin.auth.verify_id_token` por uma versão local:
+tokens no formato `fake:<uid>` viram `{"uid": uid, "email": ...}`; qualquer
+outro token levanta `InvalidIdTokenError`, como o SDK real. Também registra
+um App do Firebase sem credencial para que `app.core.firebase.get_app()` não
+tente montar a service account.
+"""
+from __future__ import annotations
+
+import os
+
+PREFIX = "fake:"
+
+
+def token_for(uid: str) -> str:
+    return f"{PREFIX}{uid}"
+
+
+def install() -> None:
+    # Settings exige as envs do Firebase mesmo sem usá-las
+    os.environ.setdefault("FIREBASE_PROJECT_ID", "loadtest")
+    os.environ.setdefault("FIREBASE_CLIENT_EMAIL", "loadtest@loadtest.iam.gserviceaccount.com")
+    os.environ.setdefault("FIREBASE_PRIVATE_KEY", "unused")
+    os.environ.setdefault("JWT_SECRET", "loadtest-secret")
+
+    import firebase_admin
+    from firebase_admin import auth as fba
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(options={"projectId": "loadtest"})
+
+    def verify_id_token(id_token, app=None, check_revoked=False, clock_skew_seconds=0):
+        if not isinstance(id_token, str) or not id_token.startswith(PREFIX):
+            raise fba.InvalidIdTokenError("not a fake token")
+        uid = id_token[len(PREFIX):]
+        return {"uid": uid, "email": f"{uid}@loadtest.local", "name": f"Load {uid}"}
+
+    fba.verify_id_token = verify_id_token
@@ -0,0 +1,110 @@
+"""
+Overhead do MetricsMiddleware por request.
+
+Chama um app ASGI mínimo diretamente (sem servidor/rede) N vezes com e sem
+o middleware e compara o tempo médio. Sai com código 1 se o overhead passar
+do limite (default 50 µs).
+
+Uso:
+    python -m benchmarks.metrics_overhead --requests 200000 --limit-us 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from app.core.metrics import MetricsMiddleware, Registry
+
+
+class _Route:
+    path = "/trips/{trip_id}/items"
+
+
+_ROUTE = _Route()
+_START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+_BODY = {"type": "http.response.body", "body": b"[]"}
+
+
+async def _endpoint(scope, receive, send):
+    scope["route"] = _ROUTE
+    await send(_START)
+    await send(_BODY)
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    return None
+
+
+async def _drive(app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/trips/1/items"}
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), _receive, _send)
+    return (time.perf_counter() - t0) / n
+
+
+def run(n: int, rounds: int) -> dict:
+    plain = _endpoint
+    instrumented = MetricsMiddleware(_endpoint)
+
+    async def main():
+        await _drive(plain, 1000)  # aquecimento
+        await _drive(instrumented, 1000)
+        base, inst = [], []
+        for _ in range(rounds):
+            base.append(await _drive(plain, n))
+            inst.append(await _drive(instrumented, n))
+        return min(base), min(inst)
+
+    base, inst = asyncio.run(main())
+
+    # custo do scrape com as séries geradas acima
+    reg = Registry()
+    hist = reg.histogram("h", "h", ("method", "route", "status"))
+    for i in range(200):
+        hist.observe(0.01, "GET", f"/r{i % 40}", str(200 + i % 5))
+    t0 = time.perf_counter()
+    for _ in range(100):
+        reg.render()
+    render_ms = (time.perf_counter() - t0) / 100 * 1000
+
+    return {
+        "requests_per_round": n,
+        "baseline_us": round(base * 1e6, 2),
+        "instrumented_us": round(inst * 1e6, 2),
+        "overhead_us": round((inst - base) * 1e6, 2),
+        "render_ms_200_series": round(render_ms, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--limit-us", type=float, default=50.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result = run(args.requests, args.rounds)
+    result["limit_us"] = args.limit_us
+    result["ok"] = result["overhead_us"] <= args.limit_us
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(
+            f"baseline {result['baseline_us']} µs | com métricas {result['instrumented_us']} µs | "
+            f"overhead {result['overhead_us']} µs (limite {args.limit_us}) | "
+            f"render {result['render_ms_200_series']} ms"
+        )
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
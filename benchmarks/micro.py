@@ -0,0 +1,318 @@
+"""
+Micro-benchmarks dos blocos de cada request, com limiar de regressão.
+
+Casos:
+- auth.create_access_token / auth.jwt_decode_hs256
+- auth.get_current_user.jwt / auth.get_current_user.firebase (DB e Firebase stubados)
+- schema.trip_out.{1,100,500} / schema.budget_item_out.{1,100,500}
+  (validação from_attributes + dump JSON, como o FastAPI faz no response_model)
+- db.get_database_url
+- deps.list_items (resolução de dependências/query params da rota, DB stubado)
+- reports.timeseries.365d (pós-processamento de /trips/{id}/timeseries com
+  7 categorias x 365 dias já preenchidos pelo SQL, DB stubado)
+
+Uso:
+    python -m benchmarks.micro --save benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --compare benchmarks/results/micro-baseline.json \\
+        --thresholds benchmarks/micro_thresholds.json
+
+Com --compare, sai com código 1 se algum caso ficar mais lento que
+baseline * (1 + tolerância). Tolerâncias: --tolerance (default) e/ou um JSON
+{"default": 0.25, "cases": {"auth.jwt_decode_hs256": 0.15}}.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from contextlib import AsyncExitStack
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.loadtest import fake_firebase
+
+fake_firebase.install()
+
+from fastapi.security import HTTPAuthorizationCredentials  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import db as app_db  # noqa: E402
+from app.core import security  # noqa: E402
+from app.models import BudgetItem, Trip, User  # noqa: E402
+from app.schemas.budget import BudgetItemOut  # noqa: E402
+from app.schemas.trip import TripOut  # noqa: E402
+
+# o bucket por usuário continua no caminho medido, mas sem nunca recusar
+security.settings.rate_limit_rps = security.settings.rate_limit_burst = 1e12
+
+FORMAT_VERSION = 1
+
+
+class _StubSession:
+    """Session mínima para o caminho de auth (sem I/O)."""
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+
+    def scalar(self, stmt):
+        return self.user
+
+    def add(self, obj) -> None:
+        pass
+
+    def commit(self) -> None:
+        pass
+
+    def refresh(self, obj) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _user() -> User:
+    return User(
+        id=1,
+        firebase_uid="lt-1",
+        email="lt-1@loadtest.local",
+        name="Load lt-1",
+        is_active=True,
+        last_login_at=datetime.now(timezone.utc),
+    )
+
+
+UPDATED_AT = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _trips(n: int) -> list[Trip]:
+    return [
+        Trip(
+            id=i, user_id=1, name=f"Viagem {i}", destination="Lisboa",
+            start_date=date(2025, 3, 10), end_date=date(2025, 3, 17),
+            currency_code="EUR", total_budget=Decimal("5000.00"),
+            row_version=i + 1, updated_at=UPDATED_AT,
+        )
+        for i in range(n)
+    ]
+
+
+def _items(n: int) -> list[BudgetItem]:
+    return [
+        BudgetItem(
+            id=i, trip_id=10, category_id=1 + i % 7, title=f"Item {i}",
+            planned_amount=Decimal("120.00"), actual_amount=Decimal("110.50"),
+            date=date(2025, 3, 11), row_version=i + 1, updated_at=UPDATED_AT,
+        )
+        for i in range(n)
+    ]
+
+
+def _serializer(model) -> Callable[[list], bytes]:
+    adapter = TypeAdapter(list[model])
+
+    def run(objs):
+        validated = adapter.validate_python(objs, from_attributes=True)
+        return adapter.dump_json(validated)
+
+    return run
+
+
+def _deps_case() -> Callable[[], None]:
+    """Resolve as dependências de GET /trips/{trip_id}/items com overrides."""
+    from fastapi.dependencies.utils import solve_dependencies
+    from starlette.requests import Request
+
+    from app.main import app
+    from app.core.security import get_current_user
+    from app.db import get_db
+
+    route = next(r for r in app.routes if getattr(r, "path", "") == "/trips/{trip_id}/items" and "GET" in r.methods)
+    user = _user()
+    session = _StubSession(user)
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/trips/10/items",
+        "query_string": b"limit=100&date_from=2025-03-01&category_id=3",
+        "headers": [(b"authorization", b"Bearer x")], "path_params": {"trip_id": "10"},
+    }
+    loop = asyncio.new_event_loop()
+
+    async def solve():
+        async with AsyncExitStack() as stack:
+            solved = await solve_dependencies(
+                request=Request(scope), dependant=route.dependant, async_exit_stack=stack,
+                dependency_overrides_provider=app, embed_body_fields=False,
+            )
+            assert not solved.errors, solved.errors
+
+    return lambda: loop.run_until_complete(solve())
+
+
+class _SeriesSession:
+    """Devolve linhas no formato das queries de /timeseries (sem I/O)."""
+
+    def __init__(self, trip: Trip, days: int, categories: int) -> None:
+        self.trip = trip
+        start = trip.start_date
+        self.rows = [
+            (c, start + timedelta(days=i), Decimal("12.50"), Decimal("11.00") if i % 3 else Decimal(0))
+            for c in range(1, categories + 1)
+            for i in range(days)
+        ]
+
+    def query(self, *args):
+        return self
+
+    def outerjoin(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.trip, None  # (Trip, TripTotals.version)
+
+    def rollback(self):
+        pass
+
+    def execute(self, stmt, params=None):
+        rows = self.rows if params else [(Decimal("5.00"), None)]
+        return type("Result", (), {"all": lambda _: rows, "one": lambda _: rows[0]})()
+
+
+def _timeseries_case(days: int) -> Callable[[], object]:
+    from app.core.singleflight import flight
+    from app.routers.reports import trip_timeseries
+
+    trip = _trips(1)[0]
+    trip.end_date = trip.start_date + timedelta(days=days - 1)
+    session = _SeriesSession(trip, days, 7)
+    user = _user()
+
+    def run():
+        flight.clear()  # mede o cálculo, não o micro-cache
+        return trip_timeseries(
+            trip.id, db=session, current_user=user, by_category=True, as_of=trip.start_date + timedelta(days=days // 2)
+        )
+
+    return run
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    token = security.create_access_token(sub="lt-1")
+    jwt = security._jose_jwt()
+    secret = security.settings.jwt_secret
+    user = _user()
+    session = _StubSession(user)
+    jwt_cred = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    fb_cred = HTTPAuthorizationCredentials(scheme="Bearer", credentials=fake_firebase.token_for("lt-1"))
+
+    out = {
+        "auth.create_access_token": lambda: security.create_access_token(sub="lt-1"),
+        "auth.jwt_decode_hs256": lambda: jwt.decode(token, secret, algorithms=["HS256"]),
+        # JWT interno: o fake do Firebase recusa o token antes (mesma ordem da produção)
+        "auth.get_current_user.jwt": lambda: security.get_current_user(jwt_cred, session),
+        "auth.get_current_user.firebase": lambda: security.get_current_user(fb_cred, session),
+        "db.get_database_url": app_db._get_database_url,
+        "deps.list_items": _deps_case(),
+        "reports.timeseries.365d": _timeseries_case(365),
+    }
+    for size in (1, 100, 500):
+        trips, items = _trips(size), _items(size)
+        trip_ser, item_ser = _serializer(TripOut), _serializer(BudgetItemOut)
+        out[f"schema.trip_out.{size}"] = (lambda s, o: lambda: s(o))(trip_ser, trips)
+        out[f"schema.budget_item_out.{size}"] = (lambda s, o: lambda: s(o))(item_ser, items)
+    return out
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> dict:
+    fn()  # aquecimento
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - t0 >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / loops)
+    return {"ns_per_op": round(best * 1e9, 1), "loops": loops}
+
+
+def run(selected: list[str] | None, min_time: float, repeat: int) -> dict:
+    results = {}
+    for name, fn in cases().items():
+        if selected and not any(name.startswith(s) for s in selected):
+            continue
+        results[name] = measure(fn, min_time, repeat)
+    return {
+        "format": FORMAT_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": dict(sorted(results.items())),
+    }
+
+
+def compare(baseline: dict, current: dict, default_tol: float, per_case: dict[str, float]) -> list[str]:
+    regressions = []
+    print(f"{'caso':<36}{'base ns':>12}{'atual ns':>12}{'Δ':>9}{'tol':>7}")
+    for name, cur in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if not base:
+            print(f"{name:<36}{'-':>12}{cur['ns_per_op']:>12}{'(novo)':>9}")
+            continue
+        tol = per_case.get(name, default_tol)
+        delta = cur["ns_per_op"] / base["ns_per_op"] - 1
+        flag = " <-- REGRESSÃO" if delta > tol else ""
+        print(f"{name:<36}{base['ns_per_op']:>12}{cur['ns_per_op']:>12}{delta * 100:>8.1f}%{tol * 100:>6.0f}%{flag}")
+        if delta > tol:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", help="prefixos de casos (ex.: auth schema.trip_out)")
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="grava o resultado (JSON) neste arquivo")
+    parser.add_argument("--compare", help="baseline JSON para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--thresholds", help="JSON com tolerâncias por caso")
+    args = parser.parse_args()
+
+    current = run(args.only, args.min_time, args.repeat)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(current, indent=2) + "\n")
+
+    if not args.compare:
+        for name, r in current["cases"].items():
+            print(f"{name:<36}{r['ns_per_op']:>14} ns/op")
+        return 0
+
+    baseline = json.loads(Path(args.compare).read_text())
+    default_tol, per_case = args.tolerance, {}
+    if args.thresholds:
+        cfg = json.loads(Path(args.thresholds).read_text())
+        default_tol = cfg.get("default", default_tol)
+        per_case = cfg.get("cases", {})
+    regressions = compare(baseline, current, default_tol, per_case)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Particionamento de budget_items (HASH por trip_id, migration aeaf7d3ed512).
+
+Plan check: roda EXPLAIN das queries de app/routers/budget_items.py (lista
+com filtros, item por id), do lote da purga e da série diária para viagens
+de amostra e confere que cada uma lê uma partição só. Também confere o
+pruning em tempo de execução com plano genérico (PREPARE +
+plan_cache_mode = force_generic_plan, o que o driver faz depois de algumas
+execuções). Sai com código 1 se alguma query ler mais de uma partição.
+
+Com --migrate, mede a migration no banco atual (desfaz e refaz: tabela
+comum <-> particionada). Use um banco do load test, nunca produção:
+
+    python -m benchmarks.loadtest.seed --scale 1m --reset
+    python -m benchmarks.partitions --migrate
+
+Uso:
+    python -m benchmarks.partitions [--trips 5] [--migrate] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.purge import _DELETE_ITEMS_SQL
+from app.db import get_engine
+from app.models import BudgetItem
+from app.routers.reports import _DAILY_SQL
+from benchmarks.loadtest.seed import ROOT
+
+REVISION, DOWN_REVISION = "aeaf7d3ed512", "f037441db7fe"
+
+_GENERIC_SQL = "SELECT id FROM budget_items WHERE trip_id = $1 ORDER BY date NULLS LAST, id LIMIT 100"
+
+
+def _literal(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _scan(plan: dict) -> tuple[set[str], int]:
+    """Partições lidas e subplanos podados em execução."""
+    relations: set[str] = set()
+    removed = 0
+
+    def walk(node: dict) -> None:
+        nonlocal removed
+        name = node.get("Relation Name", "")
+        if name.startswith("budget_items"):
+            relations.add(name)
+        removed += node.get("Subplans Removed", 0)
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(plan["Plan"])
+    return relations, removed
+
+
+def _explain(conn, sql: str, params: dict) -> dict:
+    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+def _queries(trip_id: int, item_id: int, start, end) -> dict[str, tuple[str, dict]]:
+    listing = (
+        select(BudgetItem)
+        .where(BudgetItem.trip_id == trip_id, BudgetItem.date >= start, BudgetItem.date <= end,
+               BudgetItem.category_id == 1)
+        .order_by(BudgetItem.date.asc().nullslast(), BudgetItem.id.asc())
+        .limit(100)
+    )
+    by_id = select(BudgetItem).where(BudgetItem.trip_id == trip_id, BudgetItem.id == item_id)
+    return {
+        "list_items": (_literal(listing), {}),
+        "get_item": (_literal(by_id), {}),
+        "purge_batch": (_DELETE_ITEMS_SQL.text, {"trip_id": trip_id, "batch": 2000}),
+        "timeseries": (_DAILY_SQL.text, {"trip_id": trip_id, "start": start, "end": end}),
+    }
+
+
+def plan_check(trips: int) -> dict:
+    results: dict[str, dict] = {}
+    with get_engine().connect() as conn:
+        partitions = conn.scalar(text(
+            "SELECT count(*) FROM pg_inherits WHERE inhparent = 'budget_items'::regclass"
+        ))
+        samples = conn.execute(text("""
+            SELECT trip_id, min(id), min(date), max(date) FROM budget_items
+            WHERE trip_id IN (SELECT id FROM trips ORDER BY random() LIMIT :n)
+            GROUP BY trip_id
+        """), {"n": trips}).all()
+        if not samples:
+            raise SystemExit("sem itens: rode python -m benchmarks.loadtest.seed antes")
+
+        for trip_id, item_id, start, end in samples:
+            start = start or end or date(2024, 1, 1)
+            end = end or start + timedelta(days=30)
+            for name, (sql, params) in _queries(trip_id, item_id, start, end).items():
+                relations, _ = _scan(_explain(conn, sql, params))
+                case = results.setdefault(name, {"max_partitions": 0})
+                case["max_partitions"] = max(case["max_partitions"], len(relations))
+
+            # plano genérico: o valor de trip_id só existe na execução
+            conn.exec_driver_sql("SET LOCAL plan_cache_mode = force_generic_plan")
+            conn.exec_driver_sql(f"PREPARE bench_items(int) AS {_GENERIC_SQL}")
+            raw = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE bench_items({int(trip_id)})").scalar()
+            conn.exec_driver_sql("DEALLOCATE bench_items")
+            conn.rollback()
+            relations, removed = _scan((json.loads(raw) if isinstance(raw, str) else raw)[0])
+            case = results.setdefault("generic_plan", {"max_partitions": 0, "subplans_removed": 0})
+            case["max_partitions"] = max(case["max_partitions"], len(relations))
+            case["subplans_removed"] = max(case["subplans_removed"], removed)
+
+    return {"partitions": partitions, "trips_sampled": len(samples), "cases": results}
+
+
+def migrate_timing() -> dict:
+    from alembic.config import main as alembic_main
+
+    def run(command: str, revision: str) -> float:
+        t0 = time.perf_counter()
+        alembic_main(argv=["-c", str(ROOT / "alembic.ini"), command, revision])
+        return round(time.perf_counter() - t0, 2)
+
+    with get_engine().connect() as conn:
+        items = conn.scalar(select(func.count()).select_from(BudgetItem))
+    return {
+        "items": items,
+        "downgrade_s": run("downgrade", DOWN_REVISION),  # particionada -> comum
+        "upgrade_s": run("upgrade", REVISION),  # comum -> particionada
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trips", type=int, default=5, help="viagens de amostra no plan check")
+    parser.add_argument("--migrate", action="store_true", help="mede downgrade/upgrade da migration")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    result: dict = {}
+    if args.migrate:
+        result["migration"] = migrate_timing()
+    result["plans"] = plan_check(args.trips)
+    failed = sorted(name for name, case in result["plans"]["cases"].items() if case["max_partitions"] > 1)
+    result["ok"] = not failed
+
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        if "migration" in result:
+            for key, value in result["migration"].items():
+                print(f"{key:<22}{value}")
+        print(f"{'partitions':<22}{result['plans']['partitions']}")
+        for name, case in result["plans"]["cases"].items():
+            extra = f"  (subplans removidos: {case['subplans_removed']})" if "subplans_removed" in case else ""
+            print(f"{name:<22}{case['max_partitions']} partição(ões){extra}")
+        if failed:
+            print(f"sem pruning: {', '.join(failed)}")
+    sys.exit(0 if result["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()